@@ -3,8 +3,18 @@ try:
 except ImportError:
     __version__ = "?"
 
+from .clock import *
 from .config_schema import *
 from .controller import *
 from .csc import *
+from .estimator import *
+from .follower import *
 from .gcserror import *
+from .gcsreply import *
+from .history import *
+from .kinematics import *
+from .metrics import *
 from .mock_server import *
+from .motion import *
+from .scheduler import *
+from .state import *
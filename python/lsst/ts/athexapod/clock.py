@@ -0,0 +1,86 @@
+"""
+This file is part of ts_ATHexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["ScaledClock"]
+
+import asyncio
+import time
+
+from lsst.ts import utils
+
+
+class ScaledClock:
+    """Simulated time running ``scale`` times faster than the wall clock.
+
+    The mock controller moves its axes, and the CSC paces its polls, waits
+    and telemetry on the same clock, so a simulation runs ``scale`` times
+    faster while every component sees consistent durations. With the
+    default scale of 1, simulated time is wall time.
+
+    Parameters
+    ----------
+    scale : `float`
+        Simulated seconds per wall clock second.
+
+    Raises
+    ------
+    ValueError
+        If ``scale`` is not positive.
+    """
+
+    def __init__(self, scale: float = 1.0) -> None:
+        if scale <= 0:
+            raise ValueError(f"scale={scale} must be positive.")
+        self.scale = scale
+        self._start_tai = utils.current_tai()
+        self._start_monotonic = time.monotonic()
+
+    def tai(self) -> float:
+        """Return the simulated TAI time (unix seconds)."""
+        if self.scale == 1:
+            return utils.current_tai()
+        return self._start_tai + (utils.current_tai() - self._start_tai) * self.scale
+
+    def monotonic(self) -> float:
+        """Return the simulated monotonic time (seconds)."""
+        return self._start_monotonic + (time.monotonic() - self._start_monotonic) * self.scale
+
+    def wall_duration(self, duration: float) -> float:
+        """Return the wall clock duration of a simulated duration.
+
+        Parameters
+        ----------
+        duration : `float`
+            The simulated duration (seconds).
+        """
+        return duration / self.scale
+
+    async def sleep(self, duration: float) -> None:
+        """Sleep for a simulated duration.
+
+        Parameters
+        ----------
+        duration : `float`
+            The simulated duration (seconds).
+        """
+        await asyncio.sleep(duration / self.scale)
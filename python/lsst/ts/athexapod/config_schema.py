@@ -70,5 +70,243 @@ properties:
     max_length:
         description: The maximum number of bytes a message can be. Bytes.
         type: integer
+    pipelined_commands:
+        description: >-
+            Send commands to the controller as soon as they are issued, without
+            waiting for the reply of the previous command? If false, each
+            command/reply cycle holds the connection until the reply is read.
+        type: boolean
+        default: true
+    settings_cache_ttl:
+        description: >-
+            How long to serve the soft limits, pivot point, system velocity,
+            position units and soft limit status from memory instead of querying
+            the controller. Sending a new value always invalidates the cached one.
+            Null disables the cache. Seconds.
+        anyOf:
+            - type: number
+              minimum: 0
+            - type: "null"
+        default: null
+    coalesce_queries:
+        description: >-
+            Share one round trip between concurrent identical queries, e.g. the
+            telemetry and a command reading the positions at the same time.
+            Any command that may change the state of the controller ends the
+            sharing, so a query never gets a reply older than such a command.
+        type: boolean
+        default: true
+    motion_poll_min_interval:
+        description: >-
+            The shortest interval between motion status queries while waiting
+            for a movement to finish. The interval grows up to the heartbeat
+            interval during long movements. Seconds.
+        type: number
+        exclusiveMinimum: 0
+        default: 0.02
+    in_position_tolerance:
+        description: >-
+            Largest following error (difference between the real and target
+            positions) of an axis for the platform to be in position. mm or degree.
+            Null disables the check: the platform is in position as soon as all
+            axes are on target (ONT?) and not moving.
+        anyOf:
+            - type: number
+              exclusiveMinimum: 0
+            - type: "null"
+        default: null
+    in_position_settle_time:
+        description: >-
+            How long the platform must stay in position, all axes on target (ONT?),
+            not moving and within in_position_tolerance if set, before inPosition
+            is reported. Seconds.
+        type: number
+        minimum: 0
+        default: 0
+    move_acceleration:
+        description: >-
+            Acceleration of the platform used to predict the duration of movements.
+            mm/s^2 (and deg/s^2 for rotations).
+        type: number
+        exclusiveMinimum: 0
+        default: 10
+    move_overhead:
+        description: Time added to the predicted duration of every movement. Seconds.
+        type: number
+        minimum: 0
+        default: 0.1
+    move_timeout_factor:
+        description: >-
+            The in-progress acknowledgement of a movement command allows its predicted
+            duration times this factor, plus a heartbeat interval, but never more than
+            movement_timeout. The movement itself is only aborted after movement_timeout.
+        type: number
+        minimum: 1
+        default: 3
+    degraded_move_factor:
+        description: >-
+            Movements that take longer than their predicted duration times this
+            factor are reported as a sign of degraded hardware.
+        type: number
+        minimum: 1
+        default: 1.5
+    follow_mode:
+        description: >-
+            Follow mode, for clients streaming targets or offsets faster than the
+            hexapod settles. moveToPosition and applyPositionOffset are accepted while
+            moving and complete at once; the latest target plus the offsets received
+            since are sent as a single move when the move in progress is done.
+        type: boolean
+        default: false
+    follow_min_interval:
+        description: Shortest interval between the moves sent in follow mode. Seconds.
+        type: number
+        minimum: 0
+        default: 0.1
+    check_workspace:
+        description: >-
+            Reject the moves to poses out of the workspace of the hexapod before
+            sending them, by computing the strut lengths from the kinematics_* geometry.
+            Only enable it with kinematics_* values measured on the hexapod: the
+            defaults are a nominal symmetric geometry, not a calibration of the
+            AT hexapod, and could reject valid moves.
+        type: boolean
+        default: false
+    kinematics_base_radius:
+        description: >-
+            Radius of the circle of the base joints. The kinematics_* defaults are
+            placeholders, not measured on the AT hexapod; see check_workspace. mm
+        type: number
+        exclusiveMinimum: 0
+        default: 105
+    kinematics_platform_radius:
+        description: Radius of the circle of the moving platform joints. mm
+        type: number
+        exclusiveMinimum: 0
+        default: 70
+    kinematics_base_joint_angle:
+        description: >-
+            Half the angle between the two joints of a pair of base joints; the pairs
+            are centered at 0, 120 and 240 degrees from the X axis. degree
+        type: number
+        minimum: 0
+        maximum: 60
+        default: 10
+    kinematics_platform_joint_angle:
+        description: >-
+            Half the angle between the two joints of a pair of platform joints; the pairs
+            are centered at 60, 180 and 300 degrees from the X axis. degree
+        type: number
+        minimum: 0
+        maximum: 60
+        default: 10
+    kinematics_height:
+        description: Height of the platform joints above the base joints at the zero pose. mm
+        type: number
+        exclusiveMinimum: 0
+        default: 95
+    kinematics_strut_min_length:
+        description: Shortest length of a strut, between the centers of its joints. mm
+        type: number
+        minimum: 0
+        default: 103
+    kinematics_strut_max_length:
+        description: Longest length of a strut, between the centers of its joints. mm
+        type: number
+        exclusiveMinimum: 0
+        default: 133
+    reconnect_max_attempts:
+        description: >-
+            How many times to try to restore a lost connection to the controller
+            before going to FAULT. Queries in flight are sent again once reconnected;
+            other commands in flight fail. 0 disables reconnection.
+        type: integer
+        minimum: 0
+        default: 5
+    reconnect_initial_delay:
+        description: >-
+            Delay before the second reconnection attempt; the first one is
+            immediate and the delay doubles after each attempt. Seconds.
+        type: number
+        minimum: 0
+        default: 0.05
+    reconnect_max_delay:
+        description: Longest delay between reconnection attempts. Seconds.
+        type: number
+        minimum: 0
+        default: 2
+    telemetry_position_interval:
+        description: Interval between publishing the positions. Seconds.
+        type: number
+        exclusiveMinimum: 0
+        default: 0.5
+    telemetry_position_deadbands:
+        description: >-
+            Deadband of the X, Y, Z (mm), U, V, W (degree) positions: tel_positionStatus
+            and positionUpdate are only published when a target or real position moved
+            by more than its deadband (or for keepalive, see telemetry_max_silence).
+        type: array
+        items:
+            type: number
+            minimum: 0
+        minItems: 6
+        maxItems: 6
+        default: [0, 0, 0, 0, 0, 0]
+    telemetry_max_silence:
+        description: >-
+            Longest interval without publishing tel_positionStatus, even if the
+            positions did not move. Seconds.
+        type: number
+        minimum: 0
+        default: 5
+    telemetry_error_interval:
+        description: Interval between reading the latest controller error. Seconds.
+        type: number
+        exclusiveMinimum: 0
+        default: 1
+    telemetry_settings_interval:
+        description: >-
+            Interval between reading the soft limits, pivot point and system velocity
+            from the controller, to publish them if they changed. Seconds.
+        type: number
+        exclusiveMinimum: 0
+        default: 30
+    telemetry_max_failures:
+        description: >-
+            Number of consecutive failures of one telemetry stream (positions, error or
+            settings) after which the CSC goes to FAULT; isolated failures are only logged.
+        type: integer
+        minimum: 1
+        default: 3
+    state_max_age:
+        description: >-
+            Maximum age of the controller positions and readiness used to check and plan
+            commands; newer values polled by the telemetry are used without querying the
+            controller. Seconds.
+        type: number
+        minimum: 0
+        default: 0.5
+    position_history_size:
+        description: >-
+            Number of position samples polled from the controller kept in memory, with
+            the statistics of the following error and of the settle time of the moves.
+        type: integer
+        minimum: 1
+        default: 7200
+    position_history_settle_tolerance:
+        description: >-
+            Largest following error of every axis for a move recorded in the
+            position history to count as settled, in the settle time statistics.
+            mm or degree.
+        type: number
+        exclusiveMinimum: 0
+        default: 0.01
+    metrics_log_interval:
+        description: >-
+            Interval between logging summaries of the controller command metrics.
+            0 to never log them. Seconds.
+        type: number
+        minimum: 0
+        default: 600
 """
 )
@@ -22,14 +22,229 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
 import asyncio
+import collections
+import contextlib
+import dataclasses
+import functools
 import logging
+import time
+import types
+from typing import Callable, Iterator, TypeVar
+
+import numpy as np
+from lsst.ts import tcpip, utils
+
+from .gcsreply import AXES, PIVOT_AXES, parse_axis_strings, parse_axis_values
+from .metrics import ControllerMetrics, command_name
+
+# Single character command that stops all axes.
+STOP_ALL_AXES = chr(24)
+
+# Queries of settings that only change when this process sends the
+# matching command, and that command.
+CACHEABLE_QUERIES = {
+    "NLM?": "NLM",
+    "PLM?": "PLM",
+    "SPI?": "SPI",
+    "VLS?": "VLS",
+    "PUN?": "PUN",
+    "SSL?": "SSL",
+}
+
+# Single character queries; the other queries end with "?".
+SINGLE_CHARACTER_QUERIES = frozenset(["\3", "\5", "\6", "\7"])
+# Queries that change the state of the controller: ERR? resets the error.
+NON_IDEMPOTENT_QUERIES = frozenset(["ERR?"])
+# Non idempotent queries that only reset a register of their own: the
+# replies to the other queries are not affected.
+SELF_RESETTING_QUERIES = frozenset(["ERR?"])
+
+# Query sent to realign the replies with the commands, and its replies
+# (controller ready or not ready).
+SENTINEL_QUERY = "\7"
+SENTINEL_REPLIES = frozenset([b"\xb1", b"\xb0"])
+# Time without reading anything after which the stream is considered
+# drained (seconds).
+RESYNC_QUIET_TIME = 0.05
+
+_T = TypeVar("_T")
+
+
+def is_idempotent(cmd: str) -> bool:
+    """Can a command be sent again without side effects?
 
-from lsst.ts import tcpip
+    Parameters
+    ----------
+    cmd : `str`
+        The command.
+
+    Returns
+    -------
+    idempotent : `bool`
+        True for the queries that do not change the state of the
+        controller.
+    """
+    mnemonic = cmd.split(" ", 1)[0]
+    if mnemonic in SINGLE_CHARACTER_QUERIES:
+        return True
+    return mnemonic.endswith("?") and mnemonic not in NON_IDEMPOTENT_QUERIES
+
+
+def changes_replies(cmd: str) -> bool:
+    """Can a command change the replies to other queries?
+
+    Parameters
+    ----------
+    cmd : `str`
+        The command.
+
+    Returns
+    -------
+    changes : `bool`
+        False for the idempotent queries and for the queries that only
+        reset a register of their own, such as ``ERR?``.
+    """
+    return not is_idempotent(cmd) and cmd.split(" ", 1)[0] not in SELF_RESETTING_QUERIES
+
+
+def _parse_hex(buffer: bytearray) -> int:
+    """Parse the hexadecimal bit mask replied to #5 and #6."""
+    return int(buffer, 16)
+
+
+class ReconnectPolicy:
+    """Bounded exponential backoff between attempts to reconnect to the
+    controller.
+
+    The first attempt is made immediately, the following ones after delays
+    growing from ``initial_delay`` by ``factor`` up to ``max_delay``.
+
+    Parameters
+    ----------
+    max_attempts : `int`
+        The number of attempts before giving up.
+    initial_delay : `float`
+        The delay before the second attempt (seconds).
+    max_delay : `float`
+        The longest delay between attempts (seconds).
+    factor : `float`
+        The factor the delay grows by after each attempt.
+    """
+
+    def __init__(
+        self, max_attempts: int = 5, initial_delay: float = 0.05, max_delay: float = 2.0, factor: float = 2.0
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.factor = factor
+
+    def delays(self) -> Iterator[float]:
+        """Yield the delay before each attempt (seconds)."""
+        delay = 0.0
+        for attempt in range(self.max_attempts):
+            yield delay
+            delay = self.initial_delay if attempt == 0 else min(delay * self.factor, self.max_delay)
+
+
+class PendingReply:
+    """A command whose reply has not been fully read yet.
+
+    Parameters
+    ----------
+    cmd : `str`
+        The command that was sent.
+    num_line : `int`
+        The number of lines expected in the reply.
+
+    Attributes
+    ----------
+    buffer : `bytearray`
+        The raw reply lines read so far, including the terminators.
+    num_read : `int`
+        The number of lines read so far.
+    future : `asyncio.Future`
+        Future set to ``buffer`` once all the lines have been read.
+    abandoned : `bool`
+        True if the caller gave up on the reply; the reader still consumes
+        its lines so that the following replies stay aligned.
+    timestamp : `float`
+        TAI time at which the last line was read (unix seconds); nan until
+        then.
+    sent_time : `float`
+        Monotonic time at which the command was written (seconds).
+    """
+
+    __slots__ = ("cmd", "num_line", "buffer", "num_read", "future", "abandoned", "timestamp", "sent_time")
+
+    def __init__(self, cmd: str, num_line: int) -> None:
+        self.cmd: str = cmd
+        self.num_line: int = num_line
+        self.buffer: bytearray = bytearray()
+        self.num_read: int = 0
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.abandoned: bool = False
+        self.timestamp: float = float("nan")
+        self.sent_time: float = 0.0
+
+
+@dataclasses.dataclass(frozen=True)
+class ControllerStatus:
+    """Status of the hexapod controller read in a single round trip.
+
+    Attributes
+    ----------
+    timestamp : `float`
+        TAI time at which the replies were received (unix seconds).
+    target_position : `tuple` of `float`
+        Commanded position of the X, Y, Z (mm), U, V, W (deg) axes.
+    real_position : `tuple` of `float`
+        Current position of the X, Y, Z (mm), U, V, W (deg) axes.
+    error : `int` or `None`
+        The latest error code; reading it resets it in the controller. None
+        if it was not read.
+    motion_status : `tuple` of `bool` or `None`
+        Is each of the X, Y, Z, U, V, W axes moving? None if it was not read.
+    ready : `bool` or `None`
+        Is the controller ready for a new command? None if it was not read.
+    on_target : `tuple` of `bool` or `None`
+        Is each of the X, Y, Z, U, V, W axes on target? None if it was not
+        read.
+    """
+
+    timestamp: float
+    target_position: tuple[float, ...]
+    real_position: tuple[float, ...]
+    error: None | int
+    motion_status: None | tuple[bool, ...] = None
+    ready: None | bool = None
+    on_target: None | tuple[bool, ...] = None
+
+    @property
+    def following_error(self) -> tuple[float, ...]:
+        """Return the difference between the real and target positions."""
+        return tuple(real - target for real, target in zip(self.real_position, self.target_position))
 
 
 class ATHexapodController:
     """Implements wrapper around ATHexapod server.
 
+    Commands are written to the controller as soon as they are issued and a
+    single reader task matches each reply to the oldest pending command,
+    using the number of lines that command expects. The controller
+    processes commands in order, so several commands can be in flight at
+    the same time and throughput is limited by the controller instead of
+    by the round trip time of the link.
+
+    If a reply times out, does not parse or arrives when no command waits
+    for one, the replies can no longer be matched to the commands. The
+    stream is then resynchronized before the next command is written: the
+    queries in flight are taken out of the queue, everything the controller
+    still sends is discarded until it has been quiet for a moment, and a
+    controller ready query (#7) is sent as a sentinel; its reply marks the
+    point from which the replies are aligned again. The idempotent queries
+    that were in flight are then sent again.
+
     Attributes
     ----------
     host : `str`
@@ -37,15 +252,38 @@ class ATHexapodController:
     port : `int`
         The port to connect to.
     timeout : `float`
-        The regular timeout.
-    long_timeout : `float`
-        The longer timeout for actions which move the hexapod.
-    reader : `asyncio.StreamReader`
-        The asynchronous reader.
-    writer : `asyncio.StreamWriter`
-        The asynchronous writer.
+        The time to wait for a reply to a command.
+    pipelined : `bool`
+        If True, only the write of a command is serialized and several
+        commands may wait for their replies at the same time. If False,
+        ``lock`` is held until the reply of each command is read.
     lock : `asyncio.Lock`
-        The lock on the connection.
+        The lock on the command/response cycle, only used when
+        ``pipelined`` is False.
+    write_lock : `asyncio.Lock`
+        The lock on writing a command and queuing its pending reply.
+    last_stop_time : `float` or `None`
+        Monotonic time of the last stop all axes command (seconds).
+    last_stop_latency : `float` or `None`
+        Time it took to write the last stop all axes command (seconds).
+    cache_ttl : `float` or `None`
+        How long the replies to the queries in `CACHEABLE_QUERIES` are
+        served from memory (seconds); None disables the cache.
+    reconnect_policy : `ReconnectPolicy` or `None`
+        How to reconnect when the connection is lost; None to not
+        reconnect.
+    reconnect_count : `int`
+        The number of times the connection was restored.
+    coalesce : `bool`
+        If True, concurrent callers of the same idempotent query with the
+        same arguments share one round trip and its reply.
+    resync_count : `int`
+        The number of times the stream was resynchronized.
+    discarded_lines : `int`
+        The number of lines discarded while resynchronizing.
+    metrics : `ControllerMetrics`
+        Counters, lock wait times and round trip time histograms of each
+        command mnemonic.
     log : `logging.Logger`
         The log for this class.
 
@@ -53,7 +291,24 @@ class ATHexapodController:
     ----------
     log : `logging.Logger` or `None`
         Provide preconfigured log or None to create a default one.
-
+    host : `str`
+        The address of the host.
+    port : `int`
+        The port to connect to.
+    timeout : `float`
+        The time to wait for a reply to a command.
+    pipelined : `bool`
+        Allow several commands to be in flight at the same time?
+    cache_ttl : `float` or `None`
+        How long to cache the replies to slow-changing settings queries
+        (seconds); None (the default) disables the cache.
+    reconnect_policy : `ReconnectPolicy` or `None`
+        How to reconnect when the connection is lost. Queries in flight are
+        sent again once reconnected; other commands are failed. If None
+        (the default), the connection is not restored and everything in
+        flight fails.
+    coalesce : `bool`
+        Share one round trip between concurrent identical queries?
     """
 
     def __init__(
@@ -62,15 +317,56 @@ class ATHexapodController:
         host: str = tcpip.LOCAL_HOST,
         port: int = 50000,
         timeout: float = 2.0,
+        pipelined: bool = True,
+        cache_ttl: None | float = None,
+        reconnect_policy: None | ReconnectPolicy = None,
+        coalesce: bool = True,
     ) -> None:
         self.host: str = host
         self.port: int = port
         self.timeout: float = timeout
-
-        self.reader: None = None
-        self.writer: None = None
+        self.pipelined: bool = pipelined
+        self.coalesce: bool = coalesce
+        # (query, number of lines): task sending it, shared by the callers
+        # of identical queries.
+        self._in_flight: dict[tuple[str, int], asyncio.Task] = dict()
 
         self.lock: asyncio.Lock = asyncio.Lock()
+        self.write_lock: asyncio.Lock = asyncio.Lock()
+
+        self._pending: collections.deque[PendingReply] = collections.deque()
+        self._read_task: None | asyncio.Task = None
+
+        self.last_stop_time: None | float = None
+        self.last_stop_latency: None | float = None
+
+        self.cache_ttl: None | float = cache_ttl
+        # Query mnemonic: (monotonic time, raw reply)
+        self._cache: dict[str, tuple[float, bytearray]] = dict()
+        # Query mnemonic: number of times it was invalidated, to discard
+        # replies to queries sent before the matching setting command.
+        self._cache_generation: collections.Counter[str] = collections.Counter()
+
+        self.reconnect_policy: None | ReconnectPolicy = reconnect_policy
+        self.reconnect_count: int = 0
+        self._reconnect_task: asyncio.Future = utils.make_done_future()
+
+        self.resync_count: int = 0
+        self.discarded_lines: int = 0
+        self._resync_needed: bool = False
+        self._resync_task: asyncio.Future = utils.make_done_future()
+        # True from the moment the replies are known to be misaligned until
+        # the reply to the sentinel query is read; lines are discarded.
+        self._draining: bool = False
+        self._sentinel: None | asyncio.Future = None
+        # Number of replies to controller ready queries in flight when the
+        # draining started, that must not be taken for the reply to the
+        # sentinel.
+        self._stale_sentinels: int = 0
+        # Monotonic time of the last line read.
+        self._last_read: float = 0.0
+
+        self.metrics: ControllerMetrics = ControllerMetrics(start_time=time.monotonic())
 
         if log is None:
             self.log: logging.Logger = logging.getLogger(__name__)
@@ -90,19 +386,52 @@ class ATHexapodController:
         """
         return self.client.connected
 
+    @property
+    def reconnecting(self) -> bool:
+        """Is the controller trying to restore a lost connection?"""
+        return not self._reconnect_task.done()
+
+    @property
+    def connection_failed(self) -> bool:
+        """Was the connection lost and not restored?"""
+        return not self.reconnecting and not self.client.connected and self.client.should_be_connected
+
+    @property
+    def resync_needed(self) -> bool:
+        """Must the stream be resynchronized before the next command?"""
+        return self._resync_needed
+
+    @property
+    def num_pending(self) -> int:
+        """Return the number of commands waiting for a reply."""
+        return len(self._pending)
+
     async def connect(self) -> None:
         """Connect to hexapod controller."""
-        self.client = tcpip.Client(
+        self.client = self._make_client()
+        await self.client.start_task
+        self.invalidate_cache()
+        self._end_resync()
+        self._read_task = asyncio.create_task(self._read_loop())
+
+    def _make_client(self) -> tcpip.Client:
+        """Return a client connecting to the hexapod controller."""
+        return tcpip.Client(
             host=self.host, port=self.port, log=self.log, encoding="ISO-8859-1", terminator=b"\n"
         )
-        await self.client.start_task
 
     async def disconnect(self) -> None:
         """Disconnect from hexapod controller."""
 
+        for task in (self._reconnect_task, self._resync_task):
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        await self._stop_read_loop()
         await self.client.close()
         await self.client.done_task
         self.client = tcpip.Client(host="", port=None, log=self.log)
+        self._fail_pending(ConnectionError("Disconnected from hexapod controller."))
 
     async def write_command(self, cmd: str, has_response: bool = True, num_line: int = 1) -> None | list[str]:
         """Send command to hexapod controller and return response.
@@ -121,31 +450,621 @@ class ATHexapodController:
         replies : `list`
             List with the response(s) from the command.
 
+        Raises
+        ------
+        RuntimeError
+            If not connected to the controller.
+        ConnectionError
+            If the connection is lost, or a command that is not an
+            idempotent query is sent while reconnecting.
+        TimeoutError
+            If the reply is not read within ``timeout``.
+        """
+
+        if not has_response:
+            await self._execute([(cmd, 0)])
+            return None
+
+        [reply] = await self._execute([(cmd, num_line)])
+
+        return [line.decode(self.client.encoding) for line in reply.buffer.split(self.client.terminator)[:-1]]
+
+    async def _query(self, cmd: str, parse: Callable[[bytearray], _T], num_line: int = 1) -> _T:
+        """Send a query and return its parsed reply.
+
+        Parameters
+        ----------
+        cmd : `str`
+            Query to send to hexapod.
+        parse : `Callable`
+            Function parsing the raw reply lines, including the terminators.
+        num_line : `int`
+            The number of expected lines.
+
+        Returns
+        -------
+        value
+            The parsed reply.
+
+        Raises
+        ------
+        ValueError
+            If the reply cannot be parsed; the stream is resynchronized
+            before the next command.
+        """
+        reply = await self._execute_query(cmd, num_line)
+        return self._parse(reply, parse)
+
+    async def _cached_query(
+        self, cmd: str, parse: Callable[[bytearray], _T], num_line: int = 1, refresh: bool = False
+    ) -> _T:
+        """Send a query in `CACHEABLE_QUERIES` or parse its cached reply.
+
+        Parameters
+        ----------
+        cmd : `str`
+            Query to send to hexapod.
+        parse : `Callable`
+            Function parsing the raw reply lines, including the terminators.
+        num_line : `int`
+            The number of expected lines.
+        refresh : `bool`
+            Ignore the cached reply and read the value from the controller?
+
+        Returns
+        -------
+        value
+            The parsed reply.
+        """
+        if self.cache_ttl is None:
+            return await self._query(cmd, parse, num_line)
+
+        mnemonic = cmd.split(" ", 1)[0]
+        cached = self._cache.get(mnemonic)
+        if not refresh and cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+            return parse(cached[1])
+
+        generation = self._cache_generation[mnemonic]
+        reply = await self._execute_query(cmd, num_line)
+        value = self._parse(reply, parse)
+        if generation == self._cache_generation[mnemonic]:
+            self._cache[mnemonic] = (time.monotonic(), reply.buffer)
+        return value
+
+    async def _execute_query(self, cmd: str, num_line: int) -> PendingReply:
+        """Send a query and wait for its reply, sharing the round trip with
+        the identical queries in flight.
+
+        If ``coalesce`` is True, an idempotent query joins the identical
+        query in flight, unless a command that may change the state of the
+        controller was issued since that query; the callers then share the
+        same reply.
+
+        Parameters
+        ----------
+        cmd : `str`
+            Query to send to hexapod.
+        num_line : `int`
+            The number of expected lines.
+
+        Returns
+        -------
+        reply : `PendingReply`
+            The reply; do not modify its buffer.
+        """
+        if not self.coalesce or not is_idempotent(cmd):
+            [reply] = await self._execute([(cmd, num_line)])
+            return reply
+
+        key = (cmd, num_line)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._execute([(cmd, num_line)]))
+            task.add_done_callback(functools.partial(self._query_done, key))
+            self._in_flight[key] = task
+        else:
+            self.metrics.record_coalesced(command_name(cmd))
+        [reply] = await asyncio.shield(task)
+        return reply
+
+    def _query_done(self, key: tuple[str, int], task: asyncio.Task) -> None:
+        """Stop sharing a query that completed.
+
+        Parameters
+        ----------
+        key : (`str`, `int`)
+            The query and its number of lines.
+        task : `asyncio.Task`
+            The task that sent it.
+        """
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Nobody may be left waiting for the reply.
+            task.exception()
+
+    def _parse(self, reply: PendingReply, parse: Callable[[bytearray], _T]) -> _T:
+        """Parse a reply, resynchronizing the stream if it is malformed.
+
+        Parameters
+        ----------
+        reply : `PendingReply`
+            The reply to parse.
+        parse : `Callable`
+            Function parsing the raw reply lines.
+
+        Returns
+        -------
+        value
+            The parsed reply.
+        """
+        try:
+            return parse(reply.buffer)
+        except ValueError as e:
+            self._request_resync(f"could not parse reply {bytes(reply.buffer)!r} to {reply.cmd!r}: {e}")
+            raise
+
+    def invalidate_cache(self, mnemonic: None | str = None) -> None:
+        """Discard cached query replies.
+
+        Parameters
+        ----------
+        mnemonic : `str` or `None`
+            The query to discard, e.g. "NLM?"; if None, discard all of them.
+        """
+        mnemonics = CACHEABLE_QUERIES.keys() if mnemonic is None else [mnemonic]
+        for name in mnemonics:
+            self._cache.pop(name, None)
+            self._cache_generation[name] += 1
+
+    async def refresh_settings(self) -> types.SimpleNamespace:
+        """Read all the cacheable settings from the controller, bypassing
+        and updating the cache.
+
+        Returns
+        -------
+        settings : `types.SimpleNamespace`
+            The ``low_position_soft_limit``, ``high_position_soft_limit``,
+            ``pivot_point``, ``system_velocity``, ``position_unit`` and
+            ``soft_limit_active`` read from the controller.
+        """
+        (
+            low_position_soft_limit,
+            high_position_soft_limit,
+            pivot_point,
+            system_velocity,
+            position_unit,
+            soft_limit_active,
+        ) = await asyncio.gather(
+            self.get_low_position_soft_limit(refresh=True),
+            self.get_high_position_soft_limit(refresh=True),
+            self.getPivotPoint(refresh=True),
+            self.get_sv(refresh=True),
+            self.get_position_unit(refresh=True),
+            self.check_active_soft_limit(refresh=True),
+        )
+        return types.SimpleNamespace(
+            low_position_soft_limit=low_position_soft_limit,
+            high_position_soft_limit=high_position_soft_limit,
+            pivot_point=pivot_point,
+            system_velocity=system_velocity,
+            position_unit=position_unit,
+            soft_limit_active=soft_limit_active,
+        )
+
+    async def _execute(self, commands: list[tuple[str, int]]) -> list[PendingReply]:
+        """Send commands back-to-back in a single write and wait for all
+        their replies.
+
+        Parameters
+        ----------
+        commands : `list` of (`str`, `int`)
+            The commands to send and the number of lines each of them
+            expects; 0 if the command has no reply.
+
+        Returns
+        -------
+        replies : `list` of `PendingReply`
+            The replies of the commands that expect one, in order.
+        """
+        if any(changes_replies(cmd) for cmd, _ in commands):
+            # Queries issued from now on may get a different reply.
+            self._in_flight.clear()
+        queued_time = time.monotonic()
+        async with contextlib.nullcontext() if self.pipelined else self.lock:
+            replies = await self._send(commands, queued_time)
+            try:
+                for reply in replies:
+                    await self._wait_reply(reply)
+            except BaseException:
+                for reply in replies:
+                    reply.abandoned = True
+                raise
+        return replies
+
+    async def _send(
+        self, commands: list[tuple[str, int]], queued_time: None | float = None
+    ) -> list[PendingReply]:
+        """Write commands in a single write and queue their pending replies.
+
+        Parameters
+        ----------
+        commands : `list` of (`str`, `int`)
+            The commands to send and the number of lines each of them
+            expects; 0 if the command has no reply.
+        queued_time : `float` or `None`
+            Monotonic time at which the caller started waiting for the locks,
+            for the metrics; if None, the time this method is called.
+
+        Returns
+        -------
+        replies : `list` of `PendingReply`
+            The pending replies of the commands that expect one.
         """
+        if queued_time is None:
+            queued_time = time.monotonic()
+        if self.reconnecting:
+            if not all(num_line > 0 and is_idempotent(cmd) for cmd, num_line in commands):
+                raise ConnectionError(
+                    f"Not sending {[cmd for cmd, _ in commands]}: reconnecting to hexapod controller."
+                )
+            await asyncio.wait([self._reconnect_task], timeout=self.timeout)
+            if not self.client.connected:
+                raise ConnectionError("Could not reconnect to hexapod controller.")
 
-        async with self.lock:
+        async with self.write_lock:
             if not self.client.connected:
                 raise RuntimeError("Not connected to hexapod controller. Call `connect` first")
+            if self._resync_needed:
+                await self._resync()
+
+            lock_wait = time.monotonic() - queued_time
+            for cmd, _ in commands:
+                self._invalidate_settings(cmd)
+            replies = [PendingReply(cmd, num_line) for cmd, num_line in commands if num_line > 0]
+            encoded = [cmd.encode(self.client.encoding) + self.client.terminator for cmd, _ in commands]
+            self._pending.extend(replies)
+            try:
+                await self.client.write(b"".join(encoded))
+            except Exception:
+                for reply in replies:
+                    self._pending.remove(reply)
+                raise
+            sent_time = time.monotonic()
+            for reply in replies:
+                reply.sent_time = sent_time
+            for (cmd, _), data in zip(commands, encoded):
+                self.metrics.record_sent(command_name(cmd), len(data), lock_wait)
+            return replies
+
+    def _invalidate_settings(self, cmd: str) -> None:
+        """Discard the cached reply of the query that reads the setting
+        changed by ``cmd``, if any.
+        """
+        mnemonic = cmd.split(" ", 1)[0]
+        query = mnemonic + "?"
+        if CACHEABLE_QUERIES.get(query) == mnemonic:
+            self.invalidate_cache(query)
 
-            await self.client.write_str(cmd)
+    async def _wait_reply(self, reply: PendingReply) -> bytearray:
+        """Wait for all the lines of a pending reply.
 
-            if has_response:
-                try:
-                    replies: list[str] = []
-                    for i in range(num_line):
-                        line = await self.client.readline()
-                        line = line.strip(self.client.terminator).decode(self.client.encoding)
-                        self.log.debug(f"Read {i + 1} of {num_line} lines: {line}")
-                        replies.append(line)
-                except TimeoutError:
-                    self.log.warning(
-                        "Timed out waiting for response from controller. Result may be incomplete."
-                    )
-                    raise
-
-                return replies
+        Parameters
+        ----------
+        reply : `PendingReply`
+            The reply to wait for.
+
+        Returns
+        -------
+        buffer : `bytearray`
+            The raw reply lines.
+        """
+        try:
+            return await asyncio.wait_for(asyncio.shield(reply.future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            reply.abandoned = True
+            self.metrics.record_timeout(command_name(reply.cmd))
+            self._request_resync(
+                f"timed out waiting for response to {reply.cmd!r}; "
+                f"read {reply.num_read} of {reply.num_line} lines"
+            )
+            raise
+        except asyncio.CancelledError:
+            reply.abandoned = True
+            raise
+
+    async def _read_loop(self) -> None:
+        """Read replies and hand them to the pending commands in order."""
+        try:
+            while True:
+                line = await self.client.readline()
+                self._handle_line(line)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.log.warning(f"Reader stopped: {e!r}")
+            if self.reconnect_policy is None:
+                self._fail_pending(ConnectionError(f"Lost connection to hexapod controller: {e!r}"))
             else:
-                return None
+                self._reconnect_task = asyncio.create_task(self._reconnect(self.reconnect_policy))
+
+    async def _reconnect(self, policy: ReconnectPolicy) -> None:
+        """Restore the connection and send the idempotent queries that were
+        in flight again.
+
+        Parameters
+        ----------
+        policy : `ReconnectPolicy`
+            The delays between attempts.
+        """
+        retry = [reply for reply in self._pending if not reply.abandoned and is_idempotent(reply.cmd)]
+        for reply in retry:
+            self._pending.remove(reply)
+        self._fail_pending(ConnectionError("Lost connection to hexapod controller; command not retried."))
+
+        t0 = time.monotonic()
+        try:
+            for attempt, delay in enumerate(policy.delays(), start=1):
+                await asyncio.sleep(delay)
+                client = self._make_client()
+                try:
+                    await client.start_task
+                except Exception as e:
+                    self.log.warning(f"Reconnection attempt {attempt} failed: {e!r}")
+                    with contextlib.suppress(Exception):
+                        await client.close()
+                    continue
+
+                with contextlib.suppress(Exception):
+                    await self.client.close()
+                self.client = client
+                self.invalidate_cache()
+                self._end_resync()
+                self._read_task = asyncio.create_task(self._read_loop())
+                self.reconnect_count += 1
+                self.log.info(
+                    f"Reconnected to hexapod controller in {(time.monotonic() - t0) * 1000:.1f} ms "
+                    f"after {attempt} attempt(s); retrying {len(retry)} queries."
+                )
+                await self._resend(retry)
+                return
+        except BaseException:
+            self._fail_replies(retry, ConnectionError("Reconnection to hexapod controller interrupted."))
+            raise
+
+        self.log.error(f"Could not reconnect to hexapod controller after {policy.max_attempts} attempts.")
+        self._fail_replies(retry, ConnectionError("Could not reconnect to hexapod controller."))
+
+    async def _resend(self, replies: list[PendingReply]) -> None:
+        """Send again the commands of pending replies, in a single write.
+
+        Parameters
+        ----------
+        replies : `list` of `PendingReply`
+            The replies to wait for again.
+        """
+        if not replies:
+            return
+        async with self.write_lock:
+            await self._write_again(replies)
+
+    async def _write_again(self, replies: list[PendingReply]) -> None:
+        """Send again the commands of pending replies; ``write_lock`` must
+        be held.
+
+        Parameters
+        ----------
+        replies : `list` of `PendingReply`
+            The replies to wait for again.
+        """
+        for reply in replies:
+            reply.buffer.clear()
+            reply.num_read = 0
+        self._pending.extend(replies)
+        encoded = [reply.cmd.encode(self.client.encoding) + self.client.terminator for reply in replies]
+        try:
+            await self.client.write(b"".join(encoded))
+        except Exception as e:
+            for reply in replies:
+                self._pending.remove(reply)
+            self._fail_replies(replies, ConnectionError(f"Could not send queries again: {e!r}"))
+            return
+        sent_time = time.monotonic()
+        for reply, data in zip(replies, encoded):
+            reply.sent_time = sent_time
+            self.metrics.record_sent(command_name(reply.cmd), len(data), 0.0)
+
+    def _request_resync(self, reason: str) -> None:
+        """Mark the replies as misaligned with the commands and start
+        resynchronizing the stream.
+
+        Lines are discarded from now on, until the reply to the sentinel
+        query is read.
+
+        Parameters
+        ----------
+        reason : `str`
+            Why the stream must be resynchronized.
+        """
+        if not self._resync_needed:
+            self.log.warning(f"Resynchronizing with hexapod controller: {reason}.")
+        self._resync_needed = True
+        self._start_draining()
+        if self._resync_task.done():
+            self._resync_task = asyncio.create_task(self._resync_when_idle())
+
+    async def _resync_when_idle(self) -> None:
+        """Resynchronize the stream as soon as no command is being
+        written.
+        """
+        async with self.write_lock:
+            if not self._resync_needed or not self.client.connected:
+                return
+            try:
+                await self._resync()
+            except Exception as e:
+                self.log.warning(f"Resynchronization failed; will try again before the next command: {e!r}")
+
+    async def _resync(self) -> None:
+        """Drain the stream and realign it with a sentinel query;
+        ``write_lock`` must be held.
+
+        The idempotent queries in flight are sent again once the stream is
+        aligned; the other commands in flight are failed.
+
+        Raises
+        ------
+        TimeoutError
+            If the controller does not stop sending, or does not answer the
+            sentinel query, within ``timeout``.
+        """
+        self._start_draining()
+        retry = [reply for reply in self._pending if not reply.abandoned and is_idempotent(reply.cmd)]
+        for reply in retry:
+            self._pending.remove(reply)
+        self._fail_pending(
+            ConnectionError("Replies from hexapod controller misaligned; command not retried.")
+        )
+
+        t0 = time.monotonic()
+        try:
+            await asyncio.wait_for(self._drain_and_realign(), timeout=self.timeout)
+        except BaseException as e:
+            self._sentinel = None
+            self._stale_sentinels = 0
+            self._fail_replies(
+                retry, ConnectionError(f"Could not resynchronize with hexapod controller: {e!r}")
+            )
+            raise
+
+        self._end_resync()
+        self.resync_count += 1
+        self.log.info(
+            f"Resynchronized with hexapod controller in {(time.monotonic() - t0) * 1000:.1f} ms; "
+            f"{self.discarded_lines} lines discarded so far; retrying {len(retry)} queries."
+        )
+        await self._write_again(retry)
+
+    def _start_draining(self) -> None:
+        """Discard the lines read from now on, until the reply to the
+        sentinel query.
+
+        The replies to the controller ready queries in flight are counted
+        now, because they may be discarded before the resynchronization
+        starts.
+        """
+        if self._draining:
+            return
+        self._draining = True
+        self._stale_sentinels = sum(reply.cmd == SENTINEL_QUERY for reply in self._pending)
+
+    async def _drain_and_realign(self) -> None:
+        """Wait until the controller stops sending, then send the sentinel
+        query and wait for its reply.
+        """
+        while (quiet := time.monotonic() - self._last_read) < RESYNC_QUIET_TIME:
+            await asyncio.sleep(RESYNC_QUIET_TIME - quiet)
+        self._sentinel = asyncio.get_running_loop().create_future()
+        data = SENTINEL_QUERY.encode(self.client.encoding) + self.client.terminator
+        await self.client.write(data)
+        self.metrics.record_sent(command_name(SENTINEL_QUERY), len(data), 0.0)
+        await asyncio.shield(self._sentinel)
+
+    def _end_resync(self) -> None:
+        """Mark the replies as aligned with the commands."""
+        self._resync_needed = False
+        self._draining = False
+        self._stale_sentinels = 0
+        if self._sentinel is not None and not self._sentinel.done():
+            self._sentinel.set_result(None)
+        self._sentinel = None
+
+    def _handle_line(self, line: bytes) -> None:
+        """Assign a line read from the controller to the oldest pending
+        reply.
+
+        Parameters
+        ----------
+        line : `bytes`
+            The line read, including the terminator.
+        """
+        self._last_read = time.monotonic()
+        if self._draining:
+            self._drain_line(line)
+            return
+
+        if not self._pending:
+            self.discarded_lines += 1
+            self._request_resync(f"unexpected line {line!r}")
+            return
+
+        reply = self._pending[0]
+        reply.buffer += line
+        reply.num_read += 1
+        self.log.debug(f"Read {reply.num_read} of {reply.num_line} lines for {reply.cmd!r}: {line!r}")
+        if reply.num_read < reply.num_line:
+            return
+
+        self._pending.popleft()
+        reply.timestamp = utils.current_tai()
+        self.metrics.record_reply(
+            command_name(reply.cmd), len(reply.buffer), time.monotonic() - reply.sent_time
+        )
+        if not reply.future.done():
+            reply.future.set_result(reply.buffer)
+
+    def _drain_line(self, line: bytes) -> None:
+        """Discard a line read while resynchronizing, unless it is the
+        reply to the sentinel query.
+
+        Parameters
+        ----------
+        line : `bytes`
+            The line read, including the terminator.
+        """
+        if line.strip() in SENTINEL_REPLIES:
+            if self._stale_sentinels > 0:
+                self._stale_sentinels -= 1
+            elif self._sentinel is not None and not self._sentinel.done():
+                self._sentinel.set_result(None)
+                return
+        self.discarded_lines += 1
+        self.log.debug(f"Discarding {line!r} while resynchronizing.")
+
+    def _fail_pending(self, exception: Exception) -> None:
+        """Fail all the pending replies.
+
+        Parameters
+        ----------
+        exception : `Exception`
+            The exception the callers waiting for a reply get.
+        """
+        replies = list(self._pending)
+        self._pending.clear()
+        self._fail_replies(replies, exception)
+
+    def _fail_replies(self, replies: list[PendingReply], exception: Exception) -> None:
+        """Fail pending replies that are no longer queued.
+
+        Parameters
+        ----------
+        replies : `list` of `PendingReply`
+            The replies to fail.
+        exception : `Exception`
+            The exception the callers waiting for a reply get.
+        """
+        for reply in replies:
+            if not reply.future.done() and not reply.abandoned:
+                reply.future.set_exception(exception)
+
+    async def _stop_read_loop(self) -> None:
+        """Cancel the reader task."""
+        if self._read_task is None:
+            return
+        self._read_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._read_task
+        self._read_task = None
 
     async def real_position(self) -> list[float]:
         """Return parsed real position string
@@ -167,10 +1086,63 @@ class ATHexapodController:
             W (deg) axis.
 
         """
-        ret = await self.write_command("\3", num_line=6)
-        assert ret is not None
+        return (await self._query("\3", parse_axis_values, num_line=6)).tolist()
 
-        return [float(val.split("=")[1]) for val in ret]
+    async def snapshot(
+        self, read_error: bool = True, read_state: bool = False, read_on_target: bool = False
+    ) -> ControllerStatus:
+        """Return the target position, real position and latest error read
+        in a single round trip.
+
+        The ``MOV?``, ``#3`` and ``ERR?`` queries are sent back-to-back in one
+        write and their replies parsed together.
+
+        Parameters
+        ----------
+        read_error : `bool`
+            Read the latest error? Reading it resets it in the controller.
+        read_state : `bool`
+            Also read the motion status (#5) and whether the controller is
+            ready (#7)?
+        read_on_target : `bool`
+            Also read the on target state (ONT?)?
+
+        Returns
+        -------
+        status : `ControllerStatus`
+            The controller status.
+        """
+        commands = [("MOV? X Y Z U V W", 6), ("\3", 6)]
+        if read_state:
+            commands += [("\5", 1), ("\7", 1)]
+        if read_on_target:
+            commands.append(("ONT?", 6))
+        if read_error:
+            commands.append(("ERR?", 1))
+        target, real, *others = await self._execute(commands)
+
+        positions = np.empty((2, len(AXES)))
+        self._parse(target, functools.partial(parse_axis_values, out=positions[0]))
+        self._parse(real, functools.partial(parse_axis_values, out=positions[1]))
+
+        motion_status = ready = None
+        if read_state:
+            code = self._parse(others.pop(0), _parse_hex)
+            motion_status = tuple([(code & (1 << i)) > 0 for i in range(len(AXES))])
+            ready = self._parse(others.pop(0), bytearray.strip) == chr(177).encode(self.client.encoding)
+        on_target = None
+        if read_on_target:
+            on_target = tuple((self._parse(others.pop(0), parse_axis_values) == 1).tolist())
+
+        return ControllerStatus(
+            timestamp=real.timestamp,
+            target_position=tuple(positions[0].tolist()),
+            real_position=tuple(positions[1].tolist()),
+            error=self._parse(others[0], int) if read_error else None,
+            motion_status=motion_status,
+            ready=ready,
+            on_target=on_target,
+        )
 
     async def motion_status(self) -> tuple[bool, ...]:
         """Return parsed motion status string.
@@ -187,10 +1159,7 @@ class ATHexapodController:
         is_moving : `tuple` of (`bool`, `bool`, `bool`, `bool`, `bool`, `bool`)
 
         """
-        ret = await self.write_command("\5", num_line=1)
-        assert ret is not None
-
-        code = int(ret[0], 16)
+        code = await self._query("\5", _parse_hex)
 
         return tuple([(code & (1 << i)) > 0 for i in range(6)])
 
@@ -217,10 +1186,7 @@ class ATHexapodController:
             The value of each axis changed or not.
 
         """
-        ret = await self.write_command("\6", num_line=1)
-        assert ret is not None
-
-        code = int(ret[0])
+        code = await self._query("\6", _parse_hex)
 
         return tuple([(code & (1 << i)) > 0 for i in range(6)])
 
@@ -238,20 +1204,45 @@ class ATHexapodController:
         comp : `str`
             A character indicating the controller is ready or not ready.
         """
-        ret = await self.write_command("\7", num_line=1)
-        assert ret is not None
+        ret = await self._query("\7", bytearray.strip)
 
-        comp = ret == chr(177)
-        self.log.debug(f"ret={ret} : {chr(177)} : comp={comp}")
+        comp = ret == chr(177).encode(self.client.encoding)
+        self.log.debug(f"ret={ret!r} : {chr(177)} : comp={comp}")
 
         return comp
 
-    async def stop_all_axes(self) -> None:
+    async def stop_all_axes(self) -> float:
         """Stop all axes.
 
         (p. 143) Stop All Axes To confirm that this worked, #5 has to be used.
+
+        The stop byte is written on a priority path that does not wait for
+        ``lock`` or ``write_lock``, so it goes out even while another command
+        holds the channel. The replies of the commands already in flight are
+        still read in order.
+
+        Returns
+        -------
+        latency : `float`
+            Time it took to write the stop byte (seconds).
+
+        Raises
+        ------
+        RuntimeError
+            If not connected to the controller.
         """
-        await self.write_command(chr(24), has_response=False)
+        if not self.client.connected:
+            raise RuntimeError("Not connected to hexapod controller. Call `connect` first")
+
+        self._in_flight.clear()
+        t0 = time.monotonic()
+        data = STOP_ALL_AXES.encode(self.client.encoding) + self.client.terminator
+        await self.client.write(data)
+        self.last_stop_time = t0
+        self.last_stop_latency = time.monotonic() - t0
+        self.metrics.record_sent(command_name(STOP_ALL_AXES), len(data), 0.0)
+        self.log.info(f"Stop all axes written in {self.last_stop_latency * 1000:.3f} ms.")
+        return self.last_stop_latency
 
     async def set_position(
         self,
@@ -320,10 +1311,7 @@ class ATHexapodController:
         response : `list` of `float`
             The current status of axii referenced or not referenced.
         """
-        ret = await self.write_command("FRF?", num_line=6)
-        assert ret is not None
-
-        return [float(val.split("=")[1]) == 1 for val in ret]
+        return (await self._query("FRF?", parse_axis_values, num_line=6) == 1).tolist()
 
     async def reference(self) -> None:
         """Perform a reference in all axes."""
@@ -342,10 +1330,7 @@ class ATHexapodController:
         response : `list` of `float`
             The current target position.
         """
-        ret = await self.write_command("MOV? X Y Z U V W", num_line=6)
-        assert ret is not None
-
-        return [float(val.split("=")[1]) for val in ret]
+        return (await self._query("MOV? X Y Z U V W", parse_axis_values, num_line=6)).tolist()
 
     async def set_low_position_soft_Limit(
         self,
@@ -388,21 +1373,25 @@ class ATHexapodController:
 
         await self.write_command("NLM" + target, has_response=False)
 
-    async def get_low_position_soft_limit(self) -> list[float]:
+    async def get_low_position_soft_limit(self, refresh: bool = False) -> list[float]:
         """Return parsed lower position software limit response.
 
         Get the position "soft limit" which determines the low end of
         the axis travel range in closed-loop operation.
 
+        Parameters
+        ----------
+        refresh : `bool`
+            Read the value from the controller even if it is cached?
+
         Returns
         -------
         response : `list` of `float`
             The current lower limit values.
         """
-        ret = await self.write_command("NLM? X Y Z U V W", num_line=6)
-        assert ret is not None
-
-        return [float(val.split("=")[1]) for val in ret]
+        return (
+            await self._cached_query("NLM? X Y Z U V W", parse_axis_values, num_line=6, refresh=refresh)
+        ).tolist()
 
     async def set_high_position_soft_limit(
         self,
@@ -445,18 +1434,22 @@ class ATHexapodController:
 
         await self.write_command("PLM" + target, has_response=False)
 
-    async def get_high_position_soft_limit(self) -> list[float]:
+    async def get_high_position_soft_limit(self, refresh: bool = False) -> list[float]:
         """Return parsed higher position software limit response.
 
+        Parameters
+        ----------
+        refresh : `bool`
+            Read the value from the controller even if it is cached?
+
         Returns
         -------
         response : `list` of `float`
             The current higher limit values.
         """
-        ret = await self.write_command("PLM? X Y Z U V W", num_line=6)
-        assert ret is not None
-
-        return [float(val.split("=")[1]) for val in ret]
+        return (
+            await self._cached_query("PLM? X Y Z U V W", parse_axis_values, num_line=6, refresh=refresh)
+        ).tolist()
 
     async def on_target(self) -> list[float]:
         """Return parsed on target response
@@ -472,27 +1465,31 @@ class ATHexapodController:
         response : `list` of `float`
             Current on target status of all axii.
         """
-        ret = await self.write_command("ONT?", num_line=6)
-        assert ret is not None
+        return (await self._query("ONT?", parse_axis_values, num_line=6) == 1).tolist()
 
-        return [float(val.split("=")[1]) == 1 for val in ret]
-
-    async def get_position_unit(self) -> list[str]:
+    async def get_position_unit(self, refresh: bool = False) -> list[str]:
         """Return parsed position unit response.
 
         (p. 217) Get Position Unit
 
         Get the current unit of the position.
 
+        Parameters
+        ----------
+        refresh : `bool`
+            Read the value from the controller even if it is cached?
+
         Returns
         -------
         response : `list` of `str`
             The current units of the axii.
         """
-        ret = await self.write_command("PUN? X Y Z U V W", num_line=6)
-        assert ret is not None
-
-        return [val.split("=")[1] for val in ret]
+        return await self._cached_query(
+            "PUN? X Y Z U V W",
+            functools.partial(parse_axis_strings, encoding=self.client.encoding),
+            num_line=6,
+            refresh=refresh,
+        )
 
     async def offset(
         self,
@@ -579,10 +1576,39 @@ class ATHexapodController:
         target += " V " + str(float(v)) if v is not None else ""
         target += " W " + str(float(w)) if w is not None else ""
 
-        ret = await self.write_command("VMO?" + target, num_line=6)
-        assert ret is not None
+        return (await self._query("VMO?" + target, parse_axis_values, num_line=6) == 1).tolist()
+
+    async def check_poses(self, poses: list[list[float]] | np.ndarray) -> np.ndarray:
+        """Return whether the platform can approach each of several poses
+        from the current position.
+
+        One VMO? query per pose; they are all sent back-to-back in a single
+        write and share one round trip, pipelined or not.
+
+        Parameters
+        ----------
+        poses : `numpy.ndarray`
+            The X, Y, Z (mm), U, V, W (deg) poses, of shape (N, 6).
 
-        return [float(val.split("=")[1]) == 1 for val in ret]
+        Returns
+        -------
+        possible : `numpy.ndarray`
+            Can the platform approach each pose, of shape (N,).
+        """
+        poses = np.asarray(poses, dtype=float)
+        if poses.ndim != 2 or poses.shape[1] != len(AXES):
+            raise ValueError(f"poses must have shape (N, {len(AXES)}), not {poses.shape}.")
+        if len(poses) == 0:
+            return np.zeros(0, dtype=bool)
+        commands = [
+            (
+                "VMO? " + " ".join(f"{axis} {value}" for axis, value in zip(AXES.decode(), pose.tolist())),
+                len(AXES),
+            )
+            for pose in poses
+        ]
+        replies = await self._execute(commands)
+        return np.array([np.all(self._parse(reply, parse_axis_values) == 1) for reply in replies])
 
     async def set_pivot_point(
         self, x: None | float = None, y: None | float = None, z: None | float = None
@@ -611,37 +1637,47 @@ class ATHexapodController:
 
         await self.write_command("SPI" + target, has_response=False)
 
-    async def getPivotPoint(self) -> list[float]:
+    async def getPivotPoint(self, refresh: bool = False) -> list[float]:
         """Return parsed pivot point response.
 
         (p. 229) (Get Pivot Point)
 
         Gets the pivot point coordinates.
 
+        Parameters
+        ----------
+        refresh : `bool`
+            Read the value from the controller even if it is cached?
+
         Returns
         -------
         response : `list` of `float`
             The current pivot points of the Hexapod.
         """
-        ret = await self.write_command("SPI?", num_line=3)
-        assert ret is not None
+        return (
+            await self._cached_query(
+                "SPI?", functools.partial(parse_axis_values, keys=PIVOT_AXES), num_line=3, refresh=refresh
+            )
+        ).tolist()
 
-        return [float(val.split("=")[1]) for val in ret]
-
-    async def check_active_soft_limit(self) -> list[float]:
+    async def check_active_soft_limit(self, refresh: bool = False) -> list[float]:
         """Return parsed response for checking if software limit is active.
 
         SSL? (p. 230) Get Soft Limit Status
 
+        Parameters
+        ----------
+        refresh : `bool`
+            Read the value from the controller even if it is cached?
+
         Returns
         -------
         response : `list` of `float`
             The current status of the software limits for each axis.
         """
-        ret = await self.write_command("SSL?", num_line=6)
-        assert ret is not None
-
-        return [float(val.split("=")[1]) == 1 for val in ret]
+        return (
+            await self._cached_query("SSL?", parse_axis_values, num_line=6, refresh=refresh) == 1
+        ).tolist()
 
     async def activate_soft_limit(
         self, x: bool = True, y: bool = True, z: bool = True, u: bool = True, v: bool = True, w: bool = True
@@ -734,10 +1770,7 @@ class ATHexapodController:
         response : `list` of `float`
             The current closed loop velocity for each axis.
         """
-        ret = await self.write_command("VEL?", num_line=6)
-        assert ret is not None
-
-        return [float(val.split("=")[1]) == 1 for val in ret]
+        return (await self._query("VEL?", parse_axis_values, num_line=6)).tolist()
 
     async def set_sv(self, velocity: float) -> None:
         """Set the system velocity.
@@ -757,20 +1790,23 @@ class ATHexapodController:
         """
         await self.write_command(f"VLS {velocity}", has_response=False)
 
-    async def get_sv(self) -> float:
+    async def get_sv(self, refresh: bool = False) -> float:
         """Return parsed response for system velocity.
 
         (p. 252) Gets the velocity of the moving platform of the Hexapod
         that is set with VLS (p. 245).
 
+        Parameters
+        ----------
+        refresh : `bool`
+            Read the value from the controller even if it is cached?
+
         Returns
         -------
         response : `float`
             The current system velocity.
         """
-        ret = await self.write_command("VLS?")
-        assert ret is not None
-        return float(ret[0])
+        return await self._cached_query("VLS?", float, refresh=refresh)
 
     async def get_error(self) -> int:
         """Return get error response.
@@ -784,6 +1820,4 @@ class ATHexapodController:
         response : `int`
             The latest error code.
         """
-        ret = await self.write_command("ERR?", num_line=1)
-        assert ret is not None
-        return int(ret[0])
+        return await self._query("ERR?", int)
@@ -24,21 +24,33 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 __all__ = ["ATHexapodCSC", "execute_csc"]
 
 import asyncio
+import math
 import os
+import time
 import traceback
 import types
 import pathlib
+from typing import Awaitable, Callable, Sequence
 
+import numpy as np
 from lsst.ts import salobj
 from lsst.ts import utils
 from lsst.ts.xml.enums import ATHexapod
 from lsst.ts.xml import sal_enums as sal_enums
 
 from . import __version__
+from .clock import ScaledClock
 from .config_schema import CONFIG_SCHEMA
-from .controller import ATHexapodController
-from .gcserror import translate_error
+from .controller import ATHexapodController, ControllerStatus, ReconnectPolicy
+from .estimator import MoveEstimator
+from .follower import PoseFollower
+from .gcserror import PIError, translate_error
+from .history import PositionHistory
+from .kinematics import HexapodKinematics
 from .mock_server import MockServer
+from .motion import InPositionDetector, MotionInterruptedError, MotionMonitor
+from .scheduler import TelemetryScheduler
+from .state import ControllerStateHub
 from .wizardry import LONG_TIMEOUT
 
 CONNECTION_FAILED = 100
@@ -46,6 +58,11 @@ TEL_LOOP_CLOSED = 101
 CONTROLLER_NOT_READY = 102
 REFERENCING_TIMEOUT = 103
 REFERENCING_ERROR = 104
+FOLLOW_MOVE_FAILED = 105
+
+# Interval between motion status queries while waiting for a stop to halt
+# the hexapod (seconds).
+STOP_POLL_INTERVAL = 0.02
 
 
 def execute_csc() -> None:
@@ -64,6 +81,12 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
         The inital state that the CSC starts in.
     simulation_mode : `int`
         Whether the csc starts in simulation mode or not.
+    override : `str`
+        Configuration override file to apply if ``initial_state`` is
+        `State.DISABLED` or `State.ENABLED`.
+    time_scale : `float`
+        Simulated seconds per wall clock second, to run simulations faster
+        than real time, e.g. in unit tests; only allowed in simulation mode.
 
     Attributes
     ----------
@@ -72,10 +95,40 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
     config : `dict`
         A dictionary of parsed yaml that provides configuration information
         for the CSC.
+    clock : `ScaledClock`
+        The clock the mock controller moves on; the polls, waits and
+        telemetry intervals, which are configured in simulated seconds,
+        are converted to wall clock durations with it.
     run_telemetry_task : `bool`
         Whether the telemetry should run or not.
     telemetry_task : `asyncio.Task`
         The task that handles telemetry.
+    telemetry_scheduler : `TelemetryScheduler` or `None`
+        The scheduler of the telemetry streams, while telemetry runs.
+    state_hub : `ControllerStateHub` or `None`
+        The latest positions, motion status and readiness of the controller,
+        shared by the telemetry and the commands.
+    kinematics : `HexapodKinematics` or `None`
+        The kinematics of the hexapod, used to check poses without querying
+        the controller; None until configured.
+    position_limits : `tuple` [`list` of `float`] or `None`
+        The lower and higher position soft limits of each axis last set
+        with `set_limits`; None if not set yet.
+    scan_task : `asyncio.Future`
+        The scan in progress, if not done; see `scan`.
+    in_position_detector : `InPositionDetector` or `None`
+        Detects when the platform settles at the end of a move; None while
+        not connected.
+    position_history : `PositionHistory` or `None`
+        The target and real positions of every state polled, published in
+        tel_positionStatus or not, with following error and settle time
+        statistics; None until configured.
+    follower : `PoseFollower` or `None`
+        Merges the moveToPosition and applyPositionOffset commands received
+        in follow mode into the moves sent; None while not connected.
+    last_stop_halt_latency : `float` or `None`
+        Time between the last stopAllAxes command and the hexapod reporting
+        no motion (seconds); None if it has not been measured.
     """
 
     valid_simulation_modes = [0, 1]
@@ -86,26 +139,56 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
         config_dir: None | pathlib.Path | str = None,
         initial_state: None | sal_enums.State | int = sal_enums.State.STANDBY,
         simulation_mode: int = 0,
+        override: str = "",
+        time_scale: float = 1.0,
     ):
+        if time_scale != 1 and not simulation_mode:
+            raise ValueError(f"time_scale={time_scale} is only allowed in simulation mode.")
+        self.clock: ScaledClock = ScaledClock(scale=time_scale)
         super().__init__(
             name="ATHexapod",
             index=0,
             config_dir=config_dir,
             initial_state=initial_state,
             simulation_mode=simulation_mode,
+            override=override,
             config_schema=CONFIG_SCHEMA,
         )
 
         self._detailed_state: ATHexapod.DetailedState = ATHexapod.DetailedState.NOTINMOTION
         self.config: None | types.SimpleNamespace = None
         self.controller: None | ATHexapodController = None
+        self.motion_monitor: None | MotionMonitor = None
+        self.state_hub: None | ControllerStateHub = None
+        self.move_estimator: MoveEstimator = MoveEstimator()
+        self.kinematics: None | HexapodKinematics = None
+        self.position_limits: None | tuple[list[float], list[float]] = None
+        self.scan_task: asyncio.Future = utils.make_done_future()
+        self.follower: None | PoseFollower = None
+        self.in_position_detector: None | InPositionDetector = None
+        self.position_history: None | PositionHistory = None
 
         self.run_telemetry_task: bool = False
         self.telemetry_task: asyncio.Future = utils.make_done_future()
+        self.telemetry_scheduler: None | TelemetryScheduler = None
+        # The settings read from the controller by the telemetry.
+        self._controller_settings: None | types.SimpleNamespace = None
+        # Monotonic time tel_positionStatus was last published, and whether
+        # the hexapod started or stopped moving since it was last polled.
+        self._position_status_time: float = -math.inf
+        self._motion_reported: bool = False
+        # state_hub.change_count when the telemetry last checked it.
+        self._position_change_count: int = 0
 
         self._ready: bool = False
         self.mock_server: None | MockServer = None
 
+        # The controller reports PI_CNTR_STOP after a stop all axes command.
+        self._stop_error_expected: bool = False
+        # Was the scan in progress stopped by stopAllAxes?
+        self._scan_stopped: bool = False
+        self.last_stop_halt_latency: None | float = None
+
     @property
     def ready(self) -> bool:
         """Returns the state of the ATHexapod as ready or not.
@@ -137,6 +220,10 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
         """
         if self.detailed_state not in [ATHexapod.DetailedState(substate) for substate in substates]:
             raise salobj.ExpectedError(f"{action} not allowed in {self.detailed_state}")
+        if not self.scan_task.done():
+            raise salobj.ExpectedError(f"{action} not allowed while scanning.")
+        if self.follower is not None and not self.follower.idle:
+            raise salobj.ExpectedError(f"{action} not allowed while following.")
 
     @property
     def detailed_state(self) -> ATHexapod.DetailedState:
@@ -176,6 +263,22 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
 
         self.config = config
 
+        self.move_estimator = MoveEstimator(
+            acceleration=self.config.move_acceleration, overhead=self.config.move_overhead
+        )
+        self.position_history = PositionHistory(
+            size=self.config.position_history_size, tolerance=self.config.position_history_settle_tolerance
+        )
+        self.kinematics = HexapodKinematics.symmetric(
+            base_radius=self.config.kinematics_base_radius,
+            platform_radius=self.config.kinematics_platform_radius,
+            base_joint_angle=self.config.kinematics_base_joint_angle,
+            platform_joint_angle=self.config.kinematics_platform_joint_angle,
+            height=self.config.kinematics_height,
+            min_length=self.config.kinematics_strut_min_length,
+            max_length=self.config.kinematics_strut_max_length,
+        )
+
         await self.evt_settingsAppliedVelocities.set_write(systemSpeed=self.config.speed)
 
         await self.evt_settingsAppliedPivot.set_write(
@@ -196,10 +299,13 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
             timeout=LONG_TIMEOUT,
             result="Waiting for device connection",
         )
-        if self.simulation_mode and self.mock_server is None:
-            self.mock_server = MockServer(port=50000)
-            await self.mock_server.start_task
         await super().begin_start(data)
+        if self.simulation_mode:
+            if self.mock_server is None:
+                self.mock_server = MockServer(port=50000, clock=self.clock)
+                await self.mock_server.start_task
+            # The mock moves within the configured workspace.
+            self.mock_server.device.kinematics = self.kinematics
 
     async def end_start(self, data: salobj.BaseMsgType) -> None:
         """Execute after state transition from STANDBY to DISABLE.
@@ -214,10 +320,51 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
         """
         assert self.config is not None
         self.controller = ATHexapodController(
-            log=self.log, host=self.host, port=self.config.port, timeout=self.config.movement_timeout
+            log=self.log,
+            host=self.host,
+            port=self.config.port,
+            timeout=self.config.movement_timeout,
+            pipelined=self.config.pipelined_commands,
+            cache_ttl=self.config.settings_cache_ttl,
+            coalesce=self.config.coalesce_queries,
+            reconnect_policy=(
+                ReconnectPolicy(
+                    max_attempts=self.config.reconnect_max_attempts,
+                    initial_delay=self.config.reconnect_initial_delay,
+                    max_delay=self.config.reconnect_max_delay,
+                )
+                if self.config.reconnect_max_attempts > 0
+                else None
+            ),
         )
         if self.mock_server is not None:
             self.controller.port = self.mock_server.port
+        self.state_hub = ControllerStateHub(
+            controller=self.controller, log=self.log, status_callback=self.record_position
+        )
+        self.motion_monitor = MotionMonitor(
+            controller=self.controller,
+            log=self.log,
+            min_interval=self.clock.wall_duration(self.config.motion_poll_min_interval),
+            max_interval=self.heartbeat_interval,
+            state_callback=self.report_motion,
+            state_hub=self.state_hub,
+        )
+        self.in_position_detector = InPositionDetector(
+            controller=self.controller,
+            log=self.log,
+            tolerance=self.config.in_position_tolerance,
+            settle_time=self.clock.wall_duration(self.config.in_position_settle_time),
+            poll_interval=self.clock.wall_duration(self.config.motion_poll_min_interval),
+            state_hub=self.state_hub,
+        )
+        self.follower = PoseFollower(
+            move=self.follow_move,
+            read_target=self.controller.target_position,
+            log=self.log,
+            min_interval=self.clock.wall_duration(self.config.follow_min_interval),
+            failure_callback=self.follow_failed,
+        )
         try:
             await self.controller.connect()
         except Exception as e:
@@ -243,6 +390,15 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
         except Exception:
             self.log.exception("Exception closing telemetry task.")
 
+        if self.follower is not None:
+            await self.follower.close()
+            self.follower = None
+        if self.motion_monitor is not None:
+            await self.motion_monitor.close()
+            self.motion_monitor = None
+        self.in_position_detector = None
+        self.state_hub = None
+
         if self.controller is not None:
             try:
                 await self.controller.disconnect()
@@ -305,6 +461,8 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
             self.log.warning("Referencing Axis.")
             assert self.controller is not None
             await self.controller.reference()
+            assert self.state_hub is not None
+            self.state_hub.invalidate_referenced()
             await self.report_detailed_state(ATHexapod.DetailedState.INMOTION)
             try:
                 await asyncio.wait_for(self.wait_movement_done(), timeout=self.config.reference_timeout)
@@ -324,17 +482,10 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
                     report="Exception happened while referencing hexapod.",
                     traceback=traceback.format_exc(),
                 )
-        assert self.controller is not None
-        current_position = await self.controller.real_position()
+        assert self.state_hub is not None
+        current_position = (await self.state_hub.get()).real_position
 
-        await self.evt_positionUpdate.set_write(
-            positionX=current_position[0],
-            positionY=current_position[1],
-            positionZ=current_position[2],
-            positionU=current_position[3],
-            positionV=current_position[4],
-            positionW=current_position[5],
-        )
+        await self.publish_position_update(current_position)
 
         await super().end_enable(data)
 
@@ -363,13 +514,12 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
         None
         """
         assert self.controller is not None
-        await self.controller.set_low_position_soft_Limit(
-            -xy_max, -xy_max, limit_z_min, -limit_uv_max, -limit_uv_max, limit_w_min
-        )
+        low_limits = [-xy_max, -xy_max, limit_z_min, -limit_uv_max, -limit_uv_max, limit_w_min]
+        high_limits = [xy_max, xy_max, limit_z_max, limit_uv_max, limit_uv_max, limit_w_max]
+        await self.controller.set_low_position_soft_Limit(*low_limits)
 
-        await self.controller.set_high_position_soft_limit(
-            xy_max, xy_max, limit_z_max, limit_uv_max, limit_uv_max, limit_w_max
-        )
+        await self.controller.set_high_position_soft_limit(*high_limits)
+        self.position_limits = (low_limits, high_limits)
 
         await self.evt_settingsAppliedPositionLimits.set_write(
             limitXYMax=xy_max,
@@ -380,6 +530,41 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
             limitWMax=limit_w_max,
         )
 
+    async def validate_poses(
+        self, poses: list[list[float]] | np.ndarray, cross_check: bool = False
+    ) -> types.SimpleNamespace:
+        """Check a batch of candidate poses, e.g. the steps of a focus scan,
+        without moving the hexapod.
+
+        Every pose is checked at once against the workspace of the hexapod
+        (`HexapodKinematics`), using the current pivot point, and against the
+        position soft limits set with `set_limits`.
+
+        Parameters
+        ----------
+        poses : `numpy.ndarray`
+            The X, Y, Z (mm), U, V, W (deg) poses, of shape (N, 6).
+        cross_check : `bool`
+            Also ask the controller whether it can approach each pose from
+            the current position (VMO?), in one pipelined burst.
+
+        Returns
+        -------
+        validation : `types.SimpleNamespace`
+            The result of `HexapodKinematics.validate`, plus ``controller``:
+            the answer of the controller for each pose, of shape (N,), if
+            ``cross_check``; otherwise None.
+        """
+        assert self.controller is not None
+        assert self.kinematics is not None
+        pivot = await self.controller.getPivotPoint()
+        low_limits, high_limits = self.position_limits if self.position_limits is not None else (None, None)
+        validation = self.kinematics.validate(
+            poses, pivot=pivot, low_limits=low_limits, high_limits=high_limits
+        )
+        validation.controller = await self.controller.check_poses(poses) if cross_check else None
+        return validation
+
     async def do_applyPositionLimits(self, data: salobj.BaseMsgType) -> None:
         """Apply the position limits.
 
@@ -400,20 +585,35 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
         data
         """
         self.assert_enabled("moveToPosition")
+        assert self.config is not None
+        if self.config.follow_mode:
+            assert self.follower is not None
+            target = [data.x, data.y, data.z, data.u, data.v, data.w]
+            await self.assert_ready("moveToPosition")
+            await self.assert_referenced("moveToPosition")
+            await self.check_target(target)
+            self.follower.set_target(target)
+            return
         await self.assert_ready("moveToPosition")
         await self.assert_referenced("moveToPosition")
         assert self.controller is not None
 
         self.assert_substate([ATHexapod.DetailedState.NOTINMOTION], "moveToPosition")
 
+        expected_duration = await self.predict_move([data.x, data.y, data.z, data.u, data.v, data.w])
+        await self.cmd_moveToPosition.ack_in_progress(data, timeout=self.move_timeout(expected_duration))
+
         await self.report_detailed_state(ATHexapod.DetailedState.INMOTION)
         await self.evt_inPosition.set_write(inPosition=False, force_output=True)
 
         await self.controller.set_position(data.x, data.y, data.z, data.u, data.v, data.w)
-        assert self.config is not None
 
         try:
-            await asyncio.wait_for(self.wait_movement_done(), timeout=self.config.movement_timeout)
+            await asyncio.wait_for(
+                self.wait_in_position(expected_duration), timeout=self.config.movement_timeout
+            )
+        except salobj.ExpectedError:
+            raise
         except Exception as e:
             self.log.exception("Error executing moveToPosition command")
             raise e
@@ -422,16 +622,130 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
         finally:
             await self.report_detailed_state(ATHexapod.DetailedState.NOTINMOTION)
 
-            current_position = await self.controller.real_position()
+            assert self.state_hub is not None
+            current_position = (await self.state_hub.get()).real_position
 
-            await self.evt_positionUpdate.set_write(
-                positionX=current_position[0],
-                positionY=current_position[1],
-                positionZ=current_position[2],
-                positionU=current_position[3],
-                positionV=current_position[4],
-                positionW=current_position[5],
+            await self.publish_position_update(current_position)
+
+    async def predict_move(self, target: list[float], relative: bool = False) -> float:
+        """Check that a movement is possible and predict its duration from
+        the current position.
+
+        Parameters
+        ----------
+        target : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) target position, or offset from
+            the commanded position if ``relative``.
+        relative : `bool`
+            Is ``target`` an offset?
+
+        Returns
+        -------
+        duration : `float`
+            The predicted duration (seconds).
+
+        Raises
+        ------
+        salobj.ExpectedError
+            If the target is out of the position soft limits or the
+            workspace of the hexapod, or the system velocity is zero.
+        """
+        assert self.controller is not None
+        assert self.state_hub is not None
+        assert self.config is not None
+        status, velocity, pivot = await asyncio.gather(
+            self.state_hub.get(max_age=self.config.state_max_age),
+            self.system_velocity(),
+            self.controller.getPivotPoint(),
+        )
+        if relative:
+            target = [position + offset for position, offset in zip(status.target_position, target)]
+        await self.check_target(target, pivot)
+
+        return self.move_estimator.duration(status.real_position, target, velocity, pivot)
+
+    async def system_velocity(self) -> float:
+        """Return the system velocity the hexapod moves at.
+
+        Returns
+        -------
+        velocity : `float`
+            The system velocity (mm/s and deg/s).
+
+        Raises
+        ------
+        salobj.ExpectedError
+            If the velocity is not positive: the hexapod cannot move.
+        """
+        assert self.controller is not None
+        velocity = await self.controller.get_sv()
+        if velocity <= 0:
+            raise salobj.ExpectedError(
+                f"The system velocity is {velocity}; set it with setMaxSystemSpeeds before moving."
             )
+        return velocity
+
+    async def check_target(self, target: list[float], pivot: None | list[float] = None) -> None:
+        """Check that a target is within the position soft limits and, if
+        ``check_workspace`` is enabled, the workspace of the hexapod.
+
+        Parameters
+        ----------
+        target : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) target position.
+        pivot : `list` of `float` or `None`
+            The X, Y, Z pivot point (mm); if None, read it.
+
+        Raises
+        ------
+        salobj.ExpectedError
+            If the target is out of the soft limits or the workspace.
+        """
+        assert self.config is not None
+        if self.position_limits is not None:
+            low_limits, high_limits = self.position_limits
+            out = [
+                f"{axis}={value} not in [{low}, {high}]"
+                for axis, value, low, high in zip("XYZUVW", target, low_limits, high_limits)
+                if not low <= value <= high
+            ]
+            if out:
+                raise salobj.ExpectedError(
+                    f"Target position {target} is out of the position soft limits: {'; '.join(out)}."
+                )
+        if self.config.check_workspace:
+            assert self.controller is not None
+            assert self.kinematics is not None
+            if pivot is None:
+                pivot = await self.controller.getPivotPoint()
+            reason = self.kinematics.check(target, pivot)
+            if reason is not None:
+                raise salobj.ExpectedError(f"Target position {target} is out of the workspace: {reason}.")
+
+    def move_timeout(self, expected_duration: float) -> float:
+        """Return the in-progress acknowledgement timeout of a movement
+        command.
+
+        The movement itself is only aborted after ``movement_timeout``: the
+        prediction is not calibrated enough to bound it.
+
+        Parameters
+        ----------
+        expected_duration : `float`
+            The predicted duration of the movement (seconds).
+
+        Returns
+        -------
+        timeout : `float`
+            The timeout (wall clock seconds), never longer than
+            ``movement_timeout``.
+        """
+        assert self.config is not None
+        return min(
+            self.config.movement_timeout,
+            self.clock.wall_duration(expected_duration * self.config.move_timeout_factor)
+            + self.heartbeat_interval,
+        )
 
     async def do_setMaxSystemSpeeds(self, data: salobj.BaseMsgType) -> None:
         """Set max system speeds.
@@ -455,22 +769,194 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
         data
         """
         self.assert_enabled("applyPositionOffset")
+        assert self.config is not None
+        if self.config.follow_mode:
+            assert self.follower is not None
+            offset = [data.x, data.y, data.z, data.u, data.v, data.w]
+            await self.assert_ready("applyPositionOffset")
+            await self.assert_referenced("applyPositionOffset")
+            await self.check_target((await self.follower.merged_target(offset)).tolist())
+            self.follower.add_offset(offset)
+            return
         self.assert_substate([ATHexapod.DetailedState.NOTINMOTION], "applyPositionOffset")
+        expected_duration = await self.predict_move(
+            [data.x, data.y, data.z, data.u, data.v, data.w], relative=True
+        )
+        await self.cmd_applyPositionOffset.ack_in_progress(data, timeout=self.move_timeout(expected_duration))
+
         await self.report_detailed_state(ATHexapod.DetailedState.INMOTION)
         assert self.controller is not None
         await self.controller.offset(data.x, data.y, data.z, data.u, data.v, data.w)
-        assert self.config is not None
-        await asyncio.wait_for(self.wait_movement_done(), self.config.movement_timeout)
+        await asyncio.wait_for(self.wait_in_position(expected_duration), self.config.movement_timeout)
         await self.evt_inPosition.set_write(inPosition=True, force_output=True)
         await self.report_detailed_state(ATHexapod.DetailedState.NOTINMOTION)
-        current_position = await self.controller.real_position()
-        await self.evt_positionUpdate.set_write(
-            positionX=current_position[0],
-            positionY=current_position[1],
-            positionZ=current_position[2],
-            positionU=current_position[3],
-            positionV=current_position[4],
-            positionW=current_position[5],
+        assert self.state_hub is not None
+        current_position = (await self.state_hub.get()).real_position
+        await self.publish_position_update(current_position)
+
+    async def scan(
+        self,
+        poses: Sequence[Sequence[float]] | np.ndarray,
+        dwell_times: float | Sequence[float] = 0.0,
+        point_callback: None | Callable[[int, tuple[float, ...]], Awaitable[None]] = None,
+    ) -> list[tuple[float, ...]]:
+        """Move through a list of poses back-to-back, e.g. for a focus
+        sweep.
+
+        The whole list is validated against the position soft limits, and
+        the workspace if ``check_workspace`` is enabled, and the readiness
+        and referencing of the hexapod checked, once before the first move;
+        then each move is sent as soon as the previous pose is reached and
+        its dwell time has elapsed. The duration of every move is predicted locally, so the end
+        of each move is detected without polling much before it.
+
+        At each pose, inPosition and positionUpdate are published, then
+        ``point_callback`` is awaited, e.g. to take an exposure, before the
+        dwell time starts. stopAllAxes stops the scan.
+
+        There is no SAL command for scans in the ATHexapod XML interface, so
+        this is only available to code running the CSC in process, e.g. a
+        script or a test.
+
+        Parameters
+        ----------
+        poses : `numpy.ndarray`
+            The X, Y, Z (mm), U, V, W (deg) poses, of shape (N, 6).
+        dwell_times : `float` or `list` of `float`
+            Time to stay at each pose (seconds); a single value for all.
+        point_callback : `Callable` or `None`
+            Coroutine called with the index of each pose and the position
+            reached.
+
+        Returns
+        -------
+        positions : `list` of `tuple` of `float`
+            The position reached at each pose.
+
+        Raises
+        ------
+        salobj.ExpectedError
+            If a pose is out of the workspace or the soft limits, the
+            hexapod is not referenced, or the scan is stopped by
+            stopAllAxes.
+        asyncio.CancelledError
+            If the caller is cancelled; the scan is cancelled too.
+        """
+        self.assert_enabled("scan")
+        self.assert_substate([ATHexapod.DetailedState.NOTINMOTION], "scan")
+        poses = np.asarray(poses, dtype=float)
+        dwell_times = np.broadcast_to(np.asarray(dwell_times, dtype=float), poses.shape[:1])
+
+        assert self.config is not None
+        validation = await self.validate_poses(poses)
+        valid = validation.valid if self.config.check_workspace else validation.within_limits.all(axis=1)
+        if not np.all(valid):
+            raise salobj.ExpectedError(
+                f"Scan poses {np.flatnonzero(~valid).tolist()} are out of the workspace "
+                "or the position soft limits."
+            )
+        await self.assert_ready("scan")
+        await self.assert_referenced("scan")
+
+        self._scan_stopped = False
+        self.scan_task = asyncio.ensure_future(self._scan(poses, dwell_times, point_callback))
+        try:
+            return await self.scan_task
+        except asyncio.CancelledError:
+            if not self._scan_stopped:
+                raise
+            raise salobj.ExpectedError("Scan stopped by stopAllAxes.")
+
+    async def _scan(
+        self,
+        poses: np.ndarray,
+        dwell_times: np.ndarray,
+        point_callback: None | Callable[[int, tuple[float, ...]], Awaitable[None]],
+    ) -> list[tuple[float, ...]]:
+        """Move through validated poses; see `scan`."""
+        assert self.controller is not None
+        assert self.state_hub is not None
+        assert self.config is not None
+        status, velocity, pivot = await asyncio.gather(
+            self.state_hub.get(max_age=self.config.state_max_age),
+            self.system_velocity(),
+            self.controller.getPivotPoint(),
+        )
+        start = status.real_position
+        positions: list[tuple[float, ...]] = []
+        for index, (pose, dwell_time) in enumerate(zip(poses.tolist(), dwell_times.tolist())):
+            expected_duration = self.move_estimator.duration(start, pose, velocity, pivot)
+            await self.evt_inPosition.set_write(inPosition=False, force_output=True)
+            await self.controller.set_position(*pose)
+            status = await asyncio.wait_for(
+                self.wait_in_position(expected_duration), timeout=self.config.movement_timeout
+            )
+
+            position = status.real_position
+            positions.append(position)
+            await self.evt_inPosition.set_write(inPosition=True, force_output=True)
+            await self.publish_position_update(position)
+            if point_callback is not None:
+                await point_callback(index, position)
+            if dwell_time > 0:
+                await self.clock.sleep(dwell_time)
+            start = pose
+        return positions
+
+    async def follow_move(self, target: list[float]) -> None:
+        """Send a move merged by the follower and wait for it to be done.
+
+        inPosition is only reported once no other update is pending.
+
+        Parameters
+        ----------
+        target : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) target.
+        """
+        assert self.controller is not None
+        assert self.state_hub is not None
+        assert self.follower is not None
+        assert self.config is not None
+        expected_duration = await self.predict_move(target)
+        await self.report_detailed_state(ATHexapod.DetailedState.INMOTION)
+        await self.evt_inPosition.set_write(inPosition=False)
+        try:
+            await self.controller.set_position(*target)
+            status = await asyncio.wait_for(
+                self.wait_in_position(expected_duration), timeout=self.config.movement_timeout
+            )
+        finally:
+            if not self.follower.pending:
+                await self.report_detailed_state(ATHexapod.DetailedState.NOTINMOTION)
+        if self.follower.pending:
+            return
+
+        position = status.real_position
+        await self.evt_inPosition.set_write(inPosition=True)
+        await self.publish_position_update(position)
+
+    async def follow_failed(self, target: None | list[float], exception: Exception) -> None:
+        """Go to FAULT because a move sent by the follower failed.
+
+        The commands that queued the move were already acknowledged, so
+        this is how the failure reaches the clients. The pending updates
+        are discarded.
+
+        Parameters
+        ----------
+        target : `list` of `float` or `None`
+            The X, Y, Z (mm), U, V, W (deg) target of the move.
+        exception : `Exception`
+            Why the move failed.
+        """
+        assert self.follower is not None
+        self.follower.clear()
+        await self.fault(
+            code=FOLLOW_MOVE_FAILED,
+            report=f"Follow move to {target} failed: {exception!r}",
+            traceback="".join(
+                traceback.format_exception(type(exception), exception, exception.__traceback__)
+            ),
         )
 
     async def do_pivot(self, data: salobj.BaseMsgType) -> None:
@@ -498,51 +984,287 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
         """
         self.assert_enabled("stopAllAxes")
         assert self.controller is not None
+        # Set before sending the stop: the telemetry may read the error
+        # while the stop is being written.
+        self._stop_error_expected = True
         await self.controller.stop_all_axes()
+        if not self.scan_task.done():
+            self._scan_stopped = True
+            self.scan_task.cancel()
+        if self.follower is not None:
+            self.follower.clear()
+
+        assert self.motion_monitor is not None
+        self.motion_monitor.interrupt("Movement interrupted by stopAllAxes.")
+        if self.in_position_detector is not None:
+            self.in_position_detector.interrupt("Movement interrupted by stopAllAxes.")
+
+        try:
+            await asyncio.wait_for(self.wait_halted(), timeout=self.controller.timeout)
+        except Exception:
+            self.log.exception("Could not confirm that the hexapod halted.")
         await self.report_detailed_state(ATHexapod.DetailedState.NOTINMOTION)
 
+    async def wait_halted(self) -> None:
+        """Wait for the hexapod to halt after a stop all axes command and
+        measure the halt latency.
+        """
+        assert self.controller is not None
+        assert self.controller.last_stop_time is not None
+        while any(await self.controller.motion_status()):
+            await asyncio.sleep(STOP_POLL_INTERVAL)
+        self.last_stop_halt_latency = time.monotonic() - self.controller.last_stop_time
+        self.log.info(
+            f"Hexapod halted {self.last_stop_halt_latency * 1000:.1f} ms after stop all axes; "
+            f"stop written in {self.controller.last_stop_latency * 1000:.3f} ms."
+        )
+
     async def telemetry(self) -> None:
         """Handle telemetry publishing.
 
-        Publish tel_positionStatus
+        Each quantity is read and published at its own rate by a
+        `TelemetryScheduler`: the positions (tel_positionStatus), the latest
+        error and the slow-changing settings (soft limits, pivot point and
+        system velocity), published when they change in the controller. The
+        controller metrics are logged too.
 
+        A stream failing once is logged; the CSC goes to FAULT if a stream
+        fails ``telemetry_max_failures`` times in a row.
         """
+        assert self.config is not None
+        self._controller_settings = None
+        self._position_status_time = -math.inf
+        assert self.state_hub is not None
+        self._position_change_count = self.state_hub.change_count
+        self.telemetry_scheduler = TelemetryScheduler(
+            log=self.log, max_failures=self.config.telemetry_max_failures
+        )
+        self.telemetry_scheduler.add(
+            "position",
+            self.clock.wall_duration(self.config.telemetry_position_interval),
+            self.publish_position_status,
+        )
+        self.telemetry_scheduler.add(
+            "error", self.clock.wall_duration(self.config.telemetry_error_interval), self.check_error
+        )
+        self.telemetry_scheduler.add(
+            "settings",
+            self.clock.wall_duration(self.config.telemetry_settings_interval),
+            self.publish_settings,
+        )
+        if self.config.metrics_log_interval > 0:
+            self.telemetry_scheduler.add("metrics", self.config.metrics_log_interval, self.log_metrics)
 
-        sub_tasks = 2
-        while self.run_telemetry_task:
-            assert self.controller is not None
-            if not self.controller.is_connected and self.controller.client.should_be_connected:
-                await self.fault(code=CONNECTION_FAILED, report="Connection lost.")
-                self.run_telemetry_task = False
-            # Get setpointPosition
-            target_position = await self.controller.target_position()
+        try:
+            await self.telemetry_scheduler.run(keep_running=lambda: self.run_telemetry_task)
+        except Exception as e:
+            self.run_telemetry_task = False
+            if self.disabled_or_enabled:
+                await self.fault(
+                    code=TEL_LOOP_CLOSED,
+                    report=f"Telemetry failed repeatedly: {e!r}",
+                    traceback=traceback.format_exc(),
+                )
+            return
+
+        if self.disabled_or_enabled:
+            await self.fault(
+                code=TEL_LOOP_CLOSED,
+                report=f"Telemetry loop closing while in {self.summary_state!r}.",
+                traceback="",
+            )
 
-            # Get reportedPosition
-            current_position = await self.controller.real_position()
+    async def controller_available(self) -> bool:
+        """Can telemetry be read from the controller?
 
-            diff = [current_position[i] - target_position[i] for i in range(6)]
+        Go to fault and stop the telemetry if the connection was lost and
+        could not be restored.
+        """
+        assert self.controller is not None
+        if self.controller.connection_failed:
+            await self.fault(code=CONNECTION_FAILED, report="Connection lost.")
+            self.run_telemetry_task = False
+            return False
+        return not self.controller.reconnecting
+
+    async def publish_position_status(self) -> None:
+        """Poll the state of the controller and publish tel_positionStatus.
+
+        tel_positionStatus is only published if an axis moved by more than
+        its deadband, or if it was not published for
+        ``telemetry_max_silence``. While the hexapod is still, the cheap
+        position changed query (#6), shared with the motion monitor through
+        the state hub, is sent instead of reading the positions, unless it
+        reports a change.
+        """
+        if not await self.controller_available():
+            return
+        assert self.state_hub is not None
+        assert self.controller is not None
+        assert self.config is not None
+        keepalive = self.clock.monotonic() - self._position_status_time >= self.config.telemetry_max_silence
+        moving = self._motion_reported or (self.motion_monitor is not None and self.motion_monitor.moving)
+        try:
+            if not keepalive and not moving:
+                if await self.state_hub.position_changed() == self._position_change_count:
+                    return
+            self._position_change_count = self.state_hub.change_count
+            # Get setpointPosition and reportedPosition in one go
+            status = await self.state_hub.poll()
+        except ConnectionError as e:
+            self.log.warning(f"Could not read telemetry: {e!r}")
+            return
+        self._motion_reported = False
+
+        data = self.tel_positionStatus.data
+        if (
+            not keepalive
+            and not self.position_moved(data.setpointPosition, status.target_position)
+            and not self.position_moved(data.reportedPosition, status.real_position)
+        ):
+            return
+        self._position_status_time = self.clock.monotonic()
+        await self.tel_positionStatus.set_write(
+            setpointPosition=status.target_position,
+            reportedPosition=status.real_position,
+            positionFollowingError=status.following_error,
+        )
 
-            await self.tel_positionStatus.set_write(
-                setpointPosition=target_position,
-                reportedPosition=current_position,
-                positionFollowingError=diff,
-            )
+    def record_position(self, status: ControllerStatus) -> None:
+        """Add every state polled to the position history, whether it is
+        published or not.
 
-            await asyncio.sleep(self.heartbeat_interval / sub_tasks)
+        Parameters
+        ----------
+        status : `ControllerStatus`
+            The state.
+        """
+        if self.position_history is not None:
+            self.position_history.add(status.timestamp, status.target_position, status.real_position)
+
+    def position_moved(self, old: Sequence[float], new: Sequence[float]) -> bool:
+        """Did any axis move by more than its telemetry deadband?
+
+        Parameters
+        ----------
+        old : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) position last published.
+        new : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) new position.
+        """
+        assert self.config is not None
+        return bool(np.any(np.abs(np.subtract(new, old)) > self.config.telemetry_position_deadbands))
+
+    async def publish_position_update(self, position: Sequence[float]) -> None:
+        """Publish positionUpdate, unless no axis moved by more than its
+        deadband since the last one.
+
+        Parameters
+        ----------
+        position : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) position.
+        """
+        data = self.evt_positionUpdate.data
+        last_position = [
+            data.positionX,
+            data.positionY,
+            data.positionZ,
+            data.positionU,
+            data.positionV,
+            data.positionW,
+        ]
+        if self.evt_positionUpdate.has_data and not self.position_moved(last_position, position):
+            return
+        await self.evt_positionUpdate.set_write(
+            positionX=position[0],
+            positionY=position[1],
+            positionZ=position[2],
+            positionU=position[3],
+            positionV=position[4],
+            positionW=position[5],
+        )
 
-            # Check for errors
+    async def check_error(self) -> None:
+        """Read the latest error and go to fault if there is one."""
+        if not await self.controller_available():
+            return
+        assert self.controller is not None
+        try:
             error = await self.controller.get_error()
-            if error != 0:
-                await self.fault(code=error, report=translate_error(error), traceback="")
-                self.run_telemetry_task = False
-            else:
-                await asyncio.sleep(self.heartbeat_interval / sub_tasks)
+        except ConnectionError as e:
+            self.log.warning(f"Could not read error: {e!r}")
+            return
 
-        if self.disabled_or_enabled:
-            await self.fault(
-                code=TEL_LOOP_CLOSED,
-                report=f"Telemetry loop closing while in {self.summary_state!r}.",
-                traceback="",
+        if error == PIError.E10_PI_CNTR_STOP.value and self._stop_error_expected:
+            self.log.info(f"Ignoring {translate_error(error)} reported after stopAllAxes.")
+            self._stop_error_expected = False
+            error = 0
+        if error != 0:
+            await self.fault(code=error, report=translate_error(error), traceback="")
+            self.run_telemetry_task = False
+
+    async def publish_settings(self) -> None:
+        """Read the soft limits, pivot point and system velocity, and publish
+        the ones that changed in the controller since the previous read.
+
+        The first read only records the settings; the CSC publishes the
+        settings it applies itself.
+        """
+        if not await self.controller_available():
+            return
+        assert self.controller is not None
+        try:
+            settings = await self.controller.refresh_settings()
+        except ConnectionError as e:
+            self.log.warning(f"Could not read settings: {e!r}")
+            return
+
+        previous, self._controller_settings = self._controller_settings, settings
+        if previous is None:
+            return
+
+        low = settings.low_position_soft_limit
+        high = settings.high_position_soft_limit
+        if (low, high) != (previous.low_position_soft_limit, previous.high_position_soft_limit):
+            await self.evt_settingsAppliedPositionLimits.set_write(
+                limitXYMax=high[0],
+                limitZMin=low[2],
+                limitZMax=high[2],
+                limitUVMax=high[3],
+                limitWMin=low[5],
+                limitWMax=high[5],
+            )
+        if settings.pivot_point != previous.pivot_point:
+            await self.evt_settingsAppliedPivot.set_write(
+                pivotX=settings.pivot_point[0],
+                pivotY=settings.pivot_point[1],
+                pivotZ=settings.pivot_point[2],
+            )
+        if settings.system_velocity != previous.system_velocity:
+            await self.evt_settingsAppliedVelocities.set_write(systemSpeed=settings.system_velocity)
+
+    async def log_metrics(self) -> None:
+        """Log a summary of the controller command metrics and of the
+        telemetry streams.
+        """
+        if self.controller is None:
+            return
+        metrics = self.controller.metrics
+        self.log.info(
+            f"Controller metrics over the last {time.monotonic() - metrics.start_time:.0f} s: "
+            f"{metrics.summary()}"
+        )
+        if self.telemetry_scheduler is not None:
+            self.log.info(f"Telemetry streams: {self.telemetry_scheduler.summary()}")
+        if self.position_history is not None and self.config is not None:
+            summary = self.position_history.summary(self.config.metrics_log_interval)
+            settle = self.position_history.settle_summary()
+            self.log.info(
+                f"Following error over {summary.count} samples: "
+                f"rms {[round(rms, 4) for rms in summary.rms]}, "
+                f"max {[round(error, 4) for error in summary.max]}; "
+                f"{settle.num_settled}/{settle.num_moves} moves settled, "
+                f"settle time mean {settle.mean:.2f} s, max {settle.max:.2f} s"
             )
 
     async def close_telemetry_task(self) -> None:
@@ -587,8 +1309,9 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
         action : `str`
             The name of the action that requires the Hexapod to be ready.
         """
-        assert self.controller is not None
-        ready = await self.controller.controller_ready()
+        assert self.state_hub is not None
+        assert self.config is not None
+        ready = (await self.state_hub.get(max_age=self.config.state_max_age)).ready
 
         if ready != self.ready:
             await self.report_new_ready(ready)
@@ -606,8 +1329,8 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
         action : `str`
             The action that requires the Hexapod to be referenced.
         """
-        assert self.controller is not None
-        ref = await self.controller.referencing_result()
+        assert self.state_hub is not None
+        ref = await self.state_hub.referenced()
 
         if not all(ref):
             axis = "XYZUVW"
@@ -623,40 +1346,94 @@ class ATHexapodCSC(salobj.ConfigurableCsc):
 
     async def is_referenced(self) -> bool:
         """Checks if Hexapod is referenced."""
-        assert self.controller is not None
-        ref = await self.controller.referencing_result()
+        assert self.state_hub is not None
+        ref = await self.state_hub.referenced(max_age=0)
 
         return all(ref)
 
-    async def wait_movement_done(self) -> bool:
-        """Wait for the Hexapod movement to be done."""
-        axis = "XYZUVW"
+    async def wait_movement_done(self, expected_duration: None | float = None) -> bool:
+        """Wait for the Hexapod movement to be done.
 
-        while True:
-            try:
-                assert self.controller is not None
-                ms = await self.controller.motion_status()
-
-                if not any(ms):
-                    self.log.debug("Hexapod not moving.")
-                    await self.report_detailed_state(ATHexapod.DetailedState.NOTINMOTION)
-                    return not (any(ms))
-                else:
-                    await self.report_detailed_state(ATHexapod.DetailedState.INMOTION)
-                    moving = ""
-                    for i in range(len(ms)):
-                        if ms[i]:
-                            moving += axis[i]
-                    self.log.debug(f"Hexapod axis {moving} moving.")
-            except Exception as e:
-                self.log.error("Could not get motion status.")
-                self.log.exception(e)
+        Movements that take much longer than predicted are reported, as
+        they are a sign of degraded hardware.
+
+        Parameters
+        ----------
+        expected_duration : `float` or `None`
+            The predicted duration of the movement (seconds), if known.
+
+        Raises
+        ------
+        salobj.ExpectedError
+            If all axes are stopped while waiting.
+        """
+        assert self.motion_monitor is not None
+        assert self.config is not None
+        t0 = self.clock.monotonic()
+        try:
+            motion_status = await self.motion_monitor.wait(
+                None if expected_duration is None else self.clock.wall_duration(expected_duration)
+            )
+        except MotionInterruptedError as e:
+            raise salobj.ExpectedError(str(e))
+
+        duration = self.clock.monotonic() - t0
+        if expected_duration is not None and duration > expected_duration * self.config.degraded_move_factor:
+            self.log.warning(
+                f"Movement took {duration:.2f}s but was predicted to take {expected_duration:.2f}s; "
+                "hexapod performance may be degraded."
+            )
+
+        return not any(motion_status)
+
+    async def wait_in_position(self, expected_duration: None | float = None) -> ControllerStatus:
+        """Wait for the Hexapod movement to be done and the platform to
+        settle in position.
 
-            await asyncio.sleep(self.heartbeat_interval)
+        Parameters
+        ----------
+        expected_duration : `float` or `None`
+            The predicted duration of the movement (seconds), if known.
+
+        Returns
+        -------
+        status : `ControllerStatus`
+            The status of the controller once in position.
+
+        Raises
+        ------
+        salobj.ExpectedError
+            If all axes are stopped while waiting.
+        """
+        assert self.in_position_detector is not None
+        await self.wait_movement_done(expected_duration)
+        try:
+            return await self.in_position_detector.wait()
+        except MotionInterruptedError as e:
+            raise salobj.ExpectedError(str(e))
+
+    async def report_motion(self, moving: bool) -> None:
+        """Publish the detailed state when the hexapod starts or stops
+        moving.
+
+        Parameters
+        ----------
+        moving : `bool`
+            Is the hexapod moving?
+        """
+        # The motion monitor may have read the position changes; read the
+        # positions at the next telemetry poll.
+        self._motion_reported = True
+        await self.report_detailed_state(
+            ATHexapod.DetailedState.INMOTION if moving else ATHexapod.DetailedState.NOTINMOTION
+        )
 
     async def close_tasks(self) -> None:
         await super().close_tasks()
+        self.scan_task.cancel()
         await self.close_telemetry_task()
+        if self.motion_monitor is not None:
+            await self.motion_monitor.close()
         if self.controller is not None and self.controller.is_connected:
             await self.controller.disconnect()
         if self.mock_server is not None:
@@ -0,0 +1,125 @@
+"""
+This file is part of ts_ATHexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["MoveEstimator"]
+
+import math
+from typing import Sequence
+
+import numpy as np
+
+from .kinematics import rotation_matrix
+
+
+class MoveEstimator:
+    """Predict the duration of hexapod movements.
+
+    The controller moves the platform along a synchronized path at the
+    system velocity set with VLS, which applies to the translation of the
+    platform origin (mm/s) and to its rotation (deg/s). Rotations are about
+    the pivot point, so they also translate the platform origin. The
+    duration is the one of a trapezoidal velocity profile over the longest
+    of the two displacements, plus a fixed overhead.
+
+    Parameters
+    ----------
+    acceleration : `float`
+        The acceleration of the platform (mm/s^2 and deg/s^2).
+    overhead : `float`
+        Time added to every movement, e.g. to settle (seconds).
+    """
+
+    def __init__(self, acceleration: float = 10.0, overhead: float = 0.1) -> None:
+        self.acceleration = acceleration
+        self.overhead = overhead
+
+    def path_length(
+        self, start: Sequence[float], target: Sequence[float], pivot: Sequence[float] = (0.0, 0.0, 0.0)
+    ) -> float:
+        """Return the length of the path of a movement.
+
+        Parameters
+        ----------
+        start : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) start position.
+        target : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) target position.
+        pivot : `list` of `float`
+            The X, Y, Z pivot point (mm).
+
+        Returns
+        -------
+        length : `float`
+            The longest of the translation of the platform origin (mm) and
+            the rotation (deg).
+        """
+        start = np.asarray(start, dtype=float)
+        target = np.asarray(target, dtype=float)
+        pivot = np.asarray(pivot, dtype=float)
+        # Origin of the platform: t + p + R (0 - p)
+        start_origin = start[:3] - rotation_matrix(*start[3:]) @ pivot
+        target_origin = target[:3] - rotation_matrix(*target[3:]) @ pivot
+        translation = float(np.linalg.norm(target_origin - start_origin))
+        rotation = float(np.linalg.norm(target[3:] - start[3:]))
+        return max(translation, rotation)
+
+    def duration(
+        self,
+        start: Sequence[float],
+        target: Sequence[float],
+        velocity: float,
+        pivot: Sequence[float] = (0.0, 0.0, 0.0),
+    ) -> float:
+        """Return the predicted duration of a movement.
+
+        Parameters
+        ----------
+        start : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) start position.
+        target : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) target position.
+        velocity : `float`
+            The system velocity (mm/s and deg/s).
+        pivot : `list` of `float`
+            The X, Y, Z pivot point (mm).
+
+        Returns
+        -------
+        duration : `float`
+            The predicted duration (seconds).
+
+        Raises
+        ------
+        ValueError
+            If ``velocity`` is not positive.
+        """
+        if velocity <= 0:
+            raise ValueError(f"velocity={velocity} must be positive.")
+        length = self.path_length(start, target, pivot)
+        if length == 0:
+            return 0.0
+        if length >= velocity**2 / self.acceleration:
+            duration = length / velocity + velocity / self.acceleration
+        else:
+            duration = 2 * math.sqrt(length / self.acceleration)
+        return duration + self.overhead
@@ -0,0 +1,240 @@
+"""
+This file is part of ts_ATHexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["PoseFollower"]
+
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Awaitable, Callable, Sequence
+
+import numpy as np
+from lsst.ts import utils
+
+
+class PoseFollower:
+    """Follow a stream of target and offset updates, latest wins.
+
+    Updates may arrive much faster than the hexapod settles. They are not
+    queued: a new target replaces the pending one and discards the pending
+    offsets, and new offsets are added to the pending ones. As soon as the
+    move in progress is done, and at most once per ``min_interval``, the
+    merged update is sent as a single move; so the controller traffic is
+    bounded however fast the updates arrive.
+
+    A failed move is reported to ``failure_callback``; a move interrupted
+    because the updates were cleared, e.g. by a stop, is not a failure.
+
+    Parameters
+    ----------
+    move : `Callable`
+        Coroutine function called with the X, Y, Z (mm), U, V, W (deg)
+        target; it sends the move and returns when the move is done.
+    read_target : `Callable`
+        Coroutine function returning the commanded target, used as the
+        base of the offsets until the first move.
+    log : `logging.Logger`
+        The log for this class.
+    min_interval : `float`
+        The shortest interval between the starts of two moves (seconds).
+    failure_callback : `Callable` or `None`
+        Coroutine function called with the target (None if it could not be
+        determined) and the exception of each failed move.
+
+    Attributes
+    ----------
+    target : `numpy.ndarray` or `None`
+        The target of the latest move sent; None before the first move.
+    num_updates : `int`
+        The number of targets and offsets received.
+    num_moves : `int`
+        The number of moves sent.
+    num_failures : `int`
+        The number of moves that failed.
+    """
+
+    def __init__(
+        self,
+        move: Callable[[list[float]], Awaitable[None]],
+        read_target: Callable[[], Awaitable[Sequence[float]]],
+        log: logging.Logger,
+        min_interval: float = 0.0,
+        failure_callback: None | Callable[[None | list[float], Exception], Awaitable[None]] = None,
+    ) -> None:
+        self.move = move
+        self.read_target = read_target
+        self.log = log
+        self.min_interval = min_interval
+        self.failure_callback = failure_callback
+        self.target: None | np.ndarray = None
+        self.num_updates: int = 0
+        self.num_moves: int = 0
+        self.num_failures: int = 0
+
+        self._pending_target: None | np.ndarray = None
+        self._pending_offset: None | np.ndarray = None
+        # Incremented by clear, to tell interrupted moves from failed ones.
+        self._generation: int = 0
+        self._idle_event = asyncio.Event()
+        self._idle_event.set()
+        self._follow_task: asyncio.Future = utils.make_done_future()
+
+    @property
+    def pending(self) -> bool:
+        """Is an update waiting to be sent?"""
+        return self._pending_target is not None or self._pending_offset is not None
+
+    @property
+    def idle(self) -> bool:
+        """Are all the updates sent and their moves done?"""
+        return self._idle_event.is_set()
+
+    def set_target(self, target: Sequence[float]) -> None:
+        """Move to a target, replacing the pending updates.
+
+        Parameters
+        ----------
+        target : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) target.
+        """
+        self._pending_target = np.array(target, dtype=float)
+        self._pending_offset = None
+        self._updated()
+
+    def add_offset(self, offset: Sequence[float]) -> None:
+        """Move by an offset from the latest target, pending or sent.
+
+        Parameters
+        ----------
+        offset : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) offset.
+        """
+        offset = np.array(offset, dtype=float)
+        if self._pending_offset is None:
+            self._pending_offset = offset
+        else:
+            self._pending_offset += offset
+        self._updated()
+
+    def clear(self) -> None:
+        """Discard the pending updates, e.g. after a stop."""
+        self._pending_target = None
+        self._pending_offset = None
+        self.target = None
+        self._generation += 1
+
+    async def merged_target(self, offset: None | Sequence[float] = None) -> np.ndarray:
+        """Return the target the pending updates would move to, e.g. to
+        check an update before accepting it.
+
+        Parameters
+        ----------
+        offset : `list` of `float` or `None`
+            The X, Y, Z (mm), U, V, W (deg) offset of a new update to add
+            to the pending ones.
+
+        Returns
+        -------
+        target : `numpy.ndarray`
+            The X, Y, Z (mm), U, V, W (deg) target.
+        """
+        target = self._pending_target
+        if target is None:
+            target = self.target
+        if target is None:
+            target = np.array(await self.read_target(), dtype=float)
+        if self._pending_offset is not None:
+            target = target + self._pending_offset
+        if offset is not None:
+            target = target + np.array(offset, dtype=float)
+        return target
+
+    async def wait_idle(self) -> None:
+        """Wait until all the updates are sent and their moves done."""
+        await self._idle_event.wait()
+
+    async def close(self) -> None:
+        """Stop following; the pending updates are discarded."""
+        self.clear()
+        self._follow_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._follow_task
+        self._idle_event.set()
+
+    def _updated(self) -> None:
+        """Wake up the follow loop after an update."""
+        self.num_updates += 1
+        self._idle_event.clear()
+        if self._follow_task.done():
+            self._follow_task = asyncio.create_task(self._follow_loop())
+
+    async def _next_target(self) -> np.ndarray:
+        """Merge the pending updates into the next target and clear them."""
+        target = self._pending_target
+        offset = self._pending_offset
+        self._pending_target = None
+        self._pending_offset = None
+        if target is None:
+            if self.target is None:
+                self.target = np.array(await self.read_target(), dtype=float)
+            target = self.target
+        if offset is not None:
+            target = target + offset
+        return target
+
+    async def _follow_loop(self) -> None:
+        """Send the merged updates until there are none left."""
+        last_move_time = -self.min_interval
+        try:
+            while self.pending:
+                delay = last_move_time + self.min_interval - time.monotonic()
+                if delay > 0:
+                    # Let more updates merge before the next move.
+                    await asyncio.sleep(delay)
+                if not self.pending:
+                    break
+                last_move_time = time.monotonic()
+                target = None
+                generation = self._generation
+                try:
+                    target = await self._next_target()
+                    self.target = target
+                    self.num_moves += 1
+                    await self.move(target.tolist())
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # The platform may not have reached the target.
+                    self.target = None
+                    if generation != self._generation:
+                        self.log.info(f"Follow move interrupted: {e!r}")
+                        continue
+                    self.num_failures += 1
+                    failed_target = None if target is None else target.tolist()
+                    self.log.warning(f"Follow move to {failed_target} failed: {e!r}")
+                    if self.failure_callback is not None:
+                        await self.failure_callback(failed_target, e)
+        finally:
+            if not self.pending:
+                self._idle_event.set()
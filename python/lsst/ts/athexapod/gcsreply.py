@@ -0,0 +1,140 @@
+"""
+This file is part of ts_ATHexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["AXES", "PIVOT_AXES", "parse_axis_values", "parse_axis_strings"]
+
+import functools
+
+import numpy as np
+
+# Keys of the replies to queries on the X, Y, Z, U, V and W axes.
+AXES = b"XYZUVW"
+# Keys of the replies to the pivot point query.
+PIVOT_AXES = b"RST"
+
+
+@functools.cache
+def _key_index(keys: bytes) -> tuple[int, ...]:
+    """Return a table mapping each byte to its index in ``keys``, or -1."""
+    index = [-1] * 256
+    for i, key in enumerate(keys):
+        index[key] = i
+    return tuple(index)
+
+
+def _iter_items(buffer: bytes | bytearray, keys: bytes) -> list[tuple[int, int, int]]:
+    """Return the index of the key and the bounds of the value of each
+    ``key=value`` line in ``buffer``.
+
+    Raises
+    ------
+    ValueError
+        If a key is not in ``keys``, is repeated or not every key is found.
+    """
+    index = _key_index(keys)
+    items = []
+    seen = 0
+    start = 0
+    while True:
+        equal = buffer.find(b"=", start)
+        if equal < 1:
+            break
+        stop = buffer.find(b"\n", equal)
+        if stop < 0:
+            stop = len(buffer)
+        i = index[buffer[equal - 1]]
+        if i < 0:
+            raise ValueError(f"Unexpected key {chr(buffer[equal - 1])!r} in reply {bytes(buffer)!r}.")
+        if seen & (1 << i):
+            raise ValueError(f"Duplicate key {chr(buffer[equal - 1])!r} in reply {bytes(buffer)!r}.")
+        seen |= 1 << i
+        items.append((i, equal + 1, stop))
+        start = stop + 1
+    if len(items) != len(keys):
+        raise ValueError(f"Expected {len(keys)} values in reply {bytes(buffer)!r}; got {len(items)}.")
+    return items
+
+
+def parse_axis_values(
+    buffer: bytes | bytearray, keys: bytes = AXES, out: None | np.ndarray = None
+) -> np.ndarray:
+    """Parse a multi-line ``key=value`` GCS reply into an array.
+
+    The raw reply is scanned once, without decoding it or splitting it into
+    lines, and each value is written at the index of its key.
+
+    Parameters
+    ----------
+    buffer : `bytes` or `bytearray`
+        The raw reply, e.g. ``b"X=1.0\\n Y=-2\\n ..."``.
+    keys : `bytes`
+        The single character key of each value, in output order.
+    out : `numpy.ndarray` or `None`
+        Preallocated array of length ``len(keys)`` to write the values into.
+        If None, a new array is allocated.
+
+    Returns
+    -------
+    values : `numpy.ndarray`
+        The values, ``out`` if provided.
+
+    Raises
+    ------
+    ValueError
+        If the reply does not have exactly one value for each key.
+    """
+    if out is None:
+        out = np.empty(len(keys))
+    for i, start, stop in _iter_items(buffer, keys):
+        out[i] = float(buffer[start:stop])
+    return out
+
+
+def parse_axis_strings(
+    buffer: bytes | bytearray, keys: bytes = AXES, encoding: str = "ISO-8859-1"
+) -> list[str]:
+    """Parse a multi-line ``key=value`` GCS reply into strings.
+
+    Parameters
+    ----------
+    buffer : `bytes` or `bytearray`
+        The raw reply.
+    keys : `bytes`
+        The single character key of each value, in output order.
+    encoding : `str`
+        The encoding of the reply.
+
+    Returns
+    -------
+    values : `list` of `str`
+        The values, stripped of whitespace.
+
+    Raises
+    ------
+    ValueError
+        If the reply does not have exactly one value for each key.
+    """
+    values = [""] * len(keys)
+    for i, start, stop in _iter_items(buffer, keys):
+        values[i] = buffer[start:stop].strip().decode(encoding)
+    return values
@@ -0,0 +1,261 @@
+"""
+This file is part of ts_ATHexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["AxisStatistics", "PositionHistory"]
+
+import math
+import types
+from typing import Sequence
+
+import numpy as np
+
+NUM_AXES = 6
+
+
+class AxisStatistics:
+    """Running statistics of the following error of each axis.
+
+    Adding a sample costs a few vector operations on 6 values, however many
+    samples were added before.
+
+    Attributes
+    ----------
+    count : `int`
+        The number of samples.
+    total : `numpy.ndarray`
+        Sum of the following errors of each axis.
+    total_squares : `numpy.ndarray`
+        Sum of the squared following errors of each axis.
+    max_abs : `numpy.ndarray`
+        The largest absolute following error of each axis.
+    """
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.total = np.zeros(NUM_AXES)
+        self.total_squares = np.zeros(NUM_AXES)
+        self.max_abs = np.zeros(NUM_AXES)
+
+    def add(self, errors: np.ndarray) -> None:
+        """Add the following errors of one or more samples.
+
+        Parameters
+        ----------
+        errors : `numpy.ndarray`
+            The following errors, of shape (6,) or (N, 6).
+        """
+        errors = np.atleast_2d(errors)
+        self.count += len(errors)
+        self.total += errors.sum(axis=0)
+        self.total_squares += np.square(errors).sum(axis=0)
+        np.maximum(self.max_abs, np.abs(errors).max(axis=0, initial=0), out=self.max_abs)
+
+    def as_dict(self) -> dict[str, int | list[float]]:
+        """Return the count, and the mean, rms and max following error of
+        each axis; nan if there are no samples.
+        """
+        if self.count == 0:
+            nan = [math.nan] * NUM_AXES
+            return dict(count=0, mean=nan, rms=nan, max=nan)
+        return dict(
+            count=self.count,
+            mean=(self.total / self.count).tolist(),
+            rms=np.sqrt(self.total_squares / self.count).tolist(),
+            max=self.max_abs.tolist(),
+        )
+
+
+class PositionHistory:
+    """Fixed size history of the target and real positions of the hexapod,
+    with running following error statistics.
+
+    The samples are kept in preallocated NumPy arrays used as a ring
+    buffer: once full, each new sample replaces the oldest one. Statistics
+    since the last `reset` are updated as samples are added; statistics
+    over a recent time window are computed on views of the buffer, without
+    copying it.
+
+    A move starts at the first sample with a new target; it is settled at
+    the first sample where the following error of every axis is within
+    ``tolerance``. The settle times are kept in statistics too.
+
+    Parameters
+    ----------
+    size : `int`
+        The number of samples kept.
+    tolerance : `float`
+        The largest following error of a settled axis (mm or deg).
+
+    Attributes
+    ----------
+    statistics : `AxisStatistics`
+        The following error statistics since the last reset.
+    num_moves : `int`
+        The number of moves since the last reset.
+    num_settled : `int`
+        The number of moves that settled since the last reset.
+    last_settle_time : `float`
+        Time between the start of the latest settled move and the sample
+        at which it settled (seconds); nan if no move settled.
+    max_settle_time : `float`
+        The longest settle time (seconds); nan if no move settled.
+    """
+
+    def __init__(self, size: int, tolerance: float) -> None:
+        if size < 1:
+            raise ValueError(f"size={size} must be positive.")
+        self.size = size
+        self.tolerance = tolerance
+        self.times = np.zeros(size)
+        self.target_positions = np.zeros((size, NUM_AXES))
+        self.real_positions = np.zeros((size, NUM_AXES))
+        # Index of the next sample and number of samples in the buffer.
+        self._next = 0
+        self._count = 0
+        self._move_start: None | float = None
+        self.reset()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def reset(self) -> None:
+        """Reset the statistics; the samples are kept."""
+        self.statistics = AxisStatistics()
+        self.num_moves: int = 0
+        self.num_settled: int = 0
+        self.last_settle_time: float = math.nan
+        self.max_settle_time: float = math.nan
+        self._settle_time_total: float = 0.0
+
+    def add(self, timestamp: float, target_position: Sequence[float], real_position: Sequence[float]) -> None:
+        """Add a sample.
+
+        Parameters
+        ----------
+        timestamp : `float`
+            Time of the sample (seconds).
+        target_position : `list` of `float`
+            The target X, Y, Z (mm), U, V, W (deg) position.
+        real_position : `list` of `float`
+            The real X, Y, Z (mm), U, V, W (deg) position.
+        """
+        index = self._next
+        if self._count > 0 and not np.array_equal(self.target_positions[index - 1], target_position):
+            self.num_moves += 1
+            self._move_start = timestamp
+        self.times[index] = timestamp
+        self.target_positions[index] = target_position
+        self.real_positions[index] = real_position
+        self._next = (index + 1) % self.size
+        self._count = min(self._count + 1, self.size)
+
+        errors = self.real_positions[index] - self.target_positions[index]
+        self.statistics.add(errors)
+        if self._move_start is not None and np.all(np.abs(errors) <= self.tolerance):
+            settle_time = timestamp - self._move_start
+            self._move_start = None
+            self.num_settled += 1
+            self.last_settle_time = settle_time
+            self._settle_time_total += settle_time
+            self.max_settle_time = (
+                settle_time if math.isnan(self.max_settle_time) else max(self.max_settle_time, settle_time)
+            )
+
+    def _segments(self, start: int) -> list[slice]:
+        """Return the slices of the buffer holding the ``start`` most recent
+        samples, oldest first.
+        """
+        if start == 0:
+            return []
+        end = self._next or self.size
+        first = end - start
+        if first >= 0:
+            return [slice(first, end)]
+        return [slice(self.size + first, self.size), slice(0, end)]
+
+    def window(self, duration: float) -> list[slice]:
+        """Return the slices of the buffer holding the samples of the last
+        ``duration`` seconds, oldest first.
+
+        Index `times`, `target_positions` and `real_positions` with them to
+        get views of the samples.
+
+        Parameters
+        ----------
+        duration : `float`
+            The duration of the window (seconds); inf for all the samples.
+        """
+        if self._count == 0:
+            return []
+        latest = self.times[self._next - 1]
+        oldest_first = self._segments(self._count)
+        # Number of samples older than the window, by binary search in each
+        # sorted segment.
+        num_old = 0
+        for segment in oldest_first:
+            times = self.times[segment]
+            num_old += int(np.searchsorted(times, latest - duration, side="left"))
+        return self._segments(self._count - num_old)
+
+    def summary(self, duration: float = math.inf) -> types.SimpleNamespace:
+        """Return the following error statistics of the last ``duration``
+        seconds.
+
+        Parameters
+        ----------
+        duration : `float`
+            The duration of the window (seconds); inf for all the samples
+            in the buffer.
+
+        Returns
+        -------
+        summary : `types.SimpleNamespace`
+            The statistics (see `AxisStatistics.as_dict`) and the times of
+            the oldest and latest samples in the window (nan if empty).
+        """
+        statistics = AxisStatistics()
+        segments = self.window(duration)
+        for segment in segments:
+            statistics.add(self.real_positions[segment] - self.target_positions[segment])
+        return types.SimpleNamespace(
+            start_time=self.times[segments[0].start] if segments else math.nan,
+            end_time=self.times[segments[-1].stop - 1] if segments else math.nan,
+            **statistics.as_dict(),
+        )
+
+    def settle_summary(self) -> types.SimpleNamespace:
+        """Return the settle time statistics since the last reset.
+
+        Returns
+        -------
+        summary : `types.SimpleNamespace`
+            The number of moves and of settled moves, and the last, mean
+            and max settle times (seconds; nan if no move settled).
+        """
+        return types.SimpleNamespace(
+            num_moves=self.num_moves,
+            num_settled=self.num_settled,
+            last=self.last_settle_time,
+            mean=self._settle_time_total / self.num_settled if self.num_settled else math.nan,
+            max=self.max_settle_time,
+        )
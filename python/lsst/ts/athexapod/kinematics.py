@@ -0,0 +1,310 @@
+"""
+This file is part of ts_ATHexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["HexapodKinematics", "rotation_matrices", "rotation_matrix"]
+
+import types
+from typing import Sequence
+
+import numpy as np
+
+
+def rotation_matrix(u: float, v: float, w: float) -> np.ndarray:
+    """Return the rotation matrix of the U, V, W hexapod rotations.
+
+    The rotations are about the X, Y and Z axes, applied in the order
+    W, V, U to a point of the moving platform (R = Rx(U) Ry(V) Rz(W)).
+
+    Parameters
+    ----------
+    u : `float`
+        Rotation about the X axis (deg).
+    v : `float`
+        Rotation about the Y axis (deg).
+    w : `float`
+        Rotation about the Z axis (deg).
+
+    Returns
+    -------
+    rotation : `numpy.ndarray`
+        3x3 rotation matrix.
+    """
+    return rotation_matrices([u, v, w])
+
+
+def rotation_matrices(angles: Sequence[float] | np.ndarray) -> np.ndarray:
+    """Return the rotation matrices of many U, V, W hexapod rotations.
+
+    Parameters
+    ----------
+    angles : `numpy.ndarray`
+        The U, V, W rotations (deg), of shape (..., 3).
+
+    Returns
+    -------
+    rotations : `numpy.ndarray`
+        The rotation matrices (see `rotation_matrix`), of shape
+        (..., 3, 3).
+    """
+    radians = np.radians(np.asarray(angles, dtype=float))
+    cu, cv, cw = np.moveaxis(np.cos(radians), -1, 0)
+    su, sv, sw = np.moveaxis(np.sin(radians), -1, 0)
+    rotations = np.empty(radians.shape[:-1] + (3, 3))
+    rotations[..., 0, 0] = cv * cw
+    rotations[..., 0, 1] = -cv * sw
+    rotations[..., 0, 2] = sv
+    rotations[..., 1, 0] = su * sv * cw + cu * sw
+    rotations[..., 1, 1] = -su * sv * sw + cu * cw
+    rotations[..., 1, 2] = -su * cv
+    rotations[..., 2, 0] = -cu * sv * cw + su * sw
+    rotations[..., 2, 1] = cu * sv * sw + su * cw
+    rotations[..., 2, 2] = cu * cv
+    return rotations
+
+
+class HexapodKinematics:
+    """Inverse kinematics and workspace of the hexapod.
+
+    The pose X, Y, Z (mm), U, V, W (deg) of the moving platform is the one
+    commanded with MOV: the platform rotates about the pivot point, then
+    translates. Each strut joins a joint of the base to a joint of the
+    platform, and the pose is reachable if the length of every strut is in
+    its range. All the poses are computed at once with NumPy, so checking a
+    pose takes microseconds and checking thousands of them little more,
+    instead of a round trip to the controller (VMO?) per pose.
+
+    Parameters
+    ----------
+    base_joints : `numpy.ndarray`
+        The positions of the base joints (mm), of shape (6, 3), in the
+        frame of the platform at the zero pose.
+    platform_joints : `numpy.ndarray`
+        The positions of the platform joints (mm), of shape (6, 3), in the
+        frame of the platform; strut i joins ``base_joints[i]`` to
+        ``platform_joints[i]``.
+    min_length : `float`
+        The shortest length of a strut (mm).
+    max_length : `float`
+        The longest length of a strut (mm).
+    """
+
+    def __init__(
+        self,
+        base_joints: Sequence[Sequence[float]] | np.ndarray,
+        platform_joints: Sequence[Sequence[float]] | np.ndarray,
+        min_length: float,
+        max_length: float,
+    ) -> None:
+        self.base_joints = np.array(base_joints, dtype=float)
+        self.platform_joints = np.array(platform_joints, dtype=float)
+        if self.base_joints.shape != (6, 3) or self.platform_joints.shape != (6, 3):
+            raise ValueError("base_joints and platform_joints must have shape (6, 3).")
+        if not 0 <= min_length < max_length:
+            raise ValueError(f"Need 0 <= min_length={min_length} < max_length={max_length}.")
+        self.min_length = min_length
+        self.max_length = max_length
+
+    @classmethod
+    def symmetric(
+        cls,
+        base_radius: float,
+        platform_radius: float,
+        base_joint_angle: float,
+        platform_joint_angle: float,
+        height: float,
+        min_length: float,
+        max_length: float,
+    ) -> "HexapodKinematics":
+        """Make the kinematics of a hexapod with the joints in three pairs
+        on a circle, on the base and on the platform.
+
+        The base joint pairs are centered at 0, 120 and 240 deg from the X
+        axis, the platform joint pairs at 60, 180 and 300 deg, and each
+        strut joins the nearest base and platform joints.
+
+        Parameters
+        ----------
+        base_radius : `float`
+            The radius of the circle of the base joints (mm).
+        platform_radius : `float`
+            The radius of the circle of the platform joints (mm).
+        base_joint_angle : `float`
+            Half the angle between the two joints of a base pair (deg).
+        platform_joint_angle : `float`
+            Half the angle between the two joints of a platform pair (deg).
+        height : `float`
+            Height of the platform joints above the base joints at the zero
+            pose (mm).
+        min_length : `float`
+            The shortest length of a strut (mm).
+        max_length : `float`
+            The longest length of a strut (mm).
+        """
+        centers = np.repeat([0.0, 120.0, 240.0], 2)
+        signs = np.tile([-1.0, 1.0], 3)
+        base_angles = np.radians(centers + signs * base_joint_angle)
+        # The platform joint nearest to base joint -a is at -60 + a, the
+        # one nearest to +a at 60 - a.
+        platform_angles = np.radians(centers + signs * (60.0 - platform_joint_angle))
+        base_joints = np.stack(
+            [
+                base_radius * np.cos(base_angles),
+                base_radius * np.sin(base_angles),
+                np.full(6, -height),
+            ],
+            axis=1,
+        )
+        platform_joints = np.stack(
+            [
+                platform_radius * np.cos(platform_angles),
+                platform_radius * np.sin(platform_angles),
+                np.zeros(6),
+            ],
+            axis=1,
+        )
+        return cls(base_joints, platform_joints, min_length=min_length, max_length=max_length)
+
+    def strut_lengths(
+        self,
+        poses: Sequence[float] | Sequence[Sequence[float]] | np.ndarray,
+        pivot: Sequence[float] = (0.0, 0.0, 0.0),
+    ) -> np.ndarray:
+        """Return the lengths of the struts for poses of the platform.
+
+        Parameters
+        ----------
+        poses : `numpy.ndarray`
+            The X, Y, Z (mm), U, V, W (deg) poses, of shape (6,) or (N, 6).
+        pivot : `list` of `float`
+            The X, Y, Z pivot point (mm).
+
+        Returns
+        -------
+        lengths : `numpy.ndarray`
+            The length of each strut (mm), of shape (6,) or (N, 6).
+        """
+        poses = np.asarray(poses, dtype=float)
+        if poses.shape[-1:] != (6,) or poses.ndim > 2:
+            raise ValueError(f"poses must have shape (6,) or (N, 6), not {poses.shape}.")
+        pivot = np.asarray(pivot, dtype=float)
+        rotations = rotation_matrices(poses[..., 3:])
+        # Joint: t + p + R (j - p)
+        joints = np.einsum("...ij,kj->...ki", rotations, self.platform_joints - pivot)
+        joints += (poses[..., :3] + pivot)[..., np.newaxis, :]
+        return np.linalg.norm(joints - self.base_joints, axis=-1)
+
+    def reachable(
+        self,
+        poses: Sequence[float] | Sequence[Sequence[float]] | np.ndarray,
+        pivot: Sequence[float] = (0.0, 0.0, 0.0),
+    ) -> np.ndarray:
+        """Return whether poses are in the workspace of the hexapod.
+
+        Parameters
+        ----------
+        poses : `numpy.ndarray`
+            The X, Y, Z (mm), U, V, W (deg) poses, of shape (6,) or (N, 6).
+        pivot : `list` of `float`
+            The X, Y, Z pivot point (mm).
+
+        Returns
+        -------
+        reachable : `numpy.ndarray`
+            Is every strut length in range, for each pose; of shape () or
+            (N,).
+        """
+        lengths = self.strut_lengths(poses, pivot)
+        return np.all((lengths >= self.min_length) & (lengths <= self.max_length), axis=-1)
+
+    def check(self, pose: Sequence[float], pivot: Sequence[float] = (0.0, 0.0, 0.0)) -> None | str:
+        """Check that a pose is in the workspace of the hexapod.
+
+        Parameters
+        ----------
+        pose : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) pose.
+        pivot : `list` of `float`
+            The X, Y, Z pivot point (mm).
+
+        Returns
+        -------
+        reason : `str` or `None`
+            Why the pose cannot be reached; None if it can.
+        """
+        lengths = self.strut_lengths(pose, pivot)
+        problems = [
+            f"strut {i + 1} length {length:.3f} mm not in [{self.min_length}, {self.max_length}]"
+            for i, length in enumerate(lengths)
+            if not self.min_length <= length <= self.max_length
+        ]
+        return "; ".join(problems) if problems else None
+
+    def validate(
+        self,
+        poses: Sequence[Sequence[float]] | np.ndarray,
+        pivot: Sequence[float] = (0.0, 0.0, 0.0),
+        low_limits: None | Sequence[float] = None,
+        high_limits: None | Sequence[float] = None,
+    ) -> types.SimpleNamespace:
+        """Check a batch of poses against the workspace and the position
+        soft limits.
+
+        Parameters
+        ----------
+        poses : `numpy.ndarray`
+            The X, Y, Z (mm), U, V, W (deg) poses, of shape (N, 6).
+        pivot : `list` of `float`
+            The X, Y, Z pivot point (mm).
+        low_limits : `list` of `float` or `None`
+            The lower soft limit of each axis (NLM); None if not limited.
+        high_limits : `list` of `float` or `None`
+            The higher soft limit of each axis (PLM); None if not limited.
+
+        Returns
+        -------
+        validation : `types.SimpleNamespace`
+            The result, with the following `numpy.ndarray` attributes:
+
+            * ``strut_lengths``: the length of each strut (mm), (N, 6).
+            * ``reachable``: is each pose in the workspace, (N,).
+            * ``within_limits``: is each axis of each pose within the soft
+              limits, (N, 6).
+            * ``valid``: is each pose reachable and within the soft limits
+              of every axis, (N,).
+        """
+        poses = np.asarray(poses, dtype=float)
+        if poses.ndim != 2:
+            raise ValueError(f"poses must have shape (N, 6), not {poses.shape}.")
+        lengths = self.strut_lengths(poses, pivot)
+        reachable = np.all((lengths >= self.min_length) & (lengths <= self.max_length), axis=-1)
+        within_limits = np.ones(poses.shape, dtype=bool)
+        if low_limits is not None:
+            within_limits &= poses >= np.asarray(low_limits, dtype=float)
+        if high_limits is not None:
+            within_limits &= poses <= np.asarray(high_limits, dtype=float)
+        return types.SimpleNamespace(
+            strut_lengths=lengths,
+            reachable=reachable,
+            within_limits=within_limits,
+            valid=reachable & np.all(within_limits, axis=-1),
+        )
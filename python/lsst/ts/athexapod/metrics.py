@@ -0,0 +1,283 @@
+"""
+This file is part of ts_ATHexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["RTT_BUCKETS", "CommandStats", "ControllerMetrics", "command_name"]
+
+import bisect
+import math
+import types
+
+# Upper edges of the round trip time histogram buckets (seconds); the last
+# bucket holds everything slower.
+RTT_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, math.inf)
+
+
+def command_name(cmd: str) -> str:
+    """Return the name of a command in the metrics: its GCS mnemonic.
+
+    Single character commands are named as in the GCS manual, e.g. "#5".
+
+    Parameters
+    ----------
+    cmd : `str`
+        The command.
+
+    Returns
+    -------
+    name : `str`
+        The mnemonic, e.g. "MOV" or "MOV?".
+    """
+    if len(cmd) == 1 and ord(cmd) < 32:
+        return f"#{ord(cmd)}"
+    return cmd.split(" ", 1)[0]
+
+
+class CommandStats:
+    """Counters and round trip time histogram of one GCS mnemonic.
+
+    Attributes
+    ----------
+    count : `int`
+        The number of commands sent.
+    timeouts : `int`
+        The number of replies that timed out.
+    coalesced : `int`
+        The number of queries that shared the round trip of an identical
+        query in flight instead of being sent.
+    bytes_out : `int`
+        The number of bytes written.
+    bytes_in : `int`
+        The number of bytes read.
+    lock_wait : `float`
+        Total time the commands waited for the locks (seconds).
+    rtt_count : `int`
+        The number of round trip times recorded.
+    rtt_total : `float`
+        Sum of the round trip times (seconds).
+    rtt_max : `float`
+        The longest round trip time (seconds).
+    histogram : `list` of `int`
+        The number of round trip times in each bucket of `RTT_BUCKETS`.
+    """
+
+    __slots__ = (
+        "count",
+        "timeouts",
+        "coalesced",
+        "bytes_out",
+        "bytes_in",
+        "lock_wait",
+        "rtt_count",
+        "rtt_total",
+        "rtt_max",
+        "histogram",
+    )
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.timeouts: int = 0
+        self.coalesced: int = 0
+        self.bytes_out: int = 0
+        self.bytes_in: int = 0
+        self.lock_wait: float = 0.0
+        self.rtt_count: int = 0
+        self.rtt_total: float = 0.0
+        self.rtt_max: float = 0.0
+        self.histogram: list[int] = [0] * len(RTT_BUCKETS)
+
+    @property
+    def rtt_mean(self) -> float:
+        """Return the mean round trip time (seconds); nan if none."""
+        return self.rtt_total / self.rtt_count if self.rtt_count else math.nan
+
+    def rtt_percentile(self, percent: float) -> float:
+        """Return an upper bound of a round trip time percentile.
+
+        Parameters
+        ----------
+        percent : `float`
+            The percentile, between 0 and 100.
+
+        Returns
+        -------
+        rtt : `float`
+            The upper edge of the histogram bucket holding the percentile,
+            capped at the longest round trip time (seconds); nan if no round
+            trip time was recorded.
+        """
+        if self.rtt_count == 0:
+            return math.nan
+        rank = math.ceil(self.rtt_count * percent / 100)
+        total = 0
+        for edge, num in zip(RTT_BUCKETS, self.histogram):
+            total += num
+            if total >= rank:
+                return min(edge, self.rtt_max)
+        return self.rtt_max
+
+    def as_dict(self) -> dict[str, float | int | list[int]]:
+        """Return a copy of the counters."""
+        return dict(
+            count=self.count,
+            timeouts=self.timeouts,
+            coalesced=self.coalesced,
+            bytes_out=self.bytes_out,
+            bytes_in=self.bytes_in,
+            lock_wait=self.lock_wait,
+            rtt_count=self.rtt_count,
+            rtt_mean=self.rtt_mean,
+            rtt_max=self.rtt_max,
+            rtt_p50=self.rtt_percentile(50),
+            rtt_p99=self.rtt_percentile(99),
+            histogram=list(self.histogram),
+        )
+
+
+class ControllerMetrics:
+    """Per mnemonic instrumentation of the commands sent to the hexapod
+    controller.
+
+    Recording a command costs a dictionary lookup and a few additions, so
+    the metrics can stay enabled in production.
+
+    Attributes
+    ----------
+    commands : `dict` [`str`, `CommandStats`]
+        The statistics of each mnemonic sent.
+    start_time : `float`
+        Monotonic time at which the metrics were last reset (seconds).
+    """
+
+    def __init__(self, start_time: float = 0.0) -> None:
+        self.commands: dict[str, CommandStats] = dict()
+        self.start_time: float = start_time
+
+    def get(self, name: str) -> CommandStats:
+        """Return the statistics of a mnemonic, creating them if needed.
+
+        Parameters
+        ----------
+        name : `str`
+            The mnemonic, as returned by `command_name`.
+        """
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats()
+        return stats
+
+    def record_sent(self, name: str, num_bytes: int, lock_wait: float) -> None:
+        """Record a command written to the controller.
+
+        Parameters
+        ----------
+        name : `str`
+            The mnemonic of the command.
+        num_bytes : `int`
+            The number of bytes written, including the terminator.
+        lock_wait : `float`
+            The time the command waited for the locks (seconds).
+        """
+        stats = self.get(name)
+        stats.count += 1
+        stats.bytes_out += num_bytes
+        stats.lock_wait += lock_wait
+
+    def record_reply(self, name: str, num_bytes: int, rtt: float) -> None:
+        """Record a reply read from the controller.
+
+        Parameters
+        ----------
+        name : `str`
+            The mnemonic of the command.
+        num_bytes : `int`
+            The number of bytes read, including the terminators.
+        rtt : `float`
+            Time between writing the command and reading the last line of
+            its reply (seconds).
+        """
+        stats = self.get(name)
+        stats.bytes_in += num_bytes
+        stats.rtt_count += 1
+        stats.rtt_total += rtt
+        if rtt > stats.rtt_max:
+            stats.rtt_max = rtt
+        stats.histogram[bisect.bisect_left(RTT_BUCKETS, rtt)] += 1
+
+    def record_timeout(self, name: str) -> None:
+        """Record a reply that timed out.
+
+        Parameters
+        ----------
+        name : `str`
+            The mnemonic of the command.
+        """
+        self.get(name).timeouts += 1
+
+    def record_coalesced(self, name: str) -> None:
+        """Record a query that shared the round trip of an identical one.
+
+        Parameters
+        ----------
+        name : `str`
+            The mnemonic of the query.
+        """
+        self.get(name).coalesced += 1
+
+    def reset(self, start_time: float = 0.0) -> None:
+        """Discard all the statistics.
+
+        Parameters
+        ----------
+        start_time : `float`
+            Monotonic time at which the new statistics start (seconds).
+        """
+        self.commands.clear()
+        self.start_time = start_time
+
+    def as_dict(self) -> dict[str, types.SimpleNamespace]:
+        """Return a copy of the statistics of each mnemonic.
+
+        Returns
+        -------
+        metrics : `dict` [`str`, `types.SimpleNamespace`]
+            The counters of each mnemonic, see `CommandStats.as_dict`.
+        """
+        return {name: types.SimpleNamespace(**stats.as_dict()) for name, stats in self.commands.items()}
+
+    def summary(self) -> str:
+        """Return a one line summary of the statistics, busiest mnemonic
+        first.
+
+        Each mnemonic is reported as
+        ``name: count/timeouts, rtt mean/p99/max ms, lock wait ms, bytes
+        out/in``.
+        """
+        items = []
+        for name, stats in sorted(self.commands.items(), key=lambda item: -item[1].count):
+            items.append(
+                f"{name}: {stats.count}/{stats.timeouts}, "
+                f"rtt {stats.rtt_mean * 1000:.1f}/{stats.rtt_percentile(99) * 1000:.1f}/"
+                f"{stats.rtt_max * 1000:.1f} ms, lock {stats.lock_wait * 1000:.1f} ms, "
+                f"{stats.bytes_out}/{stats.bytes_in} B"
+            )
+        return "; ".join(items) if items else "no commands"
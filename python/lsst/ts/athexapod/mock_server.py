@@ -21,136 +21,591 @@ You should have recieved a copy of the GNU General Public License
 along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
+__all__ = ["MockServer", "HexapodDevice", "PlatformMotion", "FaultRule"]
+
+import asyncio
 import logging
-import re
+import math
+import random
 import types
-from typing import Awaitable, Callable
+from typing import Any, Awaitable, Callable, Sequence
 
-from lsst.ts import simactuators
+import numpy as np
 from lsst.ts import tcpip
 
+from .clock import ScaledClock
+from .estimator import MoveEstimator
+from .gcserror import GCSError, PIError
+from .kinematics import HexapodKinematics
+
+# Names of the axes, in the order of the replies, and the keyword of the
+# handlers receiving their values.
+AXIS_NAMES = "XYZUVW"
+AXIS_KEYWORDS = {name: name.lower() for name in AXIS_NAMES}
+
+# Default position soft limits of the X, Y, Z (mm), U, V, W (deg) axes.
+LOW_LIMITS = (-12.6, -12.6, -12.6, -7.6, -7.6, -12.6)
+HIGH_LIMITS = (22.6, 22.6, 12.6, 7.6, 7.6, 12.6)
+
+# Units of the X, Y, Z, U, V, W axes, replied to PUN?.
+POSITION_UNITS = ("MM", "MM", "MM", "DEG", "DEG", "DEG")
+
+# Number of poses checked against the workspace along the path of a move.
+NUM_PATH_SAMPLES = 50
+
+# Names of the pivot point coordinates accepted by SPI: SPI? replies with
+# R, S and T.
+PIVOT_NAMES = {"X": "x", "Y": "y", "Z": "z", "R": "x", "S": "y", "T": "z"}
+
+
+def tokenize(line: str) -> tuple[str, list[str]]:
+    """Split a GCS command line into its mnemonic and arguments.
+
+    Parameters
+    ----------
+    line : `str`
+        The command line, without the terminator.
+
+    Returns
+    -------
+    mnemonic : `str`
+        The mnemonic, e.g. "MOV" or "MOV?", or the single control character
+        of a single character command.
+    arguments : `list` of `str`
+        The arguments.
+    """
+    if len(line) == 1:
+        return line, []
+    tokens = line.split()
+    if not tokens:
+        return "", []
+    return tokens[0], tokens[1:]
+
+
+def parse_axis_arguments(arguments: list[str], names: None | dict[str, str] = None) -> dict[str, float]:
+    """Parse ``axis value`` pairs.
+
+    Any subset of the axes is accepted, in any order, with any value
+    `float` can parse: signed, integer, decimal or scientific.
+
+    Parameters
+    ----------
+    arguments : `list` of `str`
+        The arguments of the command, e.g. ["X", "-1.5", "Z", "2e-3"].
+    names : `dict` [`str`, `str`], optional
+        The names accepted, mapped to the keyword their value is returned
+        as; by default the axes of `AXIS_NAMES`, returned lowercase.
+
+    Returns
+    -------
+    values : `dict` [`str`, `float`]
+        The value of each axis in the arguments, keyed by keyword.
+
+    Raises
+    ------
+    GCSError
+        If the arguments are not ``axis value`` pairs, or an axis is
+        unknown.
+    """
+    if len(arguments) % 2 != 0:
+        raise GCSError(PIError.E1_PI_CNTR_PARAM_SYNTAX.value, " ".join(arguments))
+    if names is None:
+        names = AXIS_KEYWORDS
+    values = dict()
+    for name, value in zip(arguments[::2], arguments[1::2]):
+        if name not in names:
+            raise GCSError(PIError.E15_PI_CNTR_INVALID_AXIS_IDENTIFIER.value, name)
+        try:
+            values[names[name]] = float(value)
+        except ValueError:
+            raise GCSError(PIError.E1_PI_CNTR_PARAM_SYNTAX.value, value)
+    return values
+
+
+def parse_axis_list(arguments: list[str]) -> dict[str, str]:
+    """Parse the axes of a query; no axis means all of them.
+
+    Parameters
+    ----------
+    arguments : `list` of `str`
+        The arguments of the query, e.g. ["X", "Y"].
+
+    Returns
+    -------
+    kwargs : `dict` [`str`, `str`]
+        The ``axes`` keyword argument: the names of the axes queried.
+
+    Raises
+    ------
+    GCSError
+        If an axis is unknown.
+    """
+    for name in arguments:
+        if name not in AXIS_KEYWORDS:
+            raise GCSError(PIError.E15_PI_CNTR_INVALID_AXIS_IDENTIFIER.value, name)
+    return dict(axes="".join(arguments) if arguments else AXIS_NAMES)
+
+
+def parse_no_argument(arguments: list[str]) -> dict[str, Any]:
+    """Check that a command has no argument.
+
+    Raises
+    ------
+    GCSError
+        If there are arguments.
+    """
+    if arguments:
+        raise GCSError(PIError.E1_PI_CNTR_PARAM_SYNTAX.value, " ".join(arguments))
+    return dict()
+
+
+def parse_velocity(arguments: list[str]) -> dict[str, float]:
+    """Parse the single value of VLS.
+
+    Raises
+    ------
+    GCSError
+        If there is not exactly one numeric argument.
+    """
+    try:
+        [value] = arguments
+        return dict(velocity=float(value))
+    except ValueError:
+        raise GCSError(PIError.E1_PI_CNTR_PARAM_SYNTAX.value, " ".join(arguments))
+
+
+def format_axis_values(values: dict[str, Any], axes: str = AXIS_NAMES) -> str:
+    """Format the reply of a query with one line per axis.
+
+    Parameters
+    ----------
+    values : `dict` [`str`, `typing.Any`]
+        The value of each axis, keyed by uppercase name.
+    axes : `str`
+        The names of the axes to report, in order.
+    """
+    return "\n ".join(f"{name}={values[name]}" for name in axes)
+
+
+class PlatformMotion:
+    """Synchronized motion of the platform of the mock hexapod.
+
+    Like the controller, the whole pose is interpolated along one path, so
+    that all the axes start and arrive together. The path is traveled with
+    a trapezoidal velocity profile whose cruise velocity is the system
+    velocity (VLS); the length of the path is the one `MoveEstimator`
+    predicts from the pivot point, so that the predicted durations of the
+    CSC match the mock.
+
+    Parameters
+    ----------
+    acceleration : `float`
+        The acceleration of the platform (mm/s^2 and deg/s^2).
+
+    Attributes
+    ----------
+    start_pose : `numpy.ndarray`
+        The X, Y, Z (mm), U, V, W (deg) pose at the start of the latest
+        move.
+    end_pose : `numpy.ndarray`
+        The target pose of the latest move.
+    start_tai : `float`
+        TAI time at which the latest move started (unix seconds).
+    duration : `float`
+        The duration of the latest move (seconds).
+    """
+
+    def __init__(self, acceleration: float = 10.0) -> None:
+        self.acceleration = acceleration
+        self.start_pose: np.ndarray = np.zeros(6)
+        self.end_pose: np.ndarray = np.zeros(6)
+        self.start_tai: float = -math.inf
+        self.duration: float = 0.0
+        self._estimator = MoveEstimator(acceleration=acceleration, overhead=0)
+        # Length of the path, and peak velocity of the profile.
+        self._length: float = 0.0
+        self._peak_velocity: float = 0.0
+
+    @property
+    def end_tai(self) -> float:
+        """Return the TAI time at which the latest move ends (unix
+        seconds).
+        """
+        return self.start_tai + self.duration
+
+    def path(self, start: Sequence[float], target: Sequence[float], num: int) -> np.ndarray:
+        """Return poses along the path of a move.
+
+        Parameters
+        ----------
+        start : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) start pose.
+        target : `list` of `float`
+            The target pose.
+        num : `int`
+            The number of poses, both ends included.
+
+        Returns
+        -------
+        poses : `numpy.ndarray`
+            The poses, of shape (num, 6).
+        """
+        start = np.asarray(start, dtype=float)
+        fractions = np.linspace(0, 1, num)[:, np.newaxis]
+        return start + (np.asarray(target, dtype=float) - start) * fractions
+
+    def move(
+        self,
+        target: Sequence[float],
+        tai: float,
+        velocity: float,
+        pivot: Sequence[float] = (0.0, 0.0, 0.0),
+    ) -> float:
+        """Start moving from the current pose to a target.
+
+        Parameters
+        ----------
+        target : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) target pose.
+        tai : `float`
+            TAI time at which the move starts (unix seconds).
+        velocity : `float`
+            The system velocity (mm/s and deg/s).
+        pivot : `list` of `float`
+            The X, Y, Z pivot point (mm).
+
+        Returns
+        -------
+        duration : `float`
+            The duration of the move (seconds).
+        """
+        self.start_pose = self.pose(tai)
+        self.end_pose = np.array(target, dtype=float)
+        self.start_tai = tai
+        self._length = self._estimator.path_length(self.start_pose, self.end_pose, pivot)
+        if self._length == 0:
+            self._peak_velocity = 0.0
+            self.duration = 0.0
+        else:
+            self._peak_velocity = min(velocity, math.sqrt(self._length * self.acceleration))
+            self.duration = self._length / self._peak_velocity + self._peak_velocity / self.acceleration
+        return self.duration
+
+    def pose(self, tai: float) -> np.ndarray:
+        """Return the pose at a given time.
+
+        Parameters
+        ----------
+        tai : `float`
+            TAI time (unix seconds).
+
+        Returns
+        -------
+        pose : `numpy.ndarray`
+            The X, Y, Z (mm), U, V, W (deg) pose.
+        """
+        elapsed = tai - self.start_tai
+        if elapsed >= self.duration:
+            return self.end_pose.copy()
+        if elapsed <= 0:
+            return self.start_pose.copy()
+        acceleration_time = self._peak_velocity / self.acceleration
+        if elapsed < acceleration_time:
+            distance = self.acceleration * elapsed**2 / 2
+        elif elapsed > self.duration - acceleration_time:
+            distance = self._length - self.acceleration * (self.duration - elapsed) ** 2 / 2
+        else:
+            distance = self.acceleration * acceleration_time**2 / 2 + self._peak_velocity * (
+                elapsed - acceleration_time
+            )
+        return self.start_pose + (self.end_pose - self.start_pose) * (distance / self._length)
+
+    def stop(self, tai: float) -> None:
+        """Halt the platform where it is.
+
+        Parameters
+        ----------
+        tai : `float`
+            TAI time at which the platform halts (unix seconds).
+        """
+        self.start_pose = self.end_pose = self.pose(tai)
+        self.start_tai = tai
+        self.duration = 0.0
+
+    def axes_moving(self, tai: float) -> np.ndarray:
+        """Return whether each axis is moving at a given time.
+
+        Parameters
+        ----------
+        tai : `float`
+            TAI time (unix seconds).
+
+        Returns
+        -------
+        moving : `numpy.ndarray`
+            Is each of the X, Y, Z, U, V, W axes moving?
+        """
+        return (self.end_pose != self.start_pose) & (self.start_tai <= tai < self.end_tai)
+
+
+class FaultRule:
+    """Network faults injected by `MockServer` in the handling of one
+    mnemonic.
+
+    The delays are in wall clock seconds, like the network they simulate.
+
+    Parameters
+    ----------
+    latency : `float`
+        Delay before the command is executed (seconds).
+    jitter : `float`
+        Maximum random delay added to ``latency`` (seconds).
+    bandwidth : `float` or `None`
+        Rate the reply is sent at (bytes/second); None for no limit.
+    drop_probability : `float`
+        Probability that the reply is not sent.
+    truncate_probability : `float`
+        Probability that only the first half of the reply is sent: its
+        first half lines, or half of a single line reply.
+    disconnect_probability : `float`
+        Probability that the connection is closed after sending half of
+        the reply, or before executing a command without reply.
+    error : `int`
+        GCS error code set after executing the command, then returned by
+        ``ERR?``; 0 to not set any.
+    count : `int` or `None`
+        The number of commands the rule applies to, after which it is
+        removed; None to apply it until it is removed.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        bandwidth: None | float = None,
+        drop_probability: float = 0.0,
+        truncate_probability: float = 0.0,
+        disconnect_probability: float = 0.0,
+        error: int = 0,
+        count: None | int = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.drop_probability = drop_probability
+        self.truncate_probability = truncate_probability
+        self.disconnect_probability = disconnect_probability
+        self.error = error
+        self.count = count
+
 
 class MockServer(tcpip.OneClientReadLoopServer):
     """_summary_
 
+    Network faults can be injected per mnemonic with `inject_fault`, to
+    exercise the timeout, resync and reconnect paths of the client.
+
     Parameters
     ----------
     port : `int`
         The port that the server starts on, defaults to 0.
+    clock : `ScaledClock` or `None`
+        The clock the axes move on; if None, the wall clock.
+    kinematics : `HexapodKinematics` or `None`
+        The kinematics of the hexapod; if None, the workspace is not
+        checked.
+
+    Attributes
+    ----------
+    faults : `dict` [`str`, `FaultRule`]
+        The faults injected for each mnemonic; those of "*" apply to the
+        mnemonics without a rule of their own.
+    random : `random.Random`
+        The random number generator of the faults; seed it to make them
+        reproducible.
     """
 
-    def __init__(self, port: int = 0) -> None:
-        self.device: HexapodDevice = HexapodDevice()
+    def __init__(
+        self, port: int = 0, clock: None | ScaledClock = None, kinematics: None | HexapodKinematics = None
+    ) -> None:
+        self.device: HexapodDevice = HexapodDevice(clock=clock, kinematics=kinematics)
+        self.faults: dict[str, FaultRule] = dict()
+        self.random: random.Random = random.Random()
         log = logging.getLogger(__name__)
         super().__init__(port=port, log=log, terminator=b"\n", encoding="ISO-8859-1")
 
+    def inject_fault(self, mnemonic: str = "*", **kwargs: Any) -> FaultRule:
+        """Inject network faults in the handling of a mnemonic.
+
+        Parameters
+        ----------
+        mnemonic : `str`
+            The mnemonic, e.g. "MOV?" or "\\3", or "*" for all the
+            mnemonics without a rule of their own.
+        **kwargs
+            The parameters of the `FaultRule`.
+
+        Returns
+        -------
+        rule : `FaultRule`
+            The rule, replacing any previous rule of the mnemonic; it may be
+            modified while the server runs.
+        """
+        rule = self.faults[mnemonic] = FaultRule(**kwargs)
+        return rule
+
+    def clear_faults(self) -> None:
+        """Remove all the injected faults."""
+        self.faults.clear()
+
+    def _fault_rule(self, mnemonic: str) -> None | FaultRule:
+        """Return the rule applying to a command, counting it."""
+        key = mnemonic if mnemonic in self.faults else "*"
+        rule = self.faults.get(key)
+        if rule is not None and rule.count is not None:
+            rule.count -= 1
+            if rule.count <= 0:
+                del self.faults[key]
+        return rule
+
     async def read_and_dispatch(self) -> None:
         """Read and parse message and return a response if any."""
         line = await self.read_str()
         self.log.debug(f"{line=}")
+        rule = self._fault_rule(tokenize(line)[0]) if self.faults else None
+        if rule is None:
+            response = await self.device.parse_message(line)
+            self.log.debug(f"{response=}")
+            if response is not None:
+                await self.write_str(response)
+            return
+
+        delay = rule.latency + self.random.uniform(0, rule.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
         response = await self.device.parse_message(line)
-        self.log.debug(f"{response=}")
-        if response is not None:
-            await self.write_str(response)
+        if rule.error:
+            self.device.error = rule.error
+        if response is None:
+            if self.random.random() < rule.disconnect_probability:
+                self.log.info(f"Injected disconnect at {line!r}")
+                await self.close_client()
+            return
+        if self.random.random() < rule.drop_probability:
+            self.log.info(f"Injected dropped reply to {line!r}")
+            return
+
+        data = response.encode(self.encoding) + self.terminator
+        if self.random.random() < rule.truncate_probability:
+            lines = response.split("\n")
+            truncated = (
+                "\n".join(lines[: len(lines) // 2]) if len(lines) > 1 else response[: len(response) // 2]
+            )
+            self.log.info(f"Injected truncated reply to {line!r}")
+            data = truncated.encode(self.encoding) + self.terminator
+        if rule.bandwidth is not None:
+            await asyncio.sleep(len(data) / rule.bandwidth)
+        if self.random.random() < rule.disconnect_probability:
+            self.log.info(f"Injected disconnect in the reply to {line!r}")
+            await self.write(data[: len(data) // 2])
+            await self.close_client()
+            return
+        await self.write(data)
 
 
 class HexapodDevice:
-    """Implement a fake PI Hexapod controller."""
+    """Implement a fake PI Hexapod controller.
+
+    Commands are split into a mnemonic and arguments by `tokenize`, then
+    dispatched with a single lookup of the mnemonic in ``command_calls``.
+    Like the real controller, a command that cannot be parsed is not
+    executed and sets the error code read by ``ERR?``.
+
+    The platform moves in sync along one path at the system velocity (see
+    `PlatformMotion`). A move is rejected with PI_CNTR_POS_OUT_OF_LIMITS if
+    its target is out of the active position soft limits or, if the
+    kinematics are known, if any strut length along its path is out of
+    range; ``VMO?`` makes the same checks. The stop character halts the
+    platform where it is and sets PI_CNTR_STOP.
 
-    def __init__(self) -> None:
+    Parameters
+    ----------
+    clock : `ScaledClock` or `None`
+        The clock the platform moves on; if None, the wall clock.
+    kinematics : `HexapodKinematics` or `None`
+        The kinematics of the hexapod; if None, the workspace is not
+        checked.
+
+    Attributes
+    ----------
+    motion : `PlatformMotion`
+        The motion of the platform.
+    low_limits : `numpy.ndarray`
+        The lower position soft limit of each axis.
+    high_limits : `numpy.ndarray`
+        The higher position soft limit of each axis.
+    soft_limits_active : `numpy.ndarray`
+        Are the position soft limits of each axis active (SSL)?
+    clv : `numpy.ndarray`
+        The closed loop velocity of each axis (VEL).
+    sv : `float`
+        The system velocity (mm/s and deg/s).
+    settle_time : `float`
+        Time after the end of a move before its axes are reported on target
+        (simulated seconds).
+    error : `int`
+        The code of the latest error; reset by ``ERR?``.
+    command_calls : `dict` [`str`, `tuple`]
+        The handler of each mnemonic and the function parsing its arguments
+        into the keyword arguments of the handler.
+    """
+
+    def __init__(self, clock: None | ScaledClock = None, kinematics: None | HexapodKinematics = None) -> None:
         self.log: logging.Logger = logging.getLogger(__name__)
+        self.clock: ScaledClock = ScaledClock() if clock is None else clock
+        self.kinematics = kinematics
         self.ready: bool = False
-        self.x: simactuators.PointToPointActuator = simactuators.PointToPointActuator(
-            min_position=-12.6, max_position=22.6, speed=1
-        )
-        self.y: simactuators.PointToPointActuator = simactuators.PointToPointActuator(
-            min_position=-12.6, max_position=22.6, speed=1
-        )
-        self.z: simactuators.PointToPointActuator = simactuators.PointToPointActuator(
-            min_position=-12.6, max_position=12.6, speed=1
-        )
-        self.u: simactuators.PointToPointActuator = simactuators.PointToPointActuator(
-            min_position=-7.6, max_position=7.6, speed=1
-        )
-        self.v: simactuators.PointToPointActuator = simactuators.PointToPointActuator(
-            min_position=-7.6, max_position=7.6, speed=1
-        )
-        self.w: simactuators.PointToPointActuator = simactuators.PointToPointActuator(
-            min_position=-12.6, max_position=12.6, speed=1
-        )
+        self.settle_time: float = 0.0
+        self.error: int = 0
+        self.motion: PlatformMotion = PlatformMotion()
+        self.low_limits: np.ndarray = np.array(LOW_LIMITS)
+        self.high_limits: np.ndarray = np.array(HIGH_LIMITS)
+        self.soft_limits_active: np.ndarray = np.ones(6, dtype=bool)
+        self.clv: np.ndarray = np.ones(6)
         self.referenced: types.SimpleNamespace = types.SimpleNamespace(x=0, y=0, z=0, u=0, v=0, w=0)
-        self.sv: int = 1
+        self.sv: float = 1
+        self.last_positions: list[float] = self.positions()
         self.pivot: types.SimpleNamespace = types.SimpleNamespace(x=0, y=0, z=0, u=0, v=0, w=0)
-        self.command_calls: dict[str, Callable[..., Awaitable[None | str]]] = {
-            "\3": self.format_real_position,
-            "\5": self.format_motion_status,
-            "\7": self.format_controller_ready,
-            "MOV": self.set_position,
-            "FRF?": self.format_referencing_result,
-            "FRF": self.reference,
-            "MOV?": self.format_target_position,
-            "ERR?": self.format_error,
-            "NLM": self.set_low_position_soft_Limit,
-            "NLM?": self.format_low_position_soft_limit,
-            "PLM": self.set_high_position_soft_limit,
-            "PLM?": self.format_high_position_soft_limit,
-            "SPI": self.set_pivot_point,
-            "SPI?": self.format_pivot_point,
-            "VLS": self.set_sv,
-            "VLS?": self.format_sv,
-            "MVR": self.format_offset,
+        self.command_calls: dict[
+            str, tuple[Callable[..., Awaitable[None | str]], Callable[[list[str]], dict[str, Any]]]
+        ] = {
+            "\3": (self.format_real_position, parse_no_argument),
+            "\5": (self.format_motion_status, parse_no_argument),
+            "\6": (self.format_position_changed, parse_no_argument),
+            "\7": (self.format_controller_ready, parse_no_argument),
+            "\x18": (self.stop_all_axes, parse_no_argument),
+            "MOV": (self.set_position, parse_axis_arguments),
+            "MOV?": (self.format_target_position, parse_axis_list),
+            "MVR": (self.format_offset, parse_axis_arguments),
+            "VMO?": (self.check_offset, parse_axis_arguments),
+            "FRF": (self.reference, parse_axis_list),
+            "FRF?": (self.format_referencing_result, parse_axis_list),
+            "ONT?": (self.format_on_target, parse_axis_list),
+            "ERR?": (self.format_error, parse_no_argument),
+            "NLM": (self.set_low_position_soft_Limit, parse_axis_arguments),
+            "NLM?": (self.format_low_position_soft_limit, parse_axis_list),
+            "PLM": (self.set_high_position_soft_limit, parse_axis_arguments),
+            "PLM?": (self.format_high_position_soft_limit, parse_axis_list),
+            "SSL": (self.activate_soft_limit, parse_axis_arguments),
+            "SSL?": (self.format_check_active_soft_limit, parse_axis_list),
+            "PUN?": (self.format_position_unit, parse_axis_list),
+            "VEL": (self.set_clv, parse_axis_arguments),
+            "VEL?": (self.format_clv, parse_axis_list),
+            "SPI": (self.set_pivot_point, lambda arguments: parse_axis_arguments(arguments, PIVOT_NAMES)),
+            "SPI?": (self.format_pivot_point, parse_no_argument),
+            "VLS": (self.set_sv, parse_velocity),
+            "VLS?": (self.format_sv, parse_no_argument),
         }
-        self.commands: list[re.Pattern[str]] = [
-            re.compile("^(?P<cmd>\3)$"),
-            re.compile("^(?P<cmd>\5)$"),
-            re.compile("^(?P<cmd>\6)$"),
-            re.compile("^(?P<cmd>\7)$"),
-            re.compile(
-                (
-                    r"^(?P<cmd>MOV) (?P<x>X) (?P<x_value>\d+.\d+) "
-                    r"(?P<y>Y) (?P<y_value>\d+.\d+) (?P<z>Z) (?P<z_value>\d+.\d+) "
-                    r"(?P<u>U) (?P<u_value>\d+.\d+) (?P<v>V) (?P<v_value>\d+.\d+) "
-                    r"(?P<w>W) (?P<w_value>\d+.\d+)$"
-                )
-            ),
-            re.compile(r"^(?P<cmd>FRF\?)$"),
-            re.compile(r"^(?P<cmd>FRF) X Y Z U V W$"),
-            re.compile(r"^(?P<cmd>MOV\?) X Y Z U V W$"),
-            re.compile(r"^(?P<cmd>ERR\?)$"),
-            re.compile(
-                (
-                    r"^(?P<cmd>NLM) (?P<x>X) (?P<x_value>-\d+.\d+) (?P<y>Y) (?P<y_value>-\d+.\d+) "
-                    r"(?P<z>Z) (?P<z_value>-\d+.\d+) (?P<u>U) (?P<u_value>-\d+.\d+) "
-                    r"(?P<v>V) (?P<v_value>-\d+.\d+) (?P<w>W) (?P<w_value>-\d+.\d+)$"
-                )
-            ),
-            re.compile(r"^(?P<cmd>NLM\?) X Y Z U V W$"),
-            re.compile(
-                (
-                    r"^(?P<cmd>PLM) (?P<x>X) (?P<x_value>\d+.\d+) (?P<y>Y) (?P<y_value>\d+.\d+) "
-                    r"(?P<z>Z) (?P<z_value>\d+.\d+) (?P<u>U) (?P<u_value>\d+.\d+) "
-                    r"(?P<v>V) (?P<v_value>\d+.\d+) (?P<w>W) (?P<w_value>\d+.\d+)$"
-                )
-            ),
-            re.compile(r"^(?P<cmd>PLM\?) X Y Z U V W$"),
-            re.compile(
-                (
-                    r"^(?P<cmd>SPI) (?P<x>X) (?P<x_value>\d+.\d+) "
-                    r"(?P<y>Y) (?P<y_value>\d+.\d+) (?P<z>Z) (?P<z_value>\d+.\d+)$"
-                )
-            ),
-            re.compile(r"^(?P<cmd>SPI\?)$"),
-            re.compile(r"^(?P<cmd>VLS) (?P<velocity>\d+.\d+)$"),
-            re.compile(r"^(?P<cmd>VLS\?)$"),
-            re.compile(
-                (
-                    r"^(?P<cmd>MVR) (?P<x>X) (?P<x_value>\d+.\d+) "
-                    r"(?P<y>Y) (?P<y_value>\d+.\d+) (?P<z>Z) (?P<z_value>\d+.\d+) "
-                    r"(?P<u>U) (?P<u_value>\d+.\d+) (?P<v>V) (?P<v_value>\d+.\d+) "
-                    r"(?P<w>W) (?P<w_value>\d+.\d+)$"
-                )
-            ),
-        ]
 
     async def parse_message(self, line: str) -> None | str:
         """Parse the message and return a response if any.
@@ -164,75 +619,121 @@ class HexapodDevice:
         -------
         Optional[str]
             Returns a string response if expected.
+        """
+        mnemonic, arguments = tokenize(line)
+        command = self.command_calls.get(mnemonic)
+        try:
+            if command is None:
+                raise GCSError(PIError.E2_PI_CNTR_UNKNOWN_COMMAND.value, mnemonic)
+            handler, parse_arguments = command
+            return await handler(**parse_arguments(arguments))
+        except GCSError as e:
+            self.log.warning(f"Rejected {line!r}: {e}")
+            self.error = e.val
+            return None
+
+    def pivot_point(self) -> list[float]:
+        """Return the X, Y, Z pivot point (mm)."""
+        return [self.pivot.x, self.pivot.y, self.pivot.z]
+
+    def strut_lengths(self) -> np.ndarray:
+        """Return the current length of each strut (mm).
 
         Raises
         ------
-        Exception
-            Raised if command is not implemented.
+        RuntimeError
+            If the kinematics are not known.
+        """
+        if self.kinematics is None:
+            raise RuntimeError("The kinematics of the hexapod are not known.")
+        return self.kinematics.strut_lengths(self.motion.pose(self.clock.tai()), self.pivot_point())
+
+    def can_move(self, target: Sequence[float], tai: float) -> bool:
+        """Can the platform move to a target pose from where it is?
+
+        Parameters
+        ----------
+        target : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) target pose.
+        tai : `float`
+            TAI time at which the move would start (unix seconds).
+
+        Returns
+        -------
+        can_move : `bool`
+            True if the target is within the active soft limits and, if the
+            kinematics are known, the path stays in the workspace.
         """
-        for command in self.commands:
-            matched_command = command.match(line)
-            if matched_command:
-                self.log.debug(f"Matched command {line}")
-                command_group = matched_command.group("cmd")
-                if command_group in self.command_calls:
-                    called_command = self.command_calls[command_group]
-                    self.log.debug(f"cmd group:{command_group}")
-                    if command_group in ["NLM", "MOV", "PLM", "MVR"]:
-                        self.log.debug(f"Grabbing command {command_group}")
-                        response = await called_command(
-                            x=float(matched_command.group("x_value")),
-                            y=float(matched_command.group("y_value")),
-                            z=float(matched_command.group("z_value")),
-                            u=float(matched_command.group("u_value")),
-                            v=float(matched_command.group("v_value")),
-                            w=float(matched_command.group("w_value")),
-                        )
-                        return response
-                    elif command_group in ["SPI"]:
-                        self.log.debug(f"Grabbing command {command_group}")
-                        response = await called_command(
-                            x=float(matched_command.group("x_value")),
-                            y=float(matched_command.group("y_value")),
-                            z=float(matched_command.group("z_value")),
-                        )
-                        return response
-                    elif command_group in ["VLS"]:
-                        self.log.debug(f"Grabbing command {command_group}")
-                        response = await called_command(velocity=float(matched_command.group("velocity")))
-                        return response
-                    else:
-                        self.log.debug(f"{command_group=}")
-                        response = await called_command()
-                        self.log.debug(f"{response=}")
-                        return response
-                else:
-                    raise Exception(f"{command_group} is not implemented.")
-        return None
+        target = np.asarray(target, dtype=float)
+        out_of_limits = (target < self.low_limits) | (target > self.high_limits)
+        if np.any(out_of_limits & self.soft_limits_active):
+            return False
+        if self.kinematics is not None:
+            path = self.motion.path(self.motion.pose(tai), target, NUM_PATH_SAMPLES)
+            return bool(np.all(self.kinematics.reachable(path, self.pivot_point())))
+        return True
+
+    def move(self, target: Sequence[float]) -> None:
+        """Check a target pose and start moving to it.
+
+        Parameters
+        ----------
+        target : `list` of `float`
+            The X, Y, Z (mm), U, V, W (deg) target pose.
+
+        Raises
+        ------
+        GCSError
+            If the platform cannot move to the target; see `can_move`.
+        """
+        tai = self.clock.tai()
+        if not self.can_move(target, tai):
+            raise GCSError(PIError.E7_PI_CNTR_POS_OUT_OF_LIMITS.value, f"{list(target)}")
+        self.motion.move(target, tai, velocity=self.sv, pivot=self.pivot_point())
+
+    def target(
+        self,
+        x: None | float = None,
+        y: None | float = None,
+        z: None | float = None,
+        u: None | float = None,
+        v: None | float = None,
+        w: None | float = None,
+    ) -> list[float]:
+        """Return the target pose with the axes given replaced; the others
+        keep their target.
+        """
+        return [
+            current if value is None else float(value)
+            for current, value in zip(self.motion.end_pose.tolist(), (x, y, z, u, v, w))
+        ]
+
+    def _axis_values(self, values: np.ndarray) -> dict[str, float]:
+        """Return the value of each axis, keyed by uppercase axis name."""
+        return dict(zip(AXIS_NAMES, values.tolist()))
 
     async def format_real_position(self) -> str:
         """Return formatted position response."""
-        return (
-            f"X={self.x.position()}\n "
-            f"Y={self.y.position()}\n "
-            f"Z={self.z.position()}\n "
-            f"U={self.u.position()}\n "
-            f"V={self.v.position()}\n "
-            f"W={self.w.position()}"
-        )
+        return format_axis_values(self._axis_values(self.motion.pose(self.clock.tai())))
 
     async def format_motion_status(self) -> str:
         """Return formatted motion status response."""
-        motion_string = (
-            f"{int(self.x.moving())}"
-            f"{int(self.y.moving())}"
-            f"{int(self.z.moving())}"
-            f"{int(self.u.moving())}"
-            f"{int(self.v.moving())}"
-            f"{int(self.w.moving())}"
-        )
-        motion_bitinteger = int(motion_string, 2)
-        return str(motion_bitinteger)
+        code = sum(1 << i for i, moving in enumerate(self.motion.axes_moving(self.clock.tai())) if moving)
+        return f"{code:X}"
+
+    def positions(self) -> list[float]:
+        """Return the current position of each axis."""
+        return self.motion.pose(self.clock.tai()).tolist()
+
+    async def format_position_changed(self) -> str:
+        """Return formatted position changed response.
+
+        Positions are compared with the ones at the previous query.
+        """
+        positions = self.positions()
+        code = sum(1 << i for i, (new, old) in enumerate(zip(positions, self.last_positions)) if new != old)
+        self.last_positions = positions
+        return f"{code:X}"
 
     async def format_controller_ready(self) -> str:
         """Return formatted controller ready response."""
@@ -240,230 +741,304 @@ class HexapodDevice:
         return f"{chr(177)}"
 
     async def stop_all_axes(self) -> None:
-        """Stop all axes.
+        """Stop all axes where they are, and report PI_CNTR_STOP."""
+        self.motion.stop(self.clock.tai())
+        self.error = PIError.E10_PI_CNTR_STOP.value
 
-        Not implemented due to axes not actually moving naturally.
-        """
-        pass
+    async def set_position(
+        self,
+        x: None | float = None,
+        y: None | float = None,
+        z: None | float = None,
+        u: None | float = None,
+        v: None | float = None,
+        w: None | float = None,
+    ) -> None:
+        """Move the axes given; the others keep their target.
 
-    async def set_position(self, x: float, y: float, z: float, u: float, v: float, w: float) -> None:
-        """Set the position.
         Parameters
         ----------
-        x : float
-        y : float
-        z : float
-        u : float
-        v : float
-        w : float
+        x : float, optional
+        y : float, optional
+        z : float, optional
+        u : float, optional
+        v : float, optional
+        w : float, optional
         """
         self.log.debug("Setting position")
-        self.x.set_position(float(x))
-        self.y.set_position(float(y))
-        self.z.set_position(float(z))
-        self.u.set_position(float(u))
-        self.v.set_position(float(v))
-        self.w.set_position(float(w))
-
-    async def format_referencing_result(self) -> str:
-        """Return formatted reference result."""
-        return (
-            f"X={self.referenced.x}\n "
-            f"Y={self.referenced.y}\n "
-            f"Z={self.referenced.z}\n "
-            f"U={self.referenced.u}\n "
-            f"V={self.referenced.v}\n "
-            f"W={self.referenced.w}"
-        )
+        self.move(self.target(x=x, y=y, z=z, u=u, v=v, w=w))
+
+    async def format_referencing_result(self, axes: str = AXIS_NAMES) -> str:
+        """Return formatted reference result.
 
-    async def reference(self) -> None:
-        """Reference the hexapod."""
-        self.referenced.x = 1
-        self.referenced.y = 1
-        self.referenced.z = 1
-        self.referenced.u = 1
-        self.referenced.v = 1
-        self.referenced.w = 1
-
-    async def format_target_position(self) -> str:
-        """Return formatted string for target position"""
-        return (
-            f"X={self.x.end_position}\n "
-            f"Y={self.y.end_position}\n "
-            f"Z={self.z.end_position}\n "
-            f"U={self.u.end_position}\n "
-            f"V={self.v.end_position}\n "
-            f"W={self.w.end_position}"
+        Parameters
+        ----------
+        axes : str
+            The names of the axes to report.
+        """
+        return format_axis_values(
+            {name.upper(): value for name, value in vars(self.referenced).items()}, axes
         )
 
+    async def reference(self, axes: str = AXIS_NAMES) -> None:
+        """Reference the hexapod.
+
+        Parameters
+        ----------
+        axes : str
+            The names of the axes to reference.
+        """
+        for name in axes:
+            setattr(self.referenced, name.lower(), 1)
+
+    async def format_target_position(self, axes: str = AXIS_NAMES) -> str:
+        """Return formatted string for target position
+
+        Parameters
+        ----------
+        axes : str
+            The names of the axes to report.
+        """
+        return format_axis_values(self._axis_values(self.motion.end_pose), axes)
+
     async def set_low_position_soft_Limit(
-        self, x: float, y: float, z: float, u: float, v: float, w: float
+        self,
+        x: None | float = None,
+        y: None | float = None,
+        z: None | float = None,
+        u: None | float = None,
+        v: None | float = None,
+        w: None | float = None,
     ) -> None:
-        """Set the lower position software limit.
+        """Set the lower position software limit of the axes given.
         Parameters
         ----------
-        x : float
+        x : float, optional
             The x axis minimum software limit.
-        y : float
+        y : float, optional
             The y axis minimum software limit.
-        z : float
+        z : float, optional
             The z axis minimum software limit.
-        u : float
+        u : float, optional
             The u axis minimum software limit.
-        v : float
+        v : float, optional
             The v axis minimum software limit.
-        w : float
+        w : float, optional
             The w axis minimum software limit.
         """
-        self.x.min_position = float(x)
-        self.y.min_position = float(y)
-        self.z.min_position = float(z)
-        self.u.min_position = float(u)
-        self.v.min_position = float(v)
-        self.w.min_position = float(w)
-
-    async def format_low_position_soft_limit(self) -> str:
-        """Return formatted lower position software limit string."""
-        return (
-            f"X={self.x.min_position}\n "
-            f"Y={self.y.min_position}\n "
-            f"Z={self.z.min_position}\n "
-            f"U={self.u.min_position}\n "
-            f"V={self.v.min_position}\n "
-            f"W={self.w.min_position}"
-        )
+        for index, value in enumerate((x, y, z, u, v, w)):
+            if value is not None:
+                self.low_limits[index] = float(value)
+
+    async def format_low_position_soft_limit(self, axes: str = AXIS_NAMES) -> str:
+        """Return formatted lower position software limit string.
+
+        Parameters
+        ----------
+        axes : str
+            The names of the axes to report.
+        """
+        return format_axis_values(self._axis_values(self.low_limits), axes)
 
     async def set_high_position_soft_limit(
-        self, x: float, y: float, z: float, u: float, v: float, w: float
+        self,
+        x: None | float = None,
+        y: None | float = None,
+        z: None | float = None,
+        u: None | float = None,
+        v: None | float = None,
+        w: None | float = None,
     ) -> None:
-        """Set higher position software limit.
+        """Set higher position software limit of the axes given.
         Parameters
         ----------
-        x : float
-        y : float
-        z : float
-        u : float
-        v : float
-        w : float
+        x : float, optional
+        y : float, optional
+        z : float, optional
+        u : float, optional
+        v : float, optional
+        w : float, optional
         """
-        self.x.max_position = float(x)
-        self.y.max_position = float(y)
-        self.z.max_position = float(z)
-        self.u.max_position = float(u)
-        self.v.max_position = float(v)
-        self.w.max_position = float(w)
-
-    async def format_high_position_soft_limit(self) -> str:
-        """Return formatted higher position software limit string."""
-        return (
-            f"X={self.x.max_position}\n "
-            f"Y={self.y.max_position}\n "
-            f"Z={self.z.max_position}\n "
-            f"U={self.u.max_position}\n "
-            f"V={self.v.max_position}\n "
-            f"W={self.w.max_position}"
-        )
+        for index, value in enumerate((x, y, z, u, v, w)):
+            if value is not None:
+                self.high_limits[index] = float(value)
 
-    async def format_on_target(self) -> None:
-        """Return formatted on target string.
+    async def format_high_position_soft_limit(self, axes: str = AXIS_NAMES) -> str:
+        """Return formatted higher position software limit string.
 
-        Not implemented.
+        Parameters
+        ----------
+        axes : str
+            The names of the axes to report.
+        """
+        return format_axis_values(self._axis_values(self.high_limits), axes)
+
+    async def format_on_target(self, axes: str = AXIS_NAMES) -> str:
+        """Return formatted on target response.
+
+        An axis is on target ``settle_time`` after it stops moving.
+
+        Parameters
+        ----------
+        axes : str
+            The names of the axes to report.
         """
-        pass
+        on_target = ~self.motion.axes_moving(self.clock.tai() - self.settle_time)
+        return format_axis_values(self._axis_values(on_target.astype(int)), axes)
 
-    async def format_position_unit(self) -> None:
-        """Return formatted get position unit string."""
-        pass
+    async def format_position_unit(self, axes: str = AXIS_NAMES) -> str:
+        """Return formatted get position unit string.
 
-    async def format_offset(self, x: float, y: float, z: float, u: float, v: float, w: float) -> None:
-        """Set offset for hexapod.
         Parameters
         ----------
-        x : float
-        y : float
-        z : float
-        u : float
-        v : float
-        w : float
+        axes : str
+            The names of the axes to report.
+        """
+        return format_axis_values(dict(zip(AXIS_NAMES, POSITION_UNITS)), axes)
+
+    async def format_offset(
+        self,
+        x: None | float = None,
+        y: None | float = None,
+        z: None | float = None,
+        u: None | float = None,
+        v: None | float = None,
+        w: None | float = None,
+    ) -> None:
+        """Move the axes given relative to their target, like the
+        controller.
+        Parameters
+        ----------
+        x : float, optional
+        y : float, optional
+        z : float, optional
+        u : float, optional
+        v : float, optional
+        w : float, optional
         """
         self.log.debug("Setting offset.")
-        await self.set_position(
-            x=self.x.position() + float(x),
-            y=self.y.position() + float(y),
-            z=self.z.position() + float(z),
-            u=self.u.position() + float(u),
-            v=self.v.position() + float(v),
-            w=self.w.position() + float(w),
-        )
+        target = [
+            current if value is None else current + float(value)
+            for current, value in zip(self.motion.end_pose.tolist(), (x, y, z, u, v, w))
+        ]
+        self.move(target)
 
-    async def check_offset(self, x: float, y: float, z: float, u: float, v: float, w: float) -> str:
-        """Check that the hexapod can move.
+    async def check_offset(
+        self,
+        x: None | float = None,
+        y: None | float = None,
+        z: None | float = None,
+        u: None | float = None,
+        v: None | float = None,
+        w: None | float = None,
+    ) -> str:
+        """Check that the hexapod can move to a position from where it is.
         Parameters
         ----------
-        x : float
-        y : float
-        z : float
-        u : float
-        v : float
-        w : float
+        x : float, optional
+        y : float, optional
+        z : float, optional
+        u : float, optional
+        v : float, optional
+        w : float, optional
+            The target of the axes given; the others keep their target.
         """
-        return "X=1\n Y=1\n Z=1\n U=1\n V=1\n W=1"
+        can_move = self.can_move(self.target(x=x, y=y, z=z, u=u, v=v, w=w), self.clock.tai())
+        return format_axis_values({name: int(can_move) for name in AXIS_NAMES})
 
-    async def set_pivot_point(self, x: float, y: float, z: float) -> None:
-        """Set the pivot point.
+    async def set_pivot_point(
+        self, x: None | float = None, y: None | float = None, z: None | float = None
+    ) -> None:
+        """Set the coordinates of the pivot point given.
         Parameters
         ----------
-        x : float
-        y : float
-        z : float
+        x : float, optional
+        y : float, optional
+        z : float, optional
         """
-        self.pivot.x = x
-        self.pivot.y = y
-        self.pivot.z = z
+        for name, value in dict(x=x, y=y, z=z).items():
+            if value is not None:
+                setattr(self.pivot, name, value)
 
     async def format_pivot_point(self) -> str:
         """Return formatted get pivot point string"""
         return f"R={self.pivot.x}\n S={self.pivot.y}\n T={self.pivot.z}"
 
-    async def format_check_active_soft_limit(self) -> None:
-        """Check that the software limits are active."""
-        pass
+    async def format_check_active_soft_limit(self, axes: str = AXIS_NAMES) -> str:
+        """Return whether the software limits are active.
 
-    async def activate_soft_limit(self, x: float, y: float, z: float, u: float, v: float, w: float) -> None:
-        """Activate the software limits.
         Parameters
         ----------
-        x : float
-        y : float
-        z : float
-        u : float
-        v : float
-        w : float
+        axes : str
+            The names of the axes to report.
         """
-        pass
+        return format_axis_values(self._axis_values(self.soft_limits_active.astype(int)), axes)
 
-    async def set_clv(self, x: float, y: float, z: float, u: float, v: float, w: float) -> None:
-        """Set the closed loop velocity.
+    async def activate_soft_limit(
+        self,
+        x: None | float = None,
+        y: None | float = None,
+        z: None | float = None,
+        u: None | float = None,
+        v: None | float = None,
+        w: None | float = None,
+    ) -> None:
+        """Activate the software limits of the axes given with a non-zero
+        value, and deactivate those given with 0.
         Parameters
         ----------
-        x : float
-        y : float
-        z : float
-        u : float
-        v : float
-        w : float
+        x : float, optional
+        y : float, optional
+        z : float, optional
+        u : float, optional
+        v : float, optional
+        w : float, optional
         """
-        pass
+        for index, value in enumerate((x, y, z, u, v, w)):
+            if value is not None:
+                self.soft_limits_active[index] = value != 0
 
-    async def format_clv(self) -> None:
-        """Return the closed loop velocity."""
-        pass
+    async def set_clv(
+        self,
+        x: None | float = None,
+        y: None | float = None,
+        z: None | float = None,
+        u: None | float = None,
+        v: None | float = None,
+        w: None | float = None,
+    ) -> None:
+        """Set the closed loop velocity of the axes given.
+
+        The platform moves at the system velocity (VLS); the closed loop
+        velocities are only reported by VEL?.
+        Parameters
+        ----------
+        x : float, optional
+        y : float, optional
+        z : float, optional
+        u : float, optional
+        v : float, optional
+        w : float, optional
+        """
+        for index, value in enumerate((x, y, z, u, v, w)):
+            if value is not None:
+                self.clv[index] = value
+
+    async def format_clv(self, axes: str = AXIS_NAMES) -> str:
+        """Return the closed loop velocity.
+
+        Parameters
+        ----------
+        axes : str
+            The names of the axes to report.
+        """
+        return format_axis_values(self._axis_values(self.clv), axes)
 
-    async def set_sv(self, velocity: int) -> None:
+    async def set_sv(self, velocity: float) -> None:
         """Set the system velocity.
         Parameters
         ----------
-        velocity : int
+        velocity : float
         """
         self.sv = velocity
 
@@ -472,5 +1047,6 @@ class HexapodDevice:
         return f"{self.sv}"
 
     async def format_error(self) -> str:
-        """Return get error string"""
-        return "0"
+        """Return the latest error code and reset it."""
+        error, self.error = self.error, 0
+        return f"{error}"
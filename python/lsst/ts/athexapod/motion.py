@@ -0,0 +1,375 @@
+"""
+This file is part of ts_ATHexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["InPositionDetector", "MotionInterruptedError", "MotionMonitor"]
+
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Awaitable, Callable
+
+from lsst.ts import utils
+
+from .controller import ATHexapodController, ControllerStatus
+from .state import ControllerStateHub
+
+AXIS = "XYZUVW"
+
+
+class MotionInterruptedError(Exception):
+    """Raised to the callers waiting for a movement that was interrupted."""
+
+
+class MotionMonitor:
+    """Detect the end of hexapod movements.
+
+    A single task polls the controller while the hexapod moves and sets a
+    future, shared by everybody waiting on the movement, as soon as the
+    motion status (#5) reports that all axes stopped.
+
+    The poll interval adapts to the movement: when its duration is
+    predicted, the monitor sleeps half of the remaining time before each
+    poll, so it polls quickly near the predicted end; otherwise, and once
+    the prediction is exceeded, the interval grows geometrically up to
+    ``max_interval``. Far from the predicted end the cheap position changed
+    query (#6) is used instead: if the positions changed the hexapod is
+    still moving and nothing else is done on that poll.
+
+    Parameters
+    ----------
+    controller : `ATHexapodController`
+        The controller to poll.
+    log : `logging.Logger`
+        The log for this class.
+    min_interval : `float`
+        The shortest interval between polls (seconds).
+    max_interval : `float`
+        The longest interval between polls (seconds).
+    backoff : `float`
+        The factor the poll interval grows by when the end of the movement
+        is not expected yet.
+    max_skips : `int`
+        The maximum number of consecutive polls answered by the position
+        changed query alone.
+    state_callback : `Callable` or `None`
+        Coroutine called with True when the hexapod starts moving and with
+        False when it stops.
+    state_hub : `ControllerStateHub` or `None`
+        The hub to read the position changed query through, if other
+        readers share it; if None, query the controller.
+    """
+
+    def __init__(
+        self,
+        controller: ATHexapodController,
+        log: logging.Logger,
+        min_interval: float = 0.02,
+        max_interval: float = 1.0,
+        backoff: float = 1.5,
+        max_skips: int = 5,
+        state_callback: None | Callable[[bool], Awaitable[None]] = None,
+        state_hub: None | ControllerStateHub = None,
+    ) -> None:
+        self.controller = controller
+        self.log = log
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_skips = max_skips
+        self.state_callback = state_callback
+        self.state_hub = state_hub
+
+        self._done_future: asyncio.Future = utils.make_done_future()
+        self._poll_task: asyncio.Future = utils.make_done_future()
+        self._expected_end: None | float = None
+        # state_hub.change_count at the previous position changed query.
+        self._change_count: int = 0
+
+    @property
+    def moving(self) -> bool:
+        """Is a movement being monitored?"""
+        return not self._done_future.done()
+
+    def start(self, expected_duration: None | float = None) -> asyncio.Future:
+        """Start monitoring a movement that was just commanded.
+
+        If a movement is already monitored, the new one extends it.
+
+        Parameters
+        ----------
+        expected_duration : `float` or `None`
+            The predicted duration of the movement (seconds), if known.
+
+        Returns
+        -------
+        done : `asyncio.Future`
+            Future set to the final motion status when all axes stop.
+        """
+        expected_end = None if expected_duration is None else time.monotonic() + expected_duration
+        if self.moving:
+            if expected_end is not None and self._expected_end is not None:
+                self._expected_end = max(self._expected_end, expected_end)
+            else:
+                self._expected_end = None
+            return self._done_future
+
+        self._expected_end = expected_end
+        self._done_future = asyncio.Future()
+        self._done_future.add_done_callback(_retrieve_exception)
+        self._poll_task = asyncio.create_task(self._poll_loop())
+        return self._done_future
+
+    async def wait(self, expected_duration: None | float = None) -> tuple[bool, ...]:
+        """Start monitoring a movement and wait for it to end.
+
+        Parameters
+        ----------
+        expected_duration : `float` or `None`
+            The predicted duration of the movement (seconds), if known.
+
+        Returns
+        -------
+        motion_status : `tuple` of `bool`
+            The final motion status of each axis.
+
+        Raises
+        ------
+        MotionInterruptedError
+            If the movement is interrupted with `interrupt`.
+        """
+        return await asyncio.shield(self.start(expected_duration))
+
+    def interrupt(self, reason: str) -> None:
+        """Stop monitoring and fail the callers waiting for the movement.
+
+        Parameters
+        ----------
+        reason : `str`
+            The reason for the interruption.
+        """
+        self._poll_task.cancel()
+        if not self._done_future.done():
+            self._done_future.set_exception(MotionInterruptedError(reason))
+
+    async def close(self) -> None:
+        """Stop monitoring and cancel the callers waiting for the
+        movement.
+        """
+        self._poll_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._poll_task
+        self._done_future.cancel()
+
+    def _next_interval(self, interval: float) -> float:
+        """Return the time to wait before the next poll.
+
+        Parameters
+        ----------
+        interval : `float`
+            The previous interval.
+        """
+        if self._expected_end is not None:
+            remaining = self._expected_end - time.monotonic()
+            if remaining > 0:
+                return min(max(remaining / 2, self.min_interval), self.max_interval)
+        return min(interval * self.backoff, self.max_interval)
+
+    def _near_end(self, interval: float) -> bool:
+        """Is the end of the movement expected before the next poll?"""
+        return self._expected_end is None or self._expected_end - time.monotonic() <= 2 * interval
+
+    async def _position_changed(self) -> bool:
+        """Did the positions change since the previous call?"""
+        if self.state_hub is None:
+            return any(await self.controller.position_changed())
+        change_count = await self.state_hub.position_changed()
+        changed = change_count != self._change_count
+        self._change_count = change_count
+        return changed
+
+    async def _poll_loop(self) -> None:
+        """Poll the controller until all axes stop."""
+        interval = self.min_interval
+        moving = False
+        skips = 0
+        if self.state_hub is not None:
+            self._change_count = self.state_hub.change_count
+        while True:
+            try:
+                if moving and skips < self.max_skips and not self._near_end(interval):
+                    if await self._position_changed():
+                        skips += 1
+                        interval = self._next_interval(interval)
+                        await asyncio.sleep(interval)
+                        continue
+                skips = 0
+
+                motion_status = await self.controller.motion_status()
+                if not any(motion_status):
+                    self.log.debug("Hexapod not moving.")
+                    if self.state_callback is not None:
+                        await self.state_callback(False)
+                    if not self._done_future.done():
+                        self._done_future.set_result(motion_status)
+                    return
+
+                if not moving:
+                    moving = True
+                    if self.state_callback is not None:
+                        await self.state_callback(True)
+                self.log.debug(f"Hexapod axis {''.join(a for a, m in zip(AXIS, motion_status) if m)} moving.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.log.error("Could not get motion status.")
+                self.log.exception(e)
+
+            interval = self._next_interval(interval)
+            await asyncio.sleep(interval)
+
+
+class InPositionDetector:
+    """Detect when the hexapod has settled at its target.
+
+    The platform is in position when every axis is on target (ONT?), no
+    axis moves (#5) and, if a tolerance is set, the following error of
+    every axis is within it, continuously for at least the settle time.
+    These are read together in one round trip per poll.
+
+    Parameters
+    ----------
+    controller : `ATHexapodController`
+        The controller to poll.
+    log : `logging.Logger`
+        The log for this class.
+    tolerance : `float` or `None`
+        The largest following error of an axis in position (mm or deg); if
+        None, the following error is not checked.
+    settle_time : `float`
+        How long the platform must stay in position (seconds).
+    poll_interval : `float`
+        The interval between polls (seconds).
+    state_hub : `ControllerStateHub` or `None`
+        The hub to publish the states polled to, if any.
+    """
+
+    def __init__(
+        self,
+        controller: ATHexapodController,
+        log: logging.Logger,
+        tolerance: None | float = None,
+        settle_time: float = 0.0,
+        poll_interval: float = 0.02,
+        state_hub: None | ControllerStateHub = None,
+    ) -> None:
+        self.controller = controller
+        self.log = log
+        self.tolerance = tolerance
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.state_hub = state_hub
+
+        # Set to MotionInterruptedError by interrupt; shared by the waits
+        # in progress.
+        self._interrupted: asyncio.Future = utils.make_done_future()
+
+    def in_position(self, status: ControllerStatus) -> bool:
+        """Is the platform in position in a status?
+
+        Parameters
+        ----------
+        status : `ControllerStatus`
+            A status with the motion status and on target state read.
+        """
+        assert status.motion_status is not None and status.on_target is not None
+        if not all(status.on_target) or any(status.motion_status):
+            return False
+        return self.tolerance is None or max(abs(error) for error in status.following_error) <= self.tolerance
+
+    async def wait(self) -> ControllerStatus:
+        """Wait for the platform to settle in position.
+
+        Returns
+        -------
+        status : `ControllerStatus`
+            The first status in position after the settle time.
+
+        Raises
+        ------
+        MotionInterruptedError
+            If the wait is interrupted with `interrupt`.
+        """
+        if self._interrupted.done():
+            self._interrupted = asyncio.Future()
+            self._interrupted.add_done_callback(_retrieve_exception)
+        interrupted = self._interrupted
+        poll_task = asyncio.create_task(self._poll())
+        try:
+            await asyncio.wait([poll_task, interrupted], return_when=asyncio.FIRST_COMPLETED)
+            if poll_task.done():
+                return poll_task.result()
+            return interrupted.result()
+        finally:
+            poll_task.cancel()
+
+    def interrupt(self, reason: str) -> None:
+        """Fail the callers waiting for the platform to settle.
+
+        Parameters
+        ----------
+        reason : `str`
+            The reason for the interruption.
+        """
+        if not self._interrupted.done():
+            self._interrupted.set_exception(MotionInterruptedError(reason))
+
+    async def _poll(self) -> ControllerStatus:
+        """Poll the controller until the platform is in position for
+        the settle time.
+        """
+        settled_time = None
+        while True:
+            poll_time = time.monotonic()
+            status = await self.controller.snapshot(read_error=False, read_state=True, read_on_target=True)
+            if self.state_hub is not None:
+                self.state_hub.publish(status, poll_time)
+            now = time.monotonic()
+            if not self.in_position(status):
+                settled_time = None
+            elif settled_time is None:
+                settled_time = now
+            if settled_time is not None and now - settled_time >= self.settle_time:
+                return status
+            delay = self.poll_interval
+            if settled_time is not None:
+                delay = min(delay, settled_time + self.settle_time - now)
+            await asyncio.sleep(delay)
+
+
+def _retrieve_exception(future: asyncio.Future) -> None:
+    """Mark the exception of ``future`` as retrieved, in case nobody
+    waits for it.
+    """
+    if not future.cancelled():
+        future.exception()
@@ -0,0 +1,232 @@
+"""
+This file is part of ts_ATHexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["TelemetryScheduler", "TelemetryStream"]
+
+import asyncio
+import logging
+import math
+import time
+from typing import Awaitable, Callable
+
+
+class TelemetryStream:
+    """A telemetry callback run at a fixed period.
+
+    Parameters
+    ----------
+    name : `str`
+        The name of the stream.
+    period : `float`
+        The period of the stream (seconds).
+    callback : `Callable`
+        Coroutine function called once per period.
+
+    Attributes
+    ----------
+    deadline : `float`
+        Monotonic time at which the callback is due next (seconds).
+    count : `int`
+        The number of times the callback was called.
+    overruns : `int`
+        The number of deadlines missed because the previous calls took too
+        long; these periods are skipped.
+    max_duration : `float`
+        The longest time a call took (seconds).
+    errors : `int`
+        The number of calls that raised an exception.
+    failures : `int`
+        The number of consecutive calls that raised an exception; reset by
+        a successful call.
+    """
+
+    __slots__ = (
+        "name",
+        "period",
+        "callback",
+        "deadline",
+        "count",
+        "overruns",
+        "max_duration",
+        "errors",
+        "failures",
+    )
+
+    def __init__(self, name: str, period: float, callback: Callable[[], Awaitable[None]]) -> None:
+        if period <= 0:
+            raise ValueError(f"period={period} must be positive.")
+        self.name: str = name
+        self.period: float = period
+        self.callback: Callable[[], Awaitable[None]] = callback
+        self.deadline: float = 0.0
+        self.count: int = 0
+        self.overruns: int = 0
+        self.max_duration: float = 0.0
+        self.errors: int = 0
+        self.failures: int = 0
+
+
+class TelemetryScheduler:
+    """Run telemetry callbacks on absolute monotonic deadlines, each at its
+    own period.
+
+    The deadlines of a stream are ``start + n * period``, so the time the
+    callbacks take does not make the streams drift. If a call ends after
+    the next deadline of its stream, the missed deadlines are counted as
+    overruns and skipped, instead of stretching the period. Callbacks due
+    at the same time run in the order the streams were added.
+
+    An exception raised by a callback is logged and the stream keeps its
+    schedule, so one failing stream does not stop the others; only
+    ``max_failures`` consecutive failures of the same stream end `run`.
+
+    Parameters
+    ----------
+    log : `logging.Logger`
+        The log for this class.
+    clock : `Callable`
+        Function returning the monotonic time (seconds).
+    max_failures : `int`
+        The number of consecutive failed calls of a stream after which
+        `run` raises the exception of the last one.
+    """
+
+    def __init__(
+        self, log: logging.Logger, clock: Callable[[], float] = time.monotonic, max_failures: int = 3
+    ) -> None:
+        if max_failures < 1:
+            raise ValueError(f"max_failures={max_failures} must be positive.")
+        self.log = log
+        self.clock = clock
+        self.max_failures = max_failures
+        self.streams: dict[str, TelemetryStream] = dict()
+
+    def add(self, name: str, period: float, callback: Callable[[], Awaitable[None]]) -> TelemetryStream:
+        """Add a stream.
+
+        Parameters
+        ----------
+        name : `str`
+            The name of the stream.
+        period : `float`
+            The period of the stream (seconds).
+        callback : `Callable`
+            Coroutine function called once per period.
+
+        Returns
+        -------
+        stream : `TelemetryStream`
+            The new stream.
+        """
+        if name in self.streams:
+            raise ValueError(f"Stream {name!r} already exists.")
+        stream = TelemetryStream(name=name, period=period, callback=callback)
+        self.streams[name] = stream
+        return stream
+
+    async def run(self, keep_running: Callable[[], bool] = lambda: True) -> None:
+        """Run the callbacks until ``keep_running`` returns False.
+
+        All the streams are due when this method is called.
+
+        Parameters
+        ----------
+        keep_running : `Callable`
+            Function checked before each call.
+
+        Raises
+        ------
+        Exception
+            The exception raised by the last call of a stream that failed
+            ``max_failures`` times in a row.
+        """
+        start = self.clock()
+        for stream in self.streams.values():
+            stream.deadline = start
+
+        while keep_running() and self.streams:
+            now = self.clock()
+            next_deadline = min(stream.deadline for stream in self.streams.values())
+            if next_deadline > now:
+                await asyncio.sleep(next_deadline - now)
+                continue
+
+            for stream in list(self.streams.values()):
+                if stream.deadline > now:
+                    continue
+                if not keep_running():
+                    return
+                call_start = self.clock()
+                try:
+                    await stream.callback()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    stream.errors += 1
+                    stream.failures += 1
+                    if stream.failures >= self.max_failures:
+                        self.log.error(
+                            f"Telemetry stream {stream.name!r} failed {stream.failures} times in a row."
+                        )
+                        raise
+                    self.log.exception(f"Telemetry stream {stream.name!r} failed: {e!r}")
+                else:
+                    stream.failures = 0
+                self._schedule_next(stream, call_start)
+
+    def _schedule_next(self, stream: TelemetryStream, call_start: float) -> None:
+        """Move the deadline of a stream that was just called to its next
+        period, skipping the ones already missed.
+
+        Parameters
+        ----------
+        stream : `TelemetryStream`
+            The stream.
+        call_start : `float`
+            Monotonic time at which the call started (seconds).
+        """
+        now = self.clock()
+        stream.count += 1
+        stream.max_duration = max(stream.max_duration, now - call_start)
+        stream.deadline += stream.period
+        if stream.deadline >= now:
+            return
+
+        missed = math.floor((now - stream.deadline) / stream.period) + 1
+        if stream.overruns == 0:
+            self.log.warning(
+                f"Telemetry stream {stream.name!r} overran its {stream.period} s period; "
+                f"skipping {missed} period(s). Further overruns are only counted."
+            )
+        stream.overruns += missed
+        stream.deadline += missed * stream.period
+
+    def summary(self) -> str:
+        """Return a one line summary of the calls and overruns of each
+        stream.
+        """
+        return "; ".join(
+            f"{stream.name}: {stream.count} calls, {stream.errors} errors, {stream.overruns} overruns, "
+            f"max {stream.max_duration * 1000:.1f} ms"
+            for stream in self.streams.values()
+        )
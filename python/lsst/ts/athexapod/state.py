@@ -0,0 +1,303 @@
+"""
+This file is part of ts_ATHexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["ControllerStateHub", "StateSubscription"]
+
+import asyncio
+import logging
+import math
+import time
+import types
+from typing import Callable
+
+from .controller import ATHexapodController, ControllerStatus
+
+
+class StateSubscription:
+    """An asynchronous iterator over the controller states published by a
+    `ControllerStateHub`.
+
+    Only the latest state is kept: a subscriber slower than the polls skips
+    the intermediate states.
+
+    Parameters
+    ----------
+    hub : `ControllerStateHub`
+        The hub to subscribe to.
+    max_age : `float` or `None`
+        If no new state is published within ``max_age`` of the latest one,
+        the subscription asks the hub for a poll (seconds); if None, only
+        wait for the polls made by others.
+    """
+
+    def __init__(self, hub: "ControllerStateHub", max_age: None | float = None) -> None:
+        self.hub = hub
+        self.max_age = max_age
+        self._event = asyncio.Event()
+        self._poll_time = -math.inf
+
+    def notify(self) -> None:
+        """Wake up the subscriber: a new state was published."""
+        self._event.set()
+
+    async def next(self) -> ControllerStatus:
+        """Wait for a state newer than the one returned by the previous
+        call and return it.
+        """
+        while True:
+            if self.hub.status is not None and self.hub.poll_time > self._poll_time:
+                self._poll_time = self.hub.poll_time
+                return self.hub.status
+
+            self._event.clear()
+            if self.max_age is None:
+                await self._event.wait()
+                continue
+            timeout = self.hub.poll_time + self.max_age - time.monotonic()
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout=max(timeout, 0))
+            except asyncio.TimeoutError:
+                await self.hub.poll()
+
+    def close(self) -> None:
+        """Stop receiving states."""
+        self.hub.subscriptions.discard(self)
+
+    def __aiter__(self) -> "StateSubscription":
+        return self
+
+    async def __anext__(self) -> ControllerStatus:
+        return await self.next()
+
+    def __enter__(self) -> "StateSubscription":
+        return self
+
+    def __exit__(
+        self,
+        type: None | type[BaseException],
+        value: None | BaseException,
+        traceback: None | types.TracebackType,
+    ) -> None:
+        self.close()
+
+
+class ControllerStateHub:
+    """Share the state of the controller between all its readers.
+
+    The positions, motion status and readiness of the controller are read
+    together in one round trip (see `ATHexapodController.snapshot`) and the
+    resulting immutable `ControllerStatus` is handed to every reader that
+    accepts a state that old, and to every subscriber. Concurrent polls
+    share a single round trip.
+
+    The hub is also the only reader of the position changed query (#6),
+    which reports the changes since the previous #6: its readers compare
+    `change_count` with the value they saw last, instead of querying #6
+    and consuming the changes the other readers are waiting for.
+
+    Parameters
+    ----------
+    controller : `ATHexapodController`
+        The controller to poll.
+    log : `logging.Logger`
+        The log for this class.
+    status_callback : `Callable` or `None`
+        Function called with every new state published, e.g. to record
+        it.
+
+    Attributes
+    ----------
+    status : `ControllerStatus` or `None`
+        The latest state; None until the first poll.
+    poll_time : `float`
+        Monotonic time at which the poll that read ``status`` was sent
+        (seconds).
+    subscriptions : `set` of `StateSubscription`
+        The subscribers.
+    change_count : `int`
+        The number of position changed queries (#6) that reported a change.
+    """
+
+    def __init__(
+        self,
+        controller: ATHexapodController,
+        log: logging.Logger,
+        status_callback: None | Callable[[ControllerStatus], None] = None,
+    ) -> None:
+        self.controller = controller
+        self.log = log
+        self.status_callback = status_callback
+        self.status: None | ControllerStatus = None
+        self.poll_time: float = -math.inf
+        self.subscriptions: set[StateSubscription] = set()
+        self.change_count: int = 0
+        self._poll_task: None | asyncio.Task = None
+        self._poll_start: float = -math.inf
+        # Axes referenced (FRF?) and when they were read; this only changes
+        # when the hexapod is referenced.
+        self._referenced: None | tuple[bool, ...] = None
+        self._referenced_time: float = -math.inf
+
+    @property
+    def age(self) -> float:
+        """Return the time since the latest state was polled (seconds)."""
+        return time.monotonic() - self.poll_time
+
+    async def poll(self) -> ControllerStatus:
+        """Read the state of the controller, publish it and return it.
+
+        If a poll is in progress, wait for it instead of starting another.
+        """
+        if self._poll_task is None or self._poll_task.done():
+            self._poll_start = time.monotonic()
+            self._poll_task = asyncio.create_task(self._poll(self._poll_start))
+            # Nobody may be left waiting for the poll if it fails.
+            self._poll_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return await asyncio.shield(self._poll_task)
+
+    async def _poll(self, poll_start: float) -> ControllerStatus:
+        """Read the state of the controller and publish it.
+
+        Parameters
+        ----------
+        poll_start : `float`
+            Monotonic time at which the poll started (seconds).
+        """
+        status = await self.controller.snapshot(read_error=False, read_state=True)
+        self.publish(status, poll_start)
+        return status
+
+    def publish(self, status: ControllerStatus, poll_time: float) -> None:
+        """Make a state the latest one and notify the subscribers.
+
+        Parameters
+        ----------
+        status : `ControllerStatus`
+            The state.
+        poll_time : `float`
+            Monotonic time at which it was polled (seconds); older states
+            than the latest are ignored.
+        """
+        if poll_time <= self.poll_time:
+            return
+        self.status = status
+        self.poll_time = poll_time
+        if self.status_callback is not None:
+            self.status_callback(status)
+        for subscription in self.subscriptions:
+            subscription.notify()
+
+    async def position_changed(self) -> int:
+        """Query whether the positions changed (#6) and return
+        `change_count`.
+
+        The positions changed since a reader's previous call if the count
+        differs from the one it returned then.
+
+        Returns
+        -------
+        change_count : `int`
+            The number of position changed queries that reported a change.
+        """
+        if any(await self.controller.position_changed()):
+            self.change_count += 1
+        return self.change_count
+
+    async def get(self, max_age: float = 0.0) -> ControllerStatus:
+        """Return a state polled at most ``max_age`` ago.
+
+        The latest state is returned if it is recent enough, without any
+        round trip to the controller; otherwise the controller is polled,
+        or the poll in progress is awaited if it started recently enough.
+
+        Parameters
+        ----------
+        max_age : `float`
+            The maximum age of the state (seconds).
+
+        Returns
+        -------
+        status : `ControllerStatus`
+            The state.
+        """
+        oldest = time.monotonic() - max_age
+        if self.status is not None and self.poll_time >= oldest:
+            return self.status
+        if self._poll_task is not None and not self._poll_task.done() and self._poll_start >= oldest:
+            return await asyncio.shield(self._poll_task)
+        if self._poll_task is not None and not self._poll_task.done():
+            # The poll in progress started too early; wait for it to end so
+            # that the new one does not run concurrently.
+            await asyncio.wait([self._poll_task])
+        return await self.poll()
+
+    def subscribe(self, max_age: None | float = None) -> StateSubscription:
+        """Subscribe to the states.
+
+        Parameters
+        ----------
+        max_age : `float` or `None`
+            Poll the controller if no new state is published within
+            ``max_age`` of the latest one (seconds); if None, only receive
+            the states polled by others.
+
+        Returns
+        -------
+        subscription : `StateSubscription`
+            The subscription; iterate over it to get the states, close it
+            when done.
+        """
+        subscription = StateSubscription(self, max_age=max_age)
+        self.subscriptions.add(subscription)
+        return subscription
+
+    async def referenced(self, max_age: float = math.inf) -> tuple[bool, ...]:
+        """Return whether each axis is referenced.
+
+        Parameters
+        ----------
+        max_age : `float`
+            The maximum age of the value (seconds). By default, once all
+            the axes are referenced the value is not read again until
+            `invalidate_referenced` is called.
+
+        Returns
+        -------
+        referenced : `tuple` of `bool`
+            Is each of the X, Y, Z, U, V and W axes referenced?
+        """
+        if (
+            self._referenced is None
+            or not all(self._referenced)
+            or time.monotonic() - self._referenced_time > max_age
+        ):
+            read_time = time.monotonic()
+            self._referenced = tuple(await self.controller.referencing_result())
+            self._referenced_time = read_time
+        return self._referenced
+
+    def invalidate_referenced(self) -> None:
+        """Read the referencing result again next time: the hexapod is
+        being referenced.
+        """
+        self._referenced = None
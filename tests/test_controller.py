@@ -0,0 +1,394 @@
+"""
+This file is part of ts_athexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import contextlib
+import time
+import typing
+import unittest
+
+import numpy as np
+from lsst.ts import athexapod
+
+STD_TIMEOUT = 5
+
+
+class ControllerTestCase(unittest.IsolatedAsyncioTestCase):
+    @contextlib.asynccontextmanager
+    async def make_controller(
+        self, **kwargs: typing.Any
+    ) -> typing.AsyncGenerator[athexapod.ATHexapodController, None]:
+        mock_server = athexapod.MockServer(port=0)
+        await mock_server.start_task
+        self.mock_server = mock_server
+        controller = athexapod.ATHexapodController(port=mock_server.port, timeout=STD_TIMEOUT, **kwargs)
+        await controller.connect()
+        try:
+            yield controller
+        finally:
+            await controller.disconnect()
+            await mock_server.close()
+            await mock_server.done_task
+
+    async def test_pipelined_queries(self) -> None:
+        for pipelined in (True, False):
+            with self.subTest(pipelined=pipelined):
+                async with self.make_controller(pipelined=pipelined) as controller:
+                    await controller.set_position(1, 2, 3, 0.1, 0.2, 0.3)
+                    target, error, ready, referenced = await asyncio.gather(
+                        controller.target_position(),
+                        controller.get_error(),
+                        controller.controller_ready(),
+                        controller.referencing_result(),
+                    )
+                    self.assertEqual(target, [1, 2, 3, 0.1, 0.2, 0.3])
+                    self.assertEqual(error, 0)
+                    self.assertEqual(len(referenced), 6)
+                    self.assertEqual(controller.num_pending, 0)
+
+    async def test_snapshot(self) -> None:
+        async with self.make_controller() as controller:
+            await controller.set_position(1, 2, 3, 0.1, 0.2, 0.3)
+            status = await controller.snapshot()
+            self.assertEqual(status.target_position, (1, 2, 3, 0.1, 0.2, 0.3))
+            self.assertEqual(len(status.real_position), 6)
+            self.assertEqual(len(status.following_error), 6)
+            self.assertEqual(status.error, 0)
+            self.assertGreater(status.timestamp, 0)
+            for name in ("MOV?", "#3", "ERR?"):
+                self.assertEqual(controller.metrics.commands[name].rtt_count, 1)
+                self.assertGreater(controller.metrics.commands[name].bytes_in, 0)
+            with self.assertRaises(AttributeError):
+                status.error = 1  # type: ignore[misc]
+
+    async def test_all_commands(self) -> None:
+        async with self.make_controller() as controller:
+            # Every command goes through a slow network.
+            self.mock_server.inject_fault(latency=0.002)
+            self.assertTrue(await controller.controller_ready())
+            await controller.reference()
+            self.assertEqual(await controller.referencing_result(), [True] * 6)
+            self.assertEqual(await controller.get_position_unit(), ["MM", "MM", "MM", "DEG", "DEG", "DEG"])
+
+            await controller.set_low_position_soft_Limit(-5, -5, -5, -2, -2, -2)
+            await controller.set_high_position_soft_limit(5, 5, 5, 2, 2, 2)
+            self.assertEqual(await controller.get_low_position_soft_limit(), [-5, -5, -5, -2, -2, -2])
+            self.assertEqual(await controller.get_high_position_soft_limit(), [5, 5, 5, 2, 2, 2])
+            self.assertEqual(await controller.check_offset(x=4), [True] * 6)
+            self.assertEqual(await controller.check_offset(x=6), [False] * 6)
+            self.assertEqual(
+                (await controller.check_poses([[0, 0, 1, 0, 0, 0], [0, 0, 6, 0, 0, 0]])).tolist(),
+                [True, False],
+            )
+            await controller.activate_soft_limit(z=False)
+            self.assertEqual(
+                await controller.check_active_soft_limit(), [True, True, False, True, True, True]
+            )
+            self.assertEqual(await controller.check_offset(z=6), [True] * 6)
+
+            await controller.set_clv(x=2, w=0.5)
+            self.assertEqual(await controller.get_clv(), [2, 1, 1, 1, 1, 0.5])
+            await controller.set_pivot_point(0, 0, 1)
+            self.assertEqual(await controller.getPivotPoint(), [0, 0, 1])
+            await controller.set_sv(5)
+            self.assertEqual(await controller.get_sv(), 5)
+            settings = await controller.refresh_settings()
+            self.assertEqual(settings.soft_limit_active, [True, True, False, True, True, True])
+
+            await controller.set_position(x=1)
+            await controller.offset(y=-1)
+            self.assertEqual(await controller.target_position(), [1, -1, 0, 0, 0, 0])
+            self.assertEqual(await controller.motion_status(), (True, True, False, False, False, False))
+            self.assertEqual(await controller.on_target(), [False, False, True, True, True, True])
+            status = await asyncio.wait_for(
+                athexapod.InPositionDetector(controller=controller, log=controller.log).wait(),
+                timeout=STD_TIMEOUT,
+            )
+            np.testing.assert_allclose(status.real_position, (1, -1, 0, 0, 0, 0), atol=0.001)
+            self.assertEqual(await controller.get_error(), 0)
+
+            # Stop halts the platform where it is.
+            await controller.set_position(x=-1)
+            self.assertTrue(any(await controller.position_changed()))
+            await controller.stop_all_axes()
+            self.assertEqual(await controller.motion_status(), (False,) * 6)
+            await controller.position_changed()
+            self.assertFalse(any(await controller.position_changed()))
+            position = await controller.real_position()
+            self.assertLess(position[0], 1)
+            self.assertGreater(position[0], -1)
+            self.assertEqual(await controller.target_position(), position)
+            self.assertEqual(await controller.get_error(), athexapod.PIError.E10_PI_CNTR_STOP.value)
+
+    async def test_in_position(self) -> None:
+        async with self.make_controller() as controller:
+            self.mock_server.device.settle_time = 0.2
+            hub = athexapod.ControllerStateHub(controller=controller, log=controller.log)
+            detector = athexapod.InPositionDetector(
+                controller=controller, log=controller.log, tolerance=0.001, settle_time=0.05, state_hub=hub
+            )
+            t0 = time.monotonic()
+            await controller.set_position(0.1, 0, 0, 0, 0, 0)
+            status = await controller.snapshot(read_error=False, read_state=True, read_on_target=True)
+            self.assertFalse(detector.in_position(status))
+
+            status = await asyncio.wait_for(detector.wait(), timeout=STD_TIMEOUT)
+            # 0.1 mm at 1 mm/s, then the settle times of the controller and
+            # the detector.
+            self.assertGreaterEqual(time.monotonic() - t0, 0.1 + 0.2 + 0.05)
+            self.assertEqual(status.on_target, (True,) * 6)
+            self.assertAlmostEqual(status.real_position[0], 0.1)
+            # The states polled by the detector are shared.
+            self.assertIs(hub.status, status)
+
+            # Waits in progress are interrupted, later waits are not.
+            await controller.set_position(0.2, 0, 0, 0, 0, 0)
+            wait_task = asyncio.create_task(detector.wait())
+            await asyncio.sleep(0.05)
+            detector.interrupt("Stopped")
+            with self.assertRaises(athexapod.MotionInterruptedError):
+                await asyncio.wait_for(wait_task, timeout=STD_TIMEOUT)
+            status = await asyncio.wait_for(detector.wait(), timeout=STD_TIMEOUT)
+            self.assertAlmostEqual(status.real_position[0], 0.2)
+
+    async def test_settings_cache(self) -> None:
+        async with self.make_controller(cache_ttl=60) as controller:
+            await controller.set_sv(2.0)
+            self.assertEqual(await controller.get_sv(), 2.0)
+
+            self.mock_server.device.sv = 3.0
+            self.assertEqual(await controller.get_sv(), 2.0)
+            self.assertEqual(await controller.get_sv(refresh=True), 3.0)
+
+            await controller.set_pivot_point(0.1, 0.2, 0.3)
+            self.assertEqual(await controller.getPivotPoint(), [0.1, 0.2, 0.3])
+            await controller.set_pivot_point(0.4, 0.5, 0.6)
+            self.assertEqual(await controller.getPivotPoint(), [0.4, 0.5, 0.6])
+
+            controller.cache_ttl = 0
+            self.mock_server.device.sv = 4.0
+            self.assertEqual(await controller.get_sv(), 4.0)
+
+    async def test_motion_monitor(self) -> None:
+        async with self.make_controller() as controller:
+            states: list[bool] = []
+
+            async def state_callback(moving: bool) -> None:
+                states.append(moving)
+
+            monitor = athexapod.MotionMonitor(
+                controller=controller, log=controller.log, state_callback=state_callback
+            )
+            await controller.set_position(1, 0, 0, 0, 0, 0)
+            motion_status = await asyncio.wait_for(monitor.wait(expected_duration=1), timeout=STD_TIMEOUT)
+            self.assertFalse(any(motion_status))
+            self.assertEqual(states, [True, False])
+            self.assertFalse(monitor.moving)
+
+            await controller.set_position(2, 0, 0, 0, 0, 0)
+            done = monitor.start()
+            monitor.interrupt("Stopped")
+            with self.assertRaises(athexapod.MotionInterruptedError):
+                await done
+            await monitor.close()
+
+    async def test_reconnect(self) -> None:
+        async with self.make_controller(reconnect_policy=athexapod.ReconnectPolicy()) as controller:
+            await controller.set_position(1, 2, 3, 0.1, 0.2, 0.3)
+            # MOV has no reply: wait for a round trip so that it is processed
+            # before the connection drops.
+            await controller.target_position()
+            await self.mock_server.close_client()
+            while controller.reconnect_count == 0:
+                self.assertFalse(controller.connection_failed)
+                await asyncio.sleep(0.01)
+            self.assertFalse(controller.reconnecting)
+            self.assertEqual(await controller.target_position(), [1, 2, 3, 0.1, 0.2, 0.3])
+
+        async with self.make_controller() as controller:
+            await self.mock_server.close_client()
+            while not controller.connection_failed:
+                await asyncio.sleep(0.01)
+            with self.assertRaises(RuntimeError):
+                await controller.real_position()
+
+    async def test_resync(self) -> None:
+        async with self.make_controller() as controller:
+            await controller.set_position(1, 2, 3, 0.1, 0.2, 0.3)
+
+            # A reply shorter than expected must not shift the next ones.
+            controller.timeout = 0.5
+            with self.assertRaises(asyncio.TimeoutError):
+                await controller.write_command("\3", num_line=7)
+            controller.timeout = STD_TIMEOUT
+            self.assertEqual(await controller.target_position(), [1, 2, 3, 0.1, 0.2, 0.3])
+            self.assertGreaterEqual(controller.resync_count, 1)
+            self.assertFalse(controller.resync_needed)
+
+            resync_count = controller.resync_count
+            await self.mock_server.write_str("garbage")
+            while controller.resync_count == resync_count:
+                await asyncio.sleep(0.01)
+            self.assertEqual(await controller.target_position(), [1, 2, 3, 0.1, 0.2, 0.3])
+            self.assertEqual(controller.num_pending, 0)
+
+    async def test_resync_stale_sentinel(self) -> None:
+        async with self.make_controller() as controller:
+            # The reply to a controller ready query in flight is discarded
+            # before the resynchronization starts; it must still be counted
+            # as stale, so that the reply to the sentinel is recognized.
+            ready_task = asyncio.create_task(controller.controller_ready())
+            while controller.num_pending == 0:
+                await asyncio.sleep(0)
+            async with controller.write_lock:
+                controller._request_resync("test")
+                while controller.discarded_lines == 0:
+                    await asyncio.sleep(0.01)
+            self.assertTrue(await asyncio.wait_for(ready_task, timeout=STD_TIMEOUT))
+            self.assertFalse(controller.resync_needed)
+            self.assertEqual(await controller.target_position(), [0, 0, 0, 0, 0, 0])
+
+    async def test_injected_faults(self) -> None:
+        async with self.make_controller(reconnect_policy=athexapod.ReconnectPolicy()) as controller:
+            self.mock_server.random.seed(0)
+            target = [1, 2, 3, 0.1, 0.2, 0.3]
+            await controller.set_position(*target)
+
+            self.mock_server.inject_fault("MOV?", latency=0.05, jitter=0.01, bandwidth=1000, count=1)
+            self.assertEqual(await controller.target_position(), target)
+            self.assertGreaterEqual(controller.metrics.commands["MOV?"].rtt_max, 0.05)
+            self.assertEqual(self.mock_server.faults, dict())
+
+            # Lost replies time out, then the stream is resynchronized.
+            controller.timeout = 0.5
+            for fault in ("drop_probability", "truncate_probability"):
+                with self.subTest(fault=fault):
+                    self.mock_server.inject_fault("MOV?", count=1, **{fault: 1})
+                    with self.assertRaises(asyncio.TimeoutError):
+                        await controller.target_position()
+                    self.assertEqual(await controller.target_position(), target)
+            controller.timeout = STD_TIMEOUT
+
+            self.mock_server.inject_fault("MOV", error=athexapod.PIError.E7_PI_CNTR_POS_OUT_OF_LIMITS.value)
+            await controller.set_position(*target)
+            self.assertEqual(
+                await controller.get_error(), athexapod.PIError.E7_PI_CNTR_POS_OUT_OF_LIMITS.value
+            )
+            self.assertEqual(await controller.get_error(), 0)
+            self.mock_server.clear_faults()
+
+            # Disconnected in the middle of a reply.
+            self.mock_server.inject_fault("MOV?", disconnect_probability=1, count=1)
+            with contextlib.suppress(ConnectionError, asyncio.TimeoutError):
+                await controller.target_position()
+            while controller.reconnect_count == 0:
+                await asyncio.sleep(0.01)
+            self.assertEqual(await controller.target_position(), target)
+
+    async def test_coalesce(self) -> None:
+        for coalesce in (True, False):
+            with self.subTest(coalesce=coalesce):
+                async with self.make_controller(coalesce=coalesce) as controller:
+                    positions = await asyncio.gather(*[controller.real_position() for _ in range(5)])
+                    self.assertEqual(len(set(tuple(position) for position in positions)), 1)
+                    stats = controller.metrics.commands["#3"]
+                    self.assertEqual(stats.count + stats.coalesced, 5)
+                    if coalesce:
+                        self.assertGreater(stats.coalesced, 0)
+                    else:
+                        self.assertEqual(stats.coalesced, 0)
+
+                    # A query never shares a reply read before a command that
+                    # changes the state.
+                    _, _, new_target = await asyncio.gather(
+                        controller.target_position(),
+                        controller.set_position(1, 2, 3, 0.1, 0.2, 0.3),
+                        controller.target_position(),
+                    )
+                    self.assertEqual(new_target, [1, 2, 3, 0.1, 0.2, 0.3])
+
+                    # Reading the error only resets the error: position
+                    # queries keep sharing their replies.
+                    coalesced = stats.coalesced
+                    await asyncio.gather(
+                        controller.real_position(),
+                        controller.snapshot(read_error=True),
+                        controller.real_position(),
+                    )
+                    self.assertEqual(stats.coalesced - coalesced, 1 if coalesce else 0)
+
+    async def test_state_hub(self) -> None:
+        async with self.make_controller() as controller:
+            await controller.set_position(1, 2, 3, 0.1, 0.2, 0.3)
+            recorded: list[athexapod.ControllerStatus] = []
+            hub = athexapod.ControllerStateHub(
+                controller=controller, log=controller.log, status_callback=recorded.append
+            )
+
+            with hub.subscribe() as subscription, hub.subscribe(max_age=0.1) as polling_subscription:
+                # Concurrent readers share one round trip.
+                statuses = await asyncio.gather(hub.get(max_age=1), hub.get(max_age=1), hub.poll())
+                self.assertEqual(controller.metrics.commands["MOV?"].count, 1)
+                self.assertIs(statuses[0], statuses[2])
+                status = statuses[0]
+                self.assertEqual(status.target_position, (1, 2, 3, 0.1, 0.2, 0.3))
+                self.assertEqual(len(status.motion_status), 6)
+                self.assertTrue(status.ready)
+                self.assertIsNone(status.error)
+                self.assertIs(await subscription.next(), status)
+
+                # Recent enough: no round trip.
+                self.assertIs(await hub.get(max_age=60), status)
+                self.assertEqual(controller.metrics.commands["MOV?"].count, 1)
+
+                # The polling subscription polls when the state gets old.
+                self.assertIs(await polling_subscription.next(), status)
+                new_status = await asyncio.wait_for(polling_subscription.next(), timeout=STD_TIMEOUT)
+                self.assertIsNot(new_status, status)
+                self.assertIs(await subscription.next(), new_status)
+            self.assertEqual(hub.subscriptions, set())
+            # Every state published is handed to the callback.
+            self.assertIs(recorded[0], status)
+            self.assertIs(recorded[-1], hub.status)
+
+            self.assertEqual(len(await hub.referenced()), 6)
+
+            # A reader of the position changed query does not consume the
+            # change another reader has not seen yet.
+            telemetry_count = monitor_count = await hub.position_changed()
+            await controller.set_position(1, 2, 4, 0.1, 0.2, 0.3)
+            await asyncio.sleep(0.05)
+            self.assertNotEqual(await hub.position_changed(), telemetry_count)
+            self.assertNotEqual(hub.change_count, monitor_count)
+
+    async def test_stop_all_axes_bypasses_locks(self) -> None:
+        async with self.make_controller(pipelined=False) as controller:
+            async with controller.lock, controller.write_lock:
+                latency = await asyncio.wait_for(controller.stop_all_axes(), timeout=STD_TIMEOUT)
+            self.assertEqual(latency, controller.last_stop_latency)
+            self.assertGreaterEqual(latency, 0)
+            self.assertIsNotNone(controller.last_stop_time)
+
+
+if __name__ == "__main__":
+    unittest.main()
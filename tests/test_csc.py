@@ -31,9 +31,11 @@ import yaml
 from lsst.ts import athexapod
 from lsst.ts import salobj
 from lsst.ts.xml import sal_enums
+from lsst.ts.xml.enums import ATHexapod
 
 STD_TIMEOUT = 15
-SHORT_TIMEOUT = 5
+# Simulated seconds per wall clock second in the tests that move.
+TIME_SCALE = 10
 TEST_CONFIG_DIR = pathlib.Path(__file__).parents[1].joinpath("tests", "data", "config")
 
 
@@ -130,11 +132,12 @@ class CscTestCase(salobj.BaseCscTestCase, unittest.IsolatedAsyncioTestCase):
             self.assertEqual(7, event.limitWMax)
 
     async def test_move_to_position(self) -> None:
-        async with self.make_csc(initial_state=salobj.State.STANDBY, simulation_mode=1):
+        async with self.make_csc(
+            initial_state=salobj.State.STANDBY, simulation_mode=1, time_scale=TIME_SCALE
+        ):
             await self.remote.cmd_start.start(timeout=STD_TIMEOUT)
             await self.remote.cmd_enable.start(timeout=STD_TIMEOUT)
             await self.remote.cmd_moveToPosition.set_start(timeout=STD_TIMEOUT, x=4, y=6, z=3, u=4, v=3, w=6)
-            await asyncio.sleep(SHORT_TIMEOUT)
             event = await self.assert_next_sample(
                 self.remote.evt_inPosition, flush=False, timeout=STD_TIMEOUT
             )
@@ -153,6 +156,107 @@ class CscTestCase(salobj.BaseCscTestCase, unittest.IsolatedAsyncioTestCase):
             self.assertEqual(3, event.positionV)
             self.assertEqual(6, event.positionW)
 
+    async def test_move_out_of_workspace(self) -> None:
+        async with self.make_csc(
+            initial_state=salobj.State.ENABLED,
+            config_dir=TEST_CONFIG_DIR,
+            override="check_workspace.yaml",
+            simulation_mode=1,
+        ):
+            with salobj.assertRaisesAckError():
+                await self.remote.cmd_moveToPosition.set_start(timeout=STD_TIMEOUT, x=0, y=0, z=40)
+            with salobj.assertRaisesAckError():
+                await self.remote.cmd_applyPositionOffset.set_start(timeout=STD_TIMEOUT, w=45)
+
+    async def test_follow_mode(self) -> None:
+        async with self.make_csc(
+            initial_state=salobj.State.ENABLED,
+            config_dir=TEST_CONFIG_DIR,
+            override="follow_mode.yaml",
+            simulation_mode=1,
+            time_scale=TIME_SCALE,
+        ):
+            # Targets out of the soft limits are rejected, not queued.
+            with salobj.assertRaisesAckError():
+                await self.remote.cmd_moveToPosition.set_start(timeout=STD_TIMEOUT, z=40)
+            with salobj.assertRaisesAckError():
+                await self.remote.cmd_applyPositionOffset.set_start(timeout=STD_TIMEOUT, w=45)
+            self.assertTrue(self.csc.follower.idle)
+
+            await self.remote.cmd_moveToPosition.set_start(timeout=STD_TIMEOUT, z=2)
+            await self.remote.cmd_applyPositionOffset.set_start(timeout=STD_TIMEOUT, z=1)
+            # The follow moves are reported as motion.
+            while True:
+                event = await self.remote.evt_detailedState.next(flush=False, timeout=STD_TIMEOUT)
+                if event.detailedState == ATHexapod.DetailedState.INMOTION:
+                    break
+            await asyncio.wait_for(self.csc.follower.wait_idle(), timeout=STD_TIMEOUT)
+            self.assertEqual(self.csc.follower.num_failures, 0)
+            self.assertAlmostEqual((await self.csc.controller.target_position())[2], 3)
+            self.assertEqual(self.csc.summary_state, salobj.State.ENABLED)
+
+    async def test_validate_poses(self) -> None:
+        async with self.make_csc(initial_state=salobj.State.ENABLED, simulation_mode=1):
+            poses = [[0, 0, 1, 0, 0, 0], [0, 0, 13, 0, 0, 0], [60, 0, 0, 0, 0, 0]]
+            validation = await self.csc.validate_poses(poses)
+            self.assertEqual(validation.reachable.tolist(), [True, True, False])
+            self.assertEqual(validation.within_limits.all(axis=1).tolist(), [True, False, False])
+            self.assertEqual(validation.valid.tolist(), [True, False, False])
+            self.assertIsNone(validation.controller)
+
+    async def test_scan(self) -> None:
+        async with self.make_csc(initial_state=salobj.State.ENABLED, simulation_mode=1):
+            points = []
+
+            async def point_callback(index: int, position: tuple[float, ...]) -> None:
+                points.append(index)
+
+            poses = [[0, 0, z, 0, 0, 0] for z in (0.5, 1.0, 1.5)]
+            positions = await self.csc.scan(poses, dwell_times=0.01, point_callback=point_callback)
+            self.assertEqual(points, [0, 1, 2])
+            for pose, position in zip(poses, positions):
+                self.assertAlmostEqual(position[2], pose[2])
+            self.assertAlmostEqual(self.csc.evt_positionUpdate.data.positionZ, 1.5)
+
+            # The whole list is checked before moving.
+            with self.assertRaises(salobj.ExpectedError):
+                await self.csc.scan([[0, 0, 2, 0, 0, 0], [0, 0, 40, 0, 0, 0]])
+            self.assertAlmostEqual((await self.csc.controller.target_position())[2], 1.5)
+
+            # stopAllAxes fails the scan; cancelling the caller cancels it.
+            scan_task = asyncio.create_task(
+                self.csc.scan(poses, dwell_times=60, point_callback=point_callback)
+            )
+            while not points[3:]:
+                await asyncio.sleep(0.01)
+            await self.remote.cmd_stopAllAxes.start(timeout=STD_TIMEOUT)
+            with self.assertRaises(salobj.ExpectedError):
+                await scan_task
+
+            scan_task = asyncio.create_task(
+                self.csc.scan(poses, dwell_times=60, point_callback=point_callback)
+            )
+            while not points[4:]:
+                await asyncio.sleep(0.01)
+            scan_task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await scan_task
+            self.assertTrue(self.csc.scan_task.cancelled())
+
+    async def test_position_telemetry_on_change(self) -> None:
+        async with self.make_csc(initial_state=salobj.State.ENABLED, simulation_mode=1):
+            await self.assert_next_sample(self.remote.tel_positionStatus)
+            self.remote.tel_positionStatus.flush()
+
+            # Still: only the position changed query is sent.
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.remote.tel_positionStatus.next(flush=False, timeout=1.5)
+            self.assertGreater(self.csc.controller.metrics.commands["#6"].count, 0)
+
+            await self.remote.cmd_moveToPosition.set_start(timeout=STD_TIMEOUT, x=0.1)
+            position = await self.assert_next_sample(self.remote.tel_positionStatus)
+            self.assertAlmostEqual(position.setpointPosition[0], 0.1)
+
     async def test_set_max_system_speeds(self) -> None:
         async with self.make_csc(initial_state=salobj.State.STANDBY, simulation_mode=1):
             await self.remote.cmd_start.start(timeout=STD_TIMEOUT)
@@ -162,14 +266,15 @@ class CscTestCase(salobj.BaseCscTestCase, unittest.IsolatedAsyncioTestCase):
             self.assertEqual(1, event.systemSpeed)
 
     async def test_apply_position_offset(self) -> None:
-        async with self.make_csc(initial_state=salobj.State.STANDBY, simulation_mode=1):
+        async with self.make_csc(
+            initial_state=salobj.State.STANDBY, simulation_mode=1, time_scale=TIME_SCALE
+        ):
             await self.remote.cmd_start.start(timeout=STD_TIMEOUT)
             await self.remote.cmd_enable.start(timeout=STD_TIMEOUT)
             position = await self.assert_next_sample(self.remote.tel_positionStatus)
             await self.remote.cmd_applyPositionOffset.set_start(
                 timeout=STD_TIMEOUT, x=3, y=2, z=1.5, u=0.6, v=0.5, w=0.3
             )
-            await asyncio.sleep(SHORT_TIMEOUT)
             await self.assert_next_sample(self.remote.evt_positionUpdate)
             event = await self.assert_next_sample(self.remote.evt_positionUpdate)
             self.assertEqual(3 + position.reportedPosition[0], event.positionX)
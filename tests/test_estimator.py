@@ -0,0 +1,62 @@
+"""
+This file is part of ts_athexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import math
+import unittest
+
+import numpy as np
+from lsst.ts import athexapod
+
+
+class MoveEstimatorTestCase(unittest.TestCase):
+    def test_rotation_matrix(self) -> None:
+        rotation = athexapod.rotation_matrix(3, 5, 7)
+        np.testing.assert_allclose(rotation @ rotation.T, np.eye(3), atol=1e-12)
+        np.testing.assert_allclose(athexapod.rotation_matrix(0, 0, 90) @ [1, 0, 0], [0, 1, 0], atol=1e-12)
+
+    def test_duration(self) -> None:
+        estimator = athexapod.MoveEstimator(acceleration=10, overhead=0.1)
+        self.assertEqual(estimator.duration([0] * 6, [0] * 6, velocity=1), 0)
+
+        # Long move: cruise at the velocity plus the time to accelerate.
+        duration = estimator.duration([0] * 6, [3, 4, 0, 0, 0, 0], velocity=1)
+        self.assertAlmostEqual(duration, 5 + 0.1 + 0.1)
+
+        # Short move: triangular profile.
+        duration = estimator.duration([0] * 6, [0.01, 0, 0, 0, 0, 0], velocity=1)
+        self.assertAlmostEqual(duration, 2 * math.sqrt(0.01 / 10) + 0.1)
+
+        with self.assertRaises(ValueError):
+            estimator.duration([0] * 6, [1, 0, 0, 0, 0, 0], velocity=0)
+
+    def test_pivot(self) -> None:
+        estimator = athexapod.MoveEstimator()
+        target = [0, 0, 0, 0, 0, 10]
+        self.assertAlmostEqual(estimator.path_length([0] * 6, target), 10)
+        # Rotating 10 deg about a pivot 100 mm away moves the origin ~17 mm.
+        length = estimator.path_length([0] * 6, target, pivot=[100, 0, 0])
+        self.assertAlmostEqual(length, 2 * 100 * math.sin(math.radians(5)))
+
+
+if __name__ == "__main__":
+    unittest.main()
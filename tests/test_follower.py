@@ -0,0 +1,113 @@
+"""
+This file is part of ts_athexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import logging
+import unittest
+
+import numpy as np
+from lsst.ts import athexapod
+
+STD_TIMEOUT = 5
+
+
+class PoseFollowerTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.moves: list[list[float]] = []
+        self.follower = athexapod.PoseFollower(
+            move=self.move, read_target=self.read_target, log=logging.getLogger(), min_interval=0.02
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.follower.close()
+
+    async def move(self, target: list[float]) -> None:
+        self.moves.append(target)
+        await asyncio.sleep(0.05)
+
+    async def read_target(self) -> list[float]:
+        return [1, 0, 0, 0, 0, 0]
+
+    async def test_offsets(self) -> None:
+        for _ in range(20):
+            self.follower.add_offset([0, 0, 0.1, 0, 0, 0.01])
+            await asyncio.sleep(0.005)
+        await asyncio.wait_for(self.follower.wait_idle(), timeout=STD_TIMEOUT)
+
+        self.assertEqual(self.follower.num_updates, 20)
+        self.assertLess(len(self.moves), 5)
+        self.assertEqual(self.follower.num_moves, len(self.moves))
+        np.testing.assert_allclose(self.moves[-1], [1, 0, 2, 0, 0, 0.2])
+
+    async def test_latest_target_wins(self) -> None:
+        self.follower.set_target([1, 2, 3, 0, 0, 0])
+        await asyncio.sleep(0.01)
+        for z in range(10):
+            self.follower.set_target([0, 0, z, 0, 0, 0])
+        self.follower.add_offset([0, 0, 0.5, 0, 0, 0])
+        await asyncio.wait_for(self.follower.wait_idle(), timeout=STD_TIMEOUT)
+        self.assertEqual(self.moves, [[1, 2, 3, 0, 0, 0], [0, 0, 9.5, 0, 0, 0]])
+
+        # Offsets apply to the latest target sent.
+        self.follower.add_offset([1, 0, 0, 0, 0, 0])
+        await asyncio.wait_for(self.follower.wait_idle(), timeout=STD_TIMEOUT)
+        self.assertEqual(self.moves[-1], [1, 0, 9.5, 0, 0, 0])
+
+        # The target the pending updates would move to.
+        self.follower.set_target([0, 0, 1, 0, 0, 0])
+        self.follower.add_offset([0, 0, 1, 0, 0, 0])
+        np.testing.assert_allclose(await self.follower.merged_target([1, 0, 0, 0, 0, 0]), [1, 0, 2, 0, 0, 0])
+        await asyncio.wait_for(self.follower.wait_idle(), timeout=STD_TIMEOUT)
+        np.testing.assert_allclose(await self.follower.merged_target(), [0, 0, 2, 0, 0, 0])
+
+    async def test_failed_move(self) -> None:
+        failures = []
+
+        async def failing_move(target: list[float]) -> None:
+            await asyncio.sleep(0.05)
+            raise RuntimeError("Failed")
+
+        async def failure_callback(target: None | list[float], exception: Exception) -> None:
+            failures.append((target, exception))
+
+        self.follower.move = failing_move
+        self.follower.failure_callback = failure_callback
+        self.follower.add_offset([0, 0, 1, 0, 0, 0])
+        await asyncio.wait_for(self.follower.wait_idle(), timeout=STD_TIMEOUT)
+        self.assertEqual(self.follower.num_failures, 1)
+        self.assertIsNone(self.follower.target)
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(failures[0][0], [1, 0, 1, 0, 0, 0])
+        self.assertIsInstance(failures[0][1], RuntimeError)
+
+        # A move interrupted by clear, e.g. after a stop, is not a failure.
+        self.follower.add_offset([0, 0, 1, 0, 0, 0])
+        await asyncio.sleep(0.01)
+        self.follower.clear()
+        await asyncio.wait_for(self.follower.wait_idle(), timeout=STD_TIMEOUT)
+        self.assertEqual(self.follower.num_failures, 1)
+        self.assertEqual(len(failures), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+This file is part of ts_athexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+
+import numpy as np
+from lsst.ts import athexapod
+
+
+class GCSReplyTestCase(unittest.TestCase):
+    def test_parse_axis_values(self) -> None:
+        out = np.zeros(6)
+        values = athexapod.parse_axis_values(b"W=-0.25\n X=1.5\n Y=-2\n Z=3e-1\n U=0\n V=7\n", out=out)
+        self.assertIs(values, out)
+        np.testing.assert_array_equal(values, [1.5, -2, 0.3, 0, 7, -0.25])
+
+        pivot = athexapod.parse_axis_values(bytearray(b"R=0.1\n S=0.2\n T=0.3\n"), keys=athexapod.PIVOT_AXES)
+        np.testing.assert_array_equal(pivot, [0.1, 0.2, 0.3])
+
+    def test_parse_axis_strings(self) -> None:
+        units = athexapod.parse_axis_strings(b"X=MM\n Y=MM\n Z=MM\n U=DEG\n V=DEG\n W=DEG\n")
+        self.assertEqual(units, ["MM", "MM", "MM", "DEG", "DEG", "DEG"])
+
+    def test_bad_reply(self) -> None:
+        for reply in (
+            b"X=1\n Y=2\n",
+            b"X=1\n Y=2\n Z=3\n U=4\n V=5\n Q=6\n",
+            b"X=1\n X=2\n Z=3\n U=4\n V=5\n W=6\n",
+        ):
+            with self.subTest(reply=reply):
+                with self.assertRaises(ValueError):
+                    athexapod.parse_axis_values(reply)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+This file is part of ts_athexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import math
+import unittest
+
+import numpy as np
+from lsst.ts import athexapod
+
+
+class PositionHistoryTestCase(unittest.TestCase):
+    def test_ring_buffer(self) -> None:
+        history = athexapod.PositionHistory(size=5, tolerance=0.01)
+        self.assertEqual(history.window(math.inf), [])
+        self.assertTrue(math.isnan(history.summary().start_time))
+
+        for i in range(8):
+            history.add(float(i), [0] * 6, [i, 0, 0, 0, 0, -i])
+        self.assertEqual(len(history), 5)
+
+        # The buffer wraps: the 5 latest samples are in two segments.
+        segments = history.window(math.inf)
+        self.assertEqual(len(segments), 2)
+        times = np.concatenate([history.times[segment] for segment in segments])
+        np.testing.assert_array_equal(times, [3, 4, 5, 6, 7])
+
+        summary = history.summary(duration=2)
+        self.assertEqual((summary.start_time, summary.end_time, summary.count), (5, 7, 3))
+        self.assertAlmostEqual(summary.mean[0], 6)
+        self.assertAlmostEqual(summary.mean[5], -6)
+        self.assertAlmostEqual(summary.rms[0], math.sqrt((25 + 36 + 49) / 3))
+        self.assertEqual(summary.max[0], 7)
+
+        # The running statistics cover every sample since the reset.
+        self.assertEqual(history.statistics.count, 8)
+        self.assertEqual(history.statistics.as_dict()["max"][5], 7)
+        history.reset()
+        self.assertEqual(history.statistics.count, 0)
+        self.assertEqual(len(history), 5)
+
+    def test_settle_time(self) -> None:
+        history = athexapod.PositionHistory(size=100, tolerance=0.01)
+        history.add(0.0, [0] * 6, [0] * 6)
+        # Move X to 1, settling at t=1.5.
+        for t, x in [(0.5, 0), (1.0, 0.6), (1.5, 0.995), (2.0, 1)]:
+            history.add(t, [1, 0, 0, 0, 0, 0], [x, 0, 0, 0, 0, 0])
+        settle = history.settle_summary()
+        self.assertEqual((settle.num_moves, settle.num_settled), (1, 1))
+        self.assertAlmostEqual(settle.last, 1.0)
+
+        # A second move that does not settle yet.
+        history.add(2.5, [2, 0, 0, 0, 0, 0], [1, 0, 0, 0, 0, 0])
+        settle = history.settle_summary()
+        self.assertEqual((settle.num_moves, settle.num_settled), (2, 1))
+        self.assertAlmostEqual(settle.max, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
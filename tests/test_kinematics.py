@@ -0,0 +1,120 @@
+"""
+This file is part of ts_athexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+
+import numpy as np
+from lsst.ts import athexapod
+
+
+def make_kinematics() -> athexapod.HexapodKinematics:
+    return athexapod.HexapodKinematics.symmetric(
+        base_radius=105,
+        platform_radius=70,
+        base_joint_angle=10,
+        platform_joint_angle=10,
+        height=95,
+        min_length=103,
+        max_length=133,
+    )
+
+
+class HexapodKinematicsTestCase(unittest.TestCase):
+    def test_rotation_matrices(self) -> None:
+        angles = np.array([[3, 5, 7], [0, 0, 90], [-2, 1, 0]])
+        rotations = athexapod.rotation_matrices(angles)
+        self.assertEqual(rotations.shape, (3, 3, 3))
+        for rotation, (u, v, w) in zip(rotations, angles):
+            np.testing.assert_allclose(rotation, athexapod.rotation_matrix(u, v, w))
+
+    def test_strut_lengths(self) -> None:
+        kinematics = make_kinematics()
+        lengths = kinematics.strut_lengths([0] * 6)
+        self.assertEqual(lengths.shape, (6,))
+        np.testing.assert_allclose(lengths, lengths[0])
+
+        # Raising the platform lengthens every strut by the same amount.
+        raised = kinematics.strut_lengths([0, 0, 5, 0, 0, 0])
+        np.testing.assert_allclose(raised, raised[0])
+        self.assertGreater(raised[0], lengths[0])
+
+        # A batch is the same as the poses one by one; the pivot matters.
+        poses = np.array([[1, 2, 3, 0.1, 0.2, 0.3], [-4, 0, 1, 2, -1, 5]])
+        pivot = (10, -5, 20)
+        batch = kinematics.strut_lengths(poses, pivot=pivot)
+        self.assertEqual(batch.shape, (2, 6))
+        for pose, pose_lengths in zip(poses, batch):
+            np.testing.assert_allclose(kinematics.strut_lengths(pose, pivot=pivot), pose_lengths)
+        self.assertFalse(np.allclose(kinematics.strut_lengths(poses), batch))
+
+        # Rotating about Z keeps the three-fold symmetry, not the six-fold.
+        rotated = kinematics.strut_lengths([0, 0, 0, 0, 0, 10])
+        np.testing.assert_allclose(rotated[::2], rotated[0])
+        np.testing.assert_allclose(rotated[1::2], rotated[1])
+        self.assertGreater(abs(rotated[1] - rotated[0]), 1)
+
+        with self.assertRaises(ValueError):
+            kinematics.strut_lengths([0] * 5)
+
+    def test_reachable(self) -> None:
+        kinematics = make_kinematics()
+        poses = [
+            [0] * 6,
+            [22.5, 0, 0, 0, 0, 0],
+            [0, 0, -12.5, 0, 0, 0],
+            [0, 0, 0, 7.5, 0, 0],
+            [0, 0, 0, 0, 0, 12.5],
+            [50, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0, 45],
+        ]
+        np.testing.assert_array_equal(kinematics.reachable(poses), [True] * 5 + [False] * 2)
+        self.assertTrue(kinematics.reachable([4, 6, 3, 4, 3, 6]))
+
+        self.assertIsNone(kinematics.check([1, 2, 3, 0.1, 0.2, 0.3]))
+        reason = kinematics.check([0, 0, 40, 0, 0, 0])
+        assert reason is not None
+        self.assertIn("strut 1", reason)
+
+        with self.assertRaises(ValueError):
+            athexapod.HexapodKinematics(np.zeros((6, 3)), np.zeros((6, 3)), min_length=2, max_length=1)
+
+    def test_validate(self) -> None:
+        kinematics = make_kinematics()
+        poses = np.zeros((4, 6))
+        poses[1, 2] = 10
+        poses[2, 0] = 50
+        poses[3, 5] = -5
+        validation = kinematics.validate(poses, low_limits=[-20, -20, -5, -5, -5, -3], high_limits=[20] * 6)
+        self.assertEqual(validation.strut_lengths.shape, (4, 6))
+        np.testing.assert_array_equal(validation.reachable, [True, True, False, True])
+        np.testing.assert_array_equal(validation.within_limits.all(axis=1), [True, True, False, False])
+        self.assertFalse(validation.within_limits[3, 5])
+        np.testing.assert_array_equal(validation.valid, [True, True, False, False])
+
+        validation = kinematics.validate(poses)
+        self.assertTrue(validation.within_limits.all())
+        np.testing.assert_array_equal(validation.valid, validation.reachable)
+
+
+if __name__ == "__main__":
+    unittest.main()
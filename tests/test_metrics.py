@@ -0,0 +1,65 @@
+"""
+This file is part of ts_athexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import math
+import unittest
+
+from lsst.ts import athexapod
+
+
+class ControllerMetricsTestCase(unittest.TestCase):
+    def test_command_name(self) -> None:
+        self.assertEqual(athexapod.command_name("\5"), "#5")
+        self.assertEqual(athexapod.command_name("MOV? X Y Z U V W"), "MOV?")
+        self.assertEqual(athexapod.command_name("ERR?"), "ERR?")
+
+    def test_record(self) -> None:
+        metrics = athexapod.ControllerMetrics()
+        for rtt in (0.0004, 0.003, 0.003, 0.003, 1.5):
+            metrics.record_sent("#3", num_bytes=2, lock_wait=0.001)
+            metrics.record_reply("#3", num_bytes=30, rtt=rtt)
+        metrics.record_sent("#3", num_bytes=2, lock_wait=0)
+        metrics.record_timeout("#3")
+
+        stats = metrics.commands["#3"]
+        self.assertEqual(stats.count, 6)
+        self.assertEqual(stats.timeouts, 1)
+        self.assertEqual(stats.bytes_out, 12)
+        self.assertEqual(stats.bytes_in, 150)
+        self.assertAlmostEqual(stats.lock_wait, 0.005)
+        self.assertEqual(sum(stats.histogram), 5)
+        self.assertAlmostEqual(stats.rtt_mean, (0.0004 + 0.009 + 1.5) / 5)
+        self.assertEqual(stats.rtt_percentile(50), 0.005)
+        self.assertEqual(stats.rtt_percentile(100), 1.5)
+        self.assertEqual(metrics.as_dict()["#3"].rtt_max, 1.5)
+        self.assertIn("#3: 6/1", metrics.summary())
+
+        metrics.reset(start_time=10)
+        self.assertEqual(metrics.commands, dict())
+        self.assertEqual(metrics.start_time, 10)
+        self.assertTrue(math.isnan(metrics.get("#5").rtt_percentile(50)))
+        self.assertEqual(metrics.summary(), "#5: 0/0, rtt nan/nan/0.0 ms, lock 0.0 ms, 0/0 B")
+
+
+if __name__ == "__main__":
+    unittest.main()
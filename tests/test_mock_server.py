@@ -0,0 +1,133 @@
+"""
+This file is part of ts_athexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import unittest
+
+import numpy as np
+from lsst.ts import athexapod
+
+
+class HexapodDeviceTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_axis_arguments(self) -> None:
+        device = athexapod.HexapodDevice()
+        # Any subset of the axes, in any order, in any numeric format.
+        self.assertIsNone(await device.parse_message("MOV W +3 X -1.5 Z 2e-1"))
+        self.assertEqual(
+            await device.parse_message("MOV? X Y Z U V W"),
+            "X=-1.5\n Y=0.0\n Z=0.2\n U=0.0\n V=0.0\n W=3.0",
+        )
+        self.assertEqual(await device.parse_message("MOV? W X"), "W=3.0\n X=-1.5")
+
+        await device.parse_message("NLM X -10 Y -1E1")
+        await device.parse_message("PLM X 5")
+        self.assertEqual(await device.parse_message("NLM? X Y"), "X=-10.0\n Y=-10.0")
+        self.assertEqual(await device.parse_message("PLM? X"), "X=5.0")
+
+        await device.parse_message("SPI X 0.1 Y -2 Z 3")
+        self.assertEqual(await device.parse_message("SPI?"), "R=0.1\n S=-2.0\n T=3.0")
+        await device.parse_message("VLS 2")
+        self.assertEqual(await device.parse_message("VLS?"), "2.0")
+        self.assertEqual(await device.parse_message("ERR?"), "0")
+
+    async def test_errors(self) -> None:
+        device = athexapod.HexapodDevice()
+        for line, error in (
+            ("FOO X 1", athexapod.PIError.E2_PI_CNTR_UNKNOWN_COMMAND),
+            ("MOV X", athexapod.PIError.E1_PI_CNTR_PARAM_SYNTAX),
+            ("MOV X one", athexapod.PIError.E1_PI_CNTR_PARAM_SYNTAX),
+            ("MOV Q 1", athexapod.PIError.E15_PI_CNTR_INVALID_AXIS_IDENTIFIER),
+            ("MOV? XY", athexapod.PIError.E15_PI_CNTR_INVALID_AXIS_IDENTIFIER),
+            ("\3 X", athexapod.PIError.E1_PI_CNTR_PARAM_SYNTAX),
+        ):
+            with self.subTest(line=line):
+                self.assertIsNone(await device.parse_message(line))
+                self.assertEqual(await device.parse_message("ERR?"), str(error.value))
+                # Reading the error resets it.
+                self.assertEqual(await device.parse_message("ERR?"), "0")
+        self.assertEqual(await device.parse_message("MOV? X"), "X=0.0")
+
+    async def test_scaled_clock(self) -> None:
+        with self.assertRaises(ValueError):
+            athexapod.ScaledClock(scale=0)
+        clock = athexapod.ScaledClock(scale=100)
+        self.assertEqual(clock.wall_duration(1), 0.01)
+        device = athexapod.HexapodDevice(clock=clock)
+        # 1 mm at 1 mm/s takes 10 ms of wall time.
+        await device.parse_message("MOV X 1")
+        self.assertNotEqual(await device.parse_message("\5"), "0")
+        await clock.sleep(1.2)
+        self.assertEqual(await device.parse_message("\5"), "0")
+        self.assertEqual(await device.parse_message("\3"), "X=1.0\n Y=0.0\n Z=0.0\n U=0.0\n V=0.0\n W=0.0")
+        self.assertEqual(await device.parse_message("ONT? X"), "X=1")
+
+        t0 = clock.monotonic()
+        await asyncio.sleep(0.01)
+        self.assertGreaterEqual(clock.monotonic() - t0, 1)
+
+    async def test_synchronized_motion(self) -> None:
+        kinematics = athexapod.HexapodKinematics.symmetric(
+            base_radius=105,
+            platform_radius=70,
+            base_joint_angle=10,
+            platform_joint_angle=10,
+            height=95,
+            min_length=103,
+            max_length=133,
+        )
+        device = athexapod.HexapodDevice(clock=athexapod.ScaledClock(scale=100), kinematics=kinematics)
+        await device.parse_message("VLS 2")
+        await device.parse_message("SPI X 0 Y 0 Z 10")
+        await device.parse_message("MOV X 2 Y 1 W 1")
+        motion = device.motion
+        target = [2, 1, 0, 0, 0, 1]
+        # The duration is the one the CSC predicts.
+        estimator = athexapod.MoveEstimator(acceleration=motion.acceleration, overhead=0)
+        self.assertAlmostEqual(motion.duration, estimator.duration([0] * 6, target, 2, [0, 0, 10]))
+
+        # All the axes move together and arrive together.
+        np.testing.assert_allclose(
+            motion.pose(motion.start_tai + motion.duration / 2), np.divide(target, 2), atol=1e-6
+        )
+        np.testing.assert_allclose(motion.pose(motion.end_tai), target)
+        self.assertEqual(
+            motion.axes_moving(motion.start_tai + motion.duration / 2).tolist(),
+            [True, True, False, False, False, True],
+        )
+        await device.clock.sleep(motion.duration)
+        self.assertEqual(await device.parse_message("\5"), "0")
+        np.testing.assert_allclose(device.strut_lengths(), kinematics.strut_lengths(target, [0, 0, 10]))
+
+        # Out of the soft limits, then out of the workspace: not moved.
+        for line in ("MOV X 30", "MOV X 20 Y 20"):
+            with self.subTest(line=line):
+                await device.parse_message(line)
+                self.assertEqual(
+                    await device.parse_message("ERR?"),
+                    str(athexapod.PIError.E7_PI_CNTR_POS_OUT_OF_LIMITS.value),
+                )
+                np.testing.assert_array_equal(motion.end_pose, target)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+This file is part of ts_athexapod
+
+Developed for the Vera C. Rubin Observatory Telescope and Site Systems.
+This product includes software developed by the LSST Project
+(https://www.lsst.org).
+See the COPYRIGHT file at the top-level directory of this distribution
+For details of code ownership.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABLITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have recieved a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import logging
+import typing
+import unittest
+
+from lsst.ts import athexapod
+
+
+class TelemetrySchedulerTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_rates(self) -> None:
+        scheduler = athexapod.TelemetryScheduler(log=logging.getLogger())
+        calls: dict[str, list[float]] = dict(fast=[], slow=[])
+
+        def make_callback(name: str) -> typing.Callable[[], typing.Awaitable[None]]:
+            async def callback() -> None:
+                calls[name].append(scheduler.clock())
+                # Take a good part of the period; it must not add up.
+                await asyncio.sleep(0.01)
+
+            return callback
+
+        fast = scheduler.add("fast", 0.05, make_callback("fast"))
+        scheduler.add("slow", 0.2, make_callback("slow"))
+        with self.assertRaises(ValueError):
+            scheduler.add("fast", 1, make_callback("fast"))
+
+        run_task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(1.02)
+        run_task.cancel()
+
+        self.assertIn(len(calls["fast"]), range(20, 23))
+        self.assertIn(len(calls["slow"]), range(5, 7))
+        # Deadlines are absolute: the periods do not drift.
+        start = calls["fast"][0]
+        for i, call_time in enumerate(calls["fast"]):
+            self.assertAlmostEqual(call_time - start, i * 0.05, delta=0.03)
+        self.assertEqual(fast.overruns, 0)
+
+    async def test_overruns(self) -> None:
+        scheduler = athexapod.TelemetryScheduler(log=logging.getLogger())
+        num_calls = 0
+
+        async def slow_callback() -> None:
+            nonlocal num_calls
+            num_calls += 1
+            await asyncio.sleep(0.125)
+
+        stream = scheduler.add("slow", 0.05, slow_callback)
+        await scheduler.run(keep_running=lambda: num_calls < 4)
+        self.assertEqual(stream.count, 4)
+        # Each call misses the next two deadlines.
+        self.assertEqual(stream.overruns, 8)
+        self.assertIn("slow: 4 calls, 0 errors, 8 overruns", scheduler.summary())
+
+    async def test_failures(self) -> None:
+        scheduler = athexapod.TelemetryScheduler(log=logging.getLogger(), max_failures=2)
+        num_calls = 0
+
+        async def flaky_callback() -> None:
+            nonlocal num_calls
+            num_calls += 1
+            if num_calls in (2, 4, 5):
+                raise TimeoutError(f"Call {num_calls} timed out.")
+
+        async def healthy_callback() -> None:
+            pass
+
+        flaky = scheduler.add("flaky", 0.01, flaky_callback)
+        healthy = scheduler.add("healthy", 0.01, healthy_callback)
+        # A single failure is logged and the streams keep running; the
+        # second one in a row ends the run.
+        with self.assertRaises(TimeoutError):
+            await scheduler.run()
+        self.assertEqual(num_calls, 5)
+        self.assertEqual(flaky.errors, 3)
+        self.assertEqual(flaky.failures, 2)
+        self.assertEqual(healthy.count, 4)
+        self.assertEqual(healthy.errors, 0)
+
+        with self.assertRaises(ValueError):
+            athexapod.TelemetryScheduler(log=logging.getLogger(), max_failures=0)
+
+
+if __name__ == "__main__":
+    unittest.main()